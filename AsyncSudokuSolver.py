@@ -0,0 +1,294 @@
+import asyncio
+import collections
+import concurrent.futures
+import os
+import time
+from SudokuSolver import *
+
+class AsyncSudokuSolver:
+    """
+        asyncio front-end of SudokuSolver.solve_sudoku_exact_cover for a solving service
+        Requests go through a bounded queue. A batching task groups them into micro-batches of up to max_batch_size
+        puzzles (waiting at most max_batch_delay seconds for a batch to fill) and each batch is solved by one call
+        to a process pool, so the cost of a round trip to a worker is shared by the puzzles of the batch
+            - Backpressure : at most max_pending_batches batches are on the pool at a time, the other requests wait
+              in the queue, and once max_queue_size requests are waiting solve waits for room (or raises asyncio.QueueFull)
+            - Deadlines : solve raises TimeoutError as soon as the timeout expires, wherever the request is. A request whose
+              timeout expired is never sent to the pool, on the pool the search gets what is left of the timeout as time_budget
+              and is aborted cooperatively when it runs out (see SudokuSolver.search_solution) so that the worker moves on
+              to the next puzzle of the batch. Requests without a timeout get default_timeout : the puzzles of a batch are solved
+              one after the other and a single hard puzzle would otherwise hold back the whole batch
+        Queue depth, batch sizes and latency percentiles (from the call to solve to its result) are in get_metrics
+        Usage :
+            async with AsyncSudokuSolver() as solver:
+                solution_text = await solver.solve(puzzle_text, timeout = 0.5)
+    """
+    def __init__(self, workers = None, max_queue_size = 1024, max_batch_size = 32, max_batch_delay = 0.002, max_pending_batches = None,
+                 backend = "array", propagate = True, latency_window = 10000, default_timeout = 10.0):
+        """
+            workers defaults to the number of cores and max_pending_batches to twice the number of workers
+            default_timeout is the timeout in seconds of the requests that do not give one (None means no limit)
+            backend and propagate are passed to SudokuSolver.solve_sudoku_exact_cover
+            Latency percentiles are computed on the last latency_window requests
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue_size = max_queue_size
+        self.max_batch_size = max_batch_size
+        self.max_batch_delay = max_batch_delay
+        self.max_pending_batches = max_pending_batches or 2 * self.workers
+        self.backend = backend
+        self.propagate = propagate
+        self.default_timeout = default_timeout
+        self.queue = None
+        self.batch_slots = None
+        self.executor = None
+        self.batcher = None
+        self.pending_batches = set()
+        #Metrics
+        self.submitted = 0
+        self.completed = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.rejected = 0
+        self.batches = 0
+        self.batched_requests = 0
+        self.largest_batch = 0
+        self.max_queue_depth = 0
+        self.latencies = collections.deque(maxlen = latency_window)
+
+    async def start(self):
+        """
+            Starts the worker processes (each one builds the 9x9 template matrix once) and the batching task
+        """
+        self.queue = asyncio.Queue(self.max_queue_size)
+        self.batch_slots = asyncio.Semaphore(self.max_pending_batches)
+        self.executor = concurrent.futures.ProcessPoolExecutor(self.workers, initializer = init_async_solver_worker,
+                                                               initargs = (self.backend, self.propagate))
+        self.batcher = asyncio.create_task(self.run_batcher())
+
+    async def stop(self):
+        """
+            Waits for the requests already queued to be answered, then stops the batching task and the worker processes
+        """
+        await self.queue.join()
+        self.batcher.cancel()
+        try:
+            await self.batcher
+        except asyncio.CancelledError:
+            pass
+        self.executor.shutdown()
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *args):
+        await self.stop()
+
+    async def solve(self, puzzle, timeout = None, wait = True):
+        """
+            Returns the solution of a puzzle (text, grid or Sudoku config) as compact text (the puzzle itself when it has no solution)
+            timeout : seconds from now after which TimeoutError is raised, waiting for room in the queue included
+                      (default_timeout when None)
+            wait : when the queue is full, wait for room (True) or raise asyncio.QueueFull at once (False)
+            Raises ValueError if the puzzle cannot be solved (malformed text for example, the message names the original error)
+        """
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        if timeout is None:
+            timeout = self.default_timeout
+        deadline = None if timeout is None else start + timeout
+        future = loop.create_future()
+        request = (SudokuSolver.get_puzzle_text(puzzle), deadline, future)
+        try:
+            if not wait or not self.queue.full():
+                self.queue.put_nowait(request)
+            elif timeout is None:
+                await self.queue.put(request)
+            else:
+                await asyncio.wait_for(self.queue.put(request), timeout)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+        self.submitted += 1
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        try:
+            #Timeouts in the queue or on the pool come back as the exception of the future
+            return await asyncio.wait_for(asyncio.shield(future), None if deadline is None else deadline - time.perf_counter())
+        except TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            #A caller that timed out or went away leaves a cancelled future : the batcher drops the request
+            #and run_batch ignores its result
+            future.cancel()
+            self.latencies.append(time.perf_counter() - start)
+
+    async def run_batcher(self):
+        """
+            Batching task : takes the requests from the queue and sends them to the pool in batches
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            #A batch is only formed once the pool can take it, until then the requests pile up in the queue
+            await self.batch_slots.acquire()
+            batch = [await self.queue.get()]
+            if self.queue.qsize() < self.max_batch_size - 1:
+                await asyncio.sleep(self.max_batch_delay)
+            while len(batch) < self.max_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            now = time.perf_counter()
+            live_batch = []
+            for request in batch:
+                _, deadline, future = request
+                if future.done():
+                    #The caller went away
+                    self.queue.task_done()
+                elif deadline is not None and deadline <= now:
+                    future.set_exception(TimeoutError("Timed out in the queue"))
+                    self.queue.task_done()
+                else:
+                    live_batch.append(request)
+            if not live_batch:
+                self.batch_slots.release()
+                continue
+            task = loop.create_task(self.run_batch(live_batch))
+            self.pending_batches.add(task)
+            task.add_done_callback(self.pending_batches.discard)
+
+    async def run_batch(self, batch):
+        """
+            Solves one batch on the pool and answers its requests
+        """
+        loop = asyncio.get_running_loop()
+        self.batches += 1
+        self.batched_requests += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        try:
+            #Deadlines travel as wall clock times, the only clock shared with the workers
+            offset = time.time() - time.perf_counter()
+            tasks = [(sudoku_text, None if deadline is None else deadline + offset) for sudoku_text, deadline, _ in batch]
+            try:
+                results = await loop.run_in_executor(self.executor, solve_batch_worker, tasks)
+            except Exception as error:
+                #The pool itself failed (a worker died for example), every request of the batch gets the error
+                results = [("error", "{}: {}".format(type(error).__name__, error))] * len(batch)
+            for (_, _, future), (status, value) in zip(batch, results):
+                if future.done():
+                    #solve already raised TimeoutError (and counted it)
+                    continue
+                if status == "solved":
+                    self.completed += 1
+                    future.set_result(value)
+                elif status == "timeout":
+                    future.set_exception(TimeoutError(value))
+                else:
+                    self.errors += 1
+                    future.set_exception(ValueError(value))
+        finally:
+            for _ in batch:
+                self.queue.task_done()
+            self.batch_slots.release()
+
+    @staticmethod
+    def get_percentile(sorted_values, p):
+        """
+            Returns the p-th percentile of an already sorted list
+        """
+        if not sorted_values:
+            return 0.0
+        return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+    def get_metrics(self):
+        """
+            Returns the service metrics as a dictionary : current and max queue depth, batches on the pool,
+            request counts (submitted, completed, timeouts, errors, rejected because the queue was full),
+            number of batches with their mean and max size, and p50 / p90 / p99 / max latency in seconds
+        """
+        latencies = sorted(self.latencies)
+        return {"queue_depth" : self.queue.qsize() if self.queue is not None else 0, "max_queue_depth" : self.max_queue_depth,
+                "pending_batches" : len(self.pending_batches), "submitted" : self.submitted, "completed" : self.completed,
+                "timeouts" : self.timeouts, "errors" : self.errors, "rejected" : self.rejected,
+                "batches" : self.batches, "mean_batch_size" : self.batched_requests / self.batches if self.batches else 0.0,
+                "max_batch_size" : self.largest_batch,
+                "latency_p50" : AsyncSudokuSolver.get_percentile(latencies, 50), "latency_p90" : AsyncSudokuSolver.get_percentile(latencies, 90),
+                "latency_p99" : AsyncSudokuSolver.get_percentile(latencies, 99), "latency_max" : latencies[-1] if latencies else 0.0}
+
+
+#State of the pool worker processes
+async_solver_backend = "array"
+async_solver_propagate = True
+
+def init_async_solver_worker(backend, propagate):
+    """
+        Pool initializer : builds the 9x9 template matrix once per worker
+    """
+    global async_solver_backend, async_solver_propagate
+    async_solver_backend = backend
+    async_solver_propagate = propagate
+    SudokuExactCoverConverter.get_template_matrix(9, backend)
+
+def solve_batch_worker(batch):
+    """
+        Pool task : solves a list of (puzzle text, wall clock deadline or None) pairs one after the other
+        Returns a list of ("solved", solution text), ("timeout", message) or ("error", message) pairs
+    """
+    results = []
+    for sudoku_text, deadline in batch:
+        time_budget = None if deadline is None else deadline - time.time()
+        try:
+            if time_budget is not None and time_budget <= 0:
+                raise TimeoutError("Timed out before the search started")
+            results.append(("solved", SudokuSolver.solve_sudoku_text(sudoku_text, async_solver_backend, propagate = async_solver_propagate, time_budget = time_budget)))
+        except TimeoutError as error:
+            results.append(("timeout", str(error)))
+        except Exception as error:
+            #A puzzle that cannot be read must not fail the rest of the batch
+            results.append(("error", "{}: {}".format(type(error).__name__, error)))
+    return results
+
+
+if __name__ == '__main__':
+    import argparse
+    from SudokuDataset import SudokuDataset
+
+    parser = argparse.ArgumentParser(description = "Load test of AsyncSudokuSolver : concurrent clients solving puzzles from a quizzes/solutions CSV file")
+    parser.add_argument("--file", default = "sudoku.csv")
+    parser.add_argument("--requests", type = int, default = 5000)
+    parser.add_argument("--clients", type = int, default = 256, help = "number of concurrent clients")
+    parser.add_argument("--timeout", type = float, default = None, help = "per request timeout in seconds (the solver's default_timeout if not given)")
+    parser.add_argument("--workers", type = int, default = os.cpu_count())
+    parser.add_argument("--max-batch-size", type = int, default = 32)
+    parser.add_argument("--max-batch-delay", type = float, default = 0.002)
+    parser.add_argument("--max-queue-size", type = int, default = 1024)
+    parser.add_argument("--backend", default = "array", choices = list(DLX_BACKENDS))
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    sudoku_tests = SudokuDataset(args.file).sample(args.requests, args.seed)
+
+    async def run_load():
+        tests = iter(sudoku_tests)
+        wrong = 0
+        async def client():
+            nonlocal wrong
+            for sudoku_test, sudoku_solution in tests:
+                try:
+                    if await solver.solve(sudoku_test, args.timeout) != sudoku_solution:
+                        wrong += 1
+                except TimeoutError:
+                    pass
+
+        async with AsyncSudokuSolver(args.workers, args.max_queue_size, args.max_batch_size, args.max_batch_delay, backend = args.backend) as solver:
+            start = time.perf_counter()
+            await asyncio.gather(*(client() for _ in range(args.clients)))
+            elapsed = time.perf_counter() - start
+        print("{} requests from {} clients in {:.2f}s, {:.1f} requests/sec, {} wrong".format(len(sudoku_tests), args.clients, elapsed, len(sudoku_tests) / elapsed, wrong))
+        for name, value in solver.get_metrics().items():
+            print("    {} : {}".format(name, "{:.6f}".format(value) if isinstance(value, float) else value))
+
+    asyncio.run(run_load())
@@ -78,3 +78,89 @@ class CSP:
             nb_ruled_out[x] = nb_ruled_out_x
 
         return sorted(self.domains[X], key = (lambda x : nb_ruled_out[x]))
+
+    def get_initial_assignment(self, rng):
+        """
+            Returns a complete assignment {variable : value} used as the starting point of local search
+            By default every variable gets a random value of its domain
+        """
+        return {X : rng.choice(self.domains[X]) for X in self.variables}
+
+    def get_conflict_model(self, assignment):
+        """
+            Returns the object that local search uses to count and update conflicts of a complete assignment
+        """
+        return NeighborConflictModel(self, assignment)
+
+
+class NeighborConflictModel:
+    """
+        Keeps the number of conflicting neighbors of each variable of a complete assignment
+        and updates it incrementally when a variable changes value (O(neighbors) per change
+        instead of rescanning every pair of variables)
+    """
+    def __init__(self, csp, assignment):
+        self.csp = csp
+        self.assignment = assignment
+        self.counts = {X : self.conflicts(X, assignment[X]) for X in csp.variables}
+
+    def values(self, X):
+        """
+            Returns the values that X can take
+        """
+        return self.csp.domains[X]
+
+    def sample_values(self, X, rng, number_of_values):
+        """
+            Returns number_of_values values of X drawn at random
+        """
+        values = self.values(X)
+        return [rng.choice(values) for _ in range(number_of_values)]
+
+    def conflicts(self, X, x):
+        """
+            Returns the number of neighbors of X that would conflict with X = x
+        """
+        result = 0
+        for Y in self.csp.neighbors[X]:
+            if not self.csp.constraints(X, x, Y, self.assignment[Y]):
+                result += 1
+        return result
+
+    def variable_conflicts(self, X):
+        """
+            Returns the number of neighbors that conflict with the current value of X
+        """
+        return self.counts[X]
+
+    def total_conflicts(self):
+        """
+            Returns the number of conflicting pairs of variables
+        """
+        return sum(self.counts.values()) // 2
+
+    def conflicted_variables(self):
+        """
+            Returns the list of variables that have at least one conflict
+        """
+        return [X for X in self.csp.variables if self.counts[X] > 0]
+
+    def move(self, X, x):
+        """
+            Assigns x to X and updates the conflict counts
+            Returns the variables (other than X) that had no conflict and now have some
+        """
+        old_x = self.assignment[X]
+        newly_conflicted = []
+        for Y in self.csp.neighbors[X]:
+            y = self.assignment[Y]
+            before = not self.csp.constraints(X, old_x, Y, y)
+            after = not self.csp.constraints(X, x, Y, y)
+            if before != after:
+                delta = 1 if after else -1
+                self.counts[X] += delta
+                self.counts[Y] += delta
+                if self.counts[Y] == 1 and after:
+                    newly_conflicted.append(Y)
+        self.assignment[X] = x
+        return newly_conflicted
@@ -0,0 +1,193 @@
+from CSP import *
+
+class CSPSolver:
+    """
+        Backtracking search for a CSP instance
+        Variables are picked with the CSP's MRV heuristic (get_unassigned_variable) and values are tried
+        in least constraining value order
+        After each assignment the solver runs an inference step :
+            "none" : values are only checked against assigned neighbors (check_consistency)
+            "forward_checking" : values conflicting with the new assignment are removed from the neighbors' domains
+            "mac" : Maintaining Arc Consistency, AC-3 is run from the neighbors of the assigned variable
+        Domains are reduced in place and every removed value is pushed on a trail, so backtracking
+        puts values back instead of copying domains
+    """
+    def __init__(self, csp, inference = "mac"):
+        if inference not in ["none", "forward_checking", "mac"]:
+            raise ValueError("Unknown inference {}, expected none, forward_checking or mac".format(inference))
+        self.csp = csp
+        self.inference = inference
+        #Removed (variable, value) pairs, in order
+        self.trail = []
+        #Domains at the time the solver was created, the conflicts cache is computed against them
+        self.initial_domains = {X : list(csp.domains[X]) for X in csp.variables}
+        #(X, x, Y) -> values y of Y's initial domain such that X = x and Y = y violate the constraints
+        self.conflicts_cache = {}
+        self.number_of_nodes = 0
+        self.number_of_backtracks = 0
+
+    def get_conflicts(self, X, x, Y):
+        """
+            Returns the values of Y that are ruled out by X = x
+            The constraints function is called once per value of Y the first time, then the result is cached
+        """
+        key = (X, x, Y)
+        conflicts = self.conflicts_cache.get(key)
+        if conflicts is None:
+            conflicts = [y for y in self.initial_domains[Y] if not self.csp.constraints(X, x, Y, y)]
+            self.conflicts_cache[key] = conflicts
+        return conflicts
+
+    def count_ruled_out(self, X, x):
+        """
+            Counts the values removed from the unassigned neighbors' domains if we assign x to X
+        """
+        result = 0
+        for Y in self.csp.neighbors[X]:
+            domain = self.csp.domains[Y]
+            if len(domain) == 1:
+                continue
+            for y in self.get_conflicts(X, x, Y):
+                if y in domain:
+                    result += 1
+        return result
+
+    def ordered_domain_values(self, X):
+        """
+            Least constraining value ordering using the cached conflicts
+        """
+        return sorted(self.csp.domains[X], key = (lambda x : self.count_ruled_out(X, x)))
+
+    def remove_value(self, X, x):
+        """
+            Removes x from X's domain and records it in the trail
+        """
+        self.csp.domains[X].remove(x)
+        self.trail.append((X, x))
+
+    def undo(self, trail_length):
+        """
+            Puts back the values removed after the trail had trail_length entries
+        """
+        while len(self.trail) > trail_length:
+            X, x = self.trail.pop()
+            self.csp.domains[X].append(x)
+
+    def assign(self, X, x):
+        """
+            Reduces X's domain to x
+        """
+        for value in list(self.csp.domains[X]):
+            if value != x:
+                self.remove_value(X, value)
+
+    def forward_check(self, assigned_variables):
+        """
+            Removes the values conflicting with the assigned variables from their neighbors' domains
+            Neighbors whose domain becomes a single value are considered assigned and checked in turn
+            Returns False if a domain becomes empty
+        """
+        queue = list(assigned_variables)
+        while queue:
+            X = queue.pop()
+            x = self.csp.get(X)
+            for Y in self.csp.neighbors[X]:
+                domain = self.csp.domains[Y]
+                was_assigned = len(domain) == 1
+                for y in self.get_conflicts(X, x, Y):
+                    if y in domain:
+                        self.remove_value(Y, y)
+                if not domain:
+                    return False
+                if len(domain) == 1 and not was_assigned:
+                    queue.append(Y)
+        return True
+
+    def revise(self, X, Y):
+        """
+            Removes the values of X that have no support in Y's domain
+            Returns True if X's domain has been changed
+        """
+        revised = False
+        domain_Y = self.csp.domains[Y]
+        for x in list(self.csp.domains[X]):
+            conflicts = self.get_conflicts(X, x, Y)
+            if len(conflicts) < len(domain_Y):
+                #There are more values in Y's domain than values ruled out by x, so x has a support
+                continue
+            if all(y in conflicts for y in domain_Y):
+                self.remove_value(X, x)
+                revised = True
+        return revised
+
+    def ac3(self, arcs):
+        """
+            Makes the arcs (X, Y) consistent and propagates the changes to the neighbors of revised variables
+            Returns False if a domain becomes empty
+        """
+        queue = list(arcs)
+        #Arcs waiting in the queue, an arc is never queued twice
+        queued = set(queue)
+        while queue:
+            arc = queue.pop()
+            queued.discard(arc)
+            X, Y = arc
+            if self.revise(X, Y):
+                if not self.csp.domains[X]:
+                    return False
+                for Z in self.csp.neighbors[X]:
+                    if Z != Y and (Z, X) not in queued:
+                        queued.add((Z, X))
+                        queue.append((Z, X))
+        return True
+
+    def infer(self, X):
+        """
+            Runs the inference step after X has been assigned
+        """
+        if self.inference == "forward_checking":
+            return self.forward_check([X])
+        if self.inference == "mac":
+            return self.ac3((Y, X) for Y in self.csp.neighbors[X])
+        return True
+
+    def backtrack(self):
+        """
+            Recursive backtracking search, returns True when all the variables are assigned
+        """
+        X = self.csp.get_unassigned_variable()
+        if X is None:
+            return True
+        self.number_of_nodes += 1
+        for x in self.ordered_domain_values(X):
+            if self.inference == "none" and not self.csp.check_consistency(X, x):
+                continue
+            trail_length = len(self.trail)
+            self.assign(X, x)
+            if self.infer(X) and self.backtrack():
+                return True
+            self.undo(trail_length)
+            self.number_of_backtracks += 1
+        return False
+
+    def initial_inference(self):
+        """
+            Makes the initial domains consistent before the search
+        """
+        assigned_variables = [X for X in self.csp.variables if self.csp.assigned(X)]
+        if self.inference == "forward_checking":
+            return self.forward_check(assigned_variables)
+        if self.inference == "mac":
+            return self.ac3((X, Y) for X in self.csp.variables for Y in self.csp.neighbors[X])
+        return all(self.csp.check_consistency(X, self.csp.get(X)) for X in assigned_variables)
+
+    def solve(self):
+        """
+            Solves the CSP, on success every domain is reduced to the value of its variable and True is returned
+            Else the domains are restored and False is returned
+        """
+        self.trail = []
+        if self.initial_inference() and self.backtrack():
+            return True
+        self.undo(0)
+        return False
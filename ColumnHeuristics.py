@@ -0,0 +1,68 @@
+import random
+
+class MRVHeuristic:
+    """
+        Knuth's S heuristic (minimum remaining values) : the column with the fewest rows, leftmost one on ties
+        This is the matrix's own select_column, with the size buckets enabled it is the first column of the smallest bucket
+    """
+    def select_column(self, problem):
+        return problem.select_column()
+
+class RandomTieBreakHeuristic:
+    """
+        The column with the fewest rows, ties are broken at random (seed makes the choices reproducible)
+        Restarting a search with different seeds gives different search trees of the same quality
+    """
+    def __init__(self, seed = None):
+        self.rng = random.Random(seed)
+
+    def select_column(self, problem):
+        smallest_columns = problem.get_smallest_columns()
+        if len(smallest_columns) == 1:
+            return smallest_columns[0]
+        return self.rng.choice(smallest_columns)
+
+class WeightedHeuristic:
+    """
+        dom/wdeg for exact cover : each column has a weight, starting at 1 (or given by weights, a dictionary column index -> weight),
+        that grows by one every time the column is found empty (a dead end). The column with the smallest size / weight is selected,
+        leftmost one on ties, so the search learns to start with the columns that caused failures
+        Columns with at most one row are still returned at once
+    """
+    def __init__(self, weights = None):
+        self.weights = dict(weights or {})
+
+    def select_column(self, problem):
+        weights = self.weights
+        best_column = None
+        best_score = None
+        for column in problem.iterate_cells(problem.root, 'R'):
+            size = problem.column_size(column)
+            if size <= 1:
+                if size == 0:
+                    column_index = problem.get_column_index(column)
+                    weights[column_index] = weights.get(column_index, 1) + 1
+                return column
+            score = size / weights.get(problem.get_column_index(column), 1)
+            if best_score is None or score < best_score:
+                best_column = column
+                best_score = score
+        return best_column
+
+#Column selection heuristics of ExactCoverSolver by name
+COLUMN_HEURISTICS = {
+    "mrv" : MRVHeuristic,
+    "random" : RandomTieBreakHeuristic,
+    "weighted" : WeightedHeuristic,
+}
+
+def get_column_heuristic(heuristic):
+    """
+        Returns a heuristic given by its name in COLUMN_HEURISTICS (built with its default arguments) or as an object
+        with a select_column(problem) method
+    """
+    if isinstance(heuristic, str):
+        if heuristic not in COLUMN_HEURISTICS:
+            raise ValueError("Unknown column heuristic {}, expected one of {}".format(heuristic, list(COLUMN_HEURISTICS)))
+        return COLUMN_HEURISTICS[heuristic]()
+    return heuristic
@@ -1,3 +1,10 @@
+from array import array
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
 
 class Cell:
     """
@@ -8,6 +15,46 @@ class Cell:
         self.row_number = -1
         self.column_number = -1
 
+class RowNames:
+    """
+        Row number -> row name mapping of a matrix
+        The names are a sequence indexed by row number (None means that each row is named by its number)
+        and the reverse row name -> row number dictionary is only built when it is asked for
+    """
+    def __init__(self, names = None):
+        self.names = names
+        self.reverse = None
+
+    def __getitem__(self, row_number):
+        if self.names is None:
+            return row_number
+        return self.names[row_number]
+
+    def __setitem__(self, row_number, row_name):
+        """
+            Names the row that is being appended to the matrix
+        """
+        if self.names is None:
+            if row_name == row_number:
+                return
+            self.names = list(range(row_number))
+        elif not isinstance(self.names, list):
+            self.names = list(self.names)
+        self.names.append(row_name)
+        if self.reverse is not None:
+            self.reverse[row_name] = row_number
+
+    def get_reverse(self, number_of_rows):
+        """
+            Returns the row name -> row number dictionary
+        """
+        if self.reverse is None:
+            if self.names is None:
+                self.reverse = {row_number : row_number for row_number in range(number_of_rows)}
+            else:
+                self.reverse = {row_name : row_number for row_number, row_name in enumerate(self.names)}
+        return self.reverse
+
 class HeaderCell(Cell):
     """
         This cell represents a column head cell
@@ -19,7 +66,15 @@ class HeaderCell(Cell):
         super().__init__()
 
 class DLXMatrix:
-    def __init__(self, columns):
+    def __init__(self, columns, secondary_columns = None, multiplicities = None):
+        """
+            columns : number of columns or list of column names (primary columns, covered exactly once)
+            secondary_columns : number or list of names of secondary columns, appended after the primary ones
+                                they are covered at most once and are kept out of the root header list
+                                (a row without primary columns is never selected)
+            multiplicities : optional dictionary column index -> (lower bound, upper bound) on the number of
+                             selected rows that contain the column (generalized exact cover)
+        """
         #Prepare the root cell of the matrix
         self.root = HeaderCell("Root")
         self.root.isRoot = True
@@ -31,20 +86,26 @@ class DLXMatrix:
         #List of column head cells
         self.column_cells = []
 
-        #Dictionaries that map between row name and row id [from 0 to number of rows - 1]
-        self.row_number_to_row_name = dict()
-        self.row_name_to_row_number = dict()
+        #Mapping between row id [from 0 to number of rows - 1] and row name (see RowNames)
+        self.row_number_to_row_name = RowNames()
+
+        #First (leftmost) cell of each row
+        self.row_heads = []
 
         #Instanciate the column head cells
-        self.prepare_columns(columns)
+        self.prepare_columns(columns, secondary_columns)
+        self.multiplicities = dict(multiplicities or {})
+
+        #(next, previous) links of the size buckets of the primary columns, None unless enabled (see enable_size_buckets)
+        self.size_buckets = None
 
-    def prepare_columns(self, columns):
+    def prepare_columns(self, columns, secondary_columns = None):
         """
             This method create the column head cells of the matrix and puts them in a list 'column_cells'
         """
-        if isinstance(columns, int):
-            columns = list(range(columns))
-        self.number_of_columns = len(columns)
+        columns, secondary_columns = get_column_name_lists(columns, secondary_columns)
+        self.number_of_primary_columns = len(columns)
+        self.number_of_columns = len(columns) + len(secondary_columns)
 
         ## Here we are simply creating a circular doubly linked list of column head cells
         prev_column_head_cell = self.root
@@ -61,6 +122,32 @@ class DLXMatrix:
         self.root.L = prev_column_head_cell
         prev_column_head_cell.R = self.root
 
+        ## Secondary column head cells are not linked to the root so they are never selected
+        for column_id, column in enumerate(secondary_columns, len(columns)):
+            current_column_head_cell = HeaderCell(str(column))
+            current_column_head_cell.column_number = column_id
+            self.column_cells.append(current_column_head_cell)
+
+    def get_column_bounds(self):
+        """
+            Returns the (lower bound, upper bound) of each column :
+            (1, 1) for primary columns and (0, 1) for secondary columns unless multiplicities says otherwise
+        """
+        return get_column_bounds(self.number_of_primary_columns, self.number_of_columns, self.multiplicities)
+
+    def has_multiplicities(self):
+        """
+            Returns True if some column bounds differ from plain exact cover
+        """
+        return self.get_column_bounds() != get_column_bounds(self.number_of_primary_columns, self.number_of_columns, {})
+
+    def get_column_layout(self):
+        """
+            Returns the primary column names, the secondary column names and the multiplicities of the matrix
+        """
+        names = self.get_column_names()
+        return names[:self.number_of_primary_columns], names[self.number_of_primary_columns:], dict(self.multiplicities)
+
     def add_sparse_row(self, row_dict):
         """
             This method appends a sparse row to the matrix
@@ -73,10 +160,10 @@ class DLXMatrix:
         row = row_dict["row_value"]
 
         assert(min(row) >= 0 and max(row) < self.number_of_columns)
+        check_row_columns(row, row_name)
 
         #Populate the row name <-> row id mappers
         self.row_number_to_row_name[self.number_of_rows] = row_name
-        self.row_name_to_row_number[row_name] = self.number_of_rows
 
         #Make sure the row entries are sorted
         row = sorted(row)
@@ -101,6 +188,7 @@ class DLXMatrix:
                 current_cell.L = row_prev_cell
             else :
                 row_start_cell = current_cell
+                self.row_heads.append(current_cell)
 
             #Here we select the current column where we are going to insert a cell
             #We take the column head and the last cell inserted in this column
@@ -128,6 +216,66 @@ class DLXMatrix:
         current_cell.R = row_start_cell
         self.number_of_rows += 1
 
+    @property
+    def row_name_to_row_number(self):
+        """
+            Dictionary row name -> row number, built on first use
+        """
+        return self.row_number_to_row_name.get_reverse(self.number_of_rows)
+
+    @classmethod
+    def from_csr(cls, indptr, indices, row_names = None, columns = None, secondary_columns = None, multiplicities = None):
+        """
+            Builds a matrix from rows given in CSR form : the columns of row i are indices[indptr[i] : indptr[i + 1]]
+            All the cells are linked in one pass instead of one add_sparse_row call per row
+            row_names : optional sequence of row names indexed by row number, kept as is
+                        (without it the row number is the row name)
+            columns : number or list of names of the primary columns, by default every column up to max(indices)
+            The other arguments are the same as the constructor's
+            indptr and indices can be lists or NumPy arrays
+        """
+        rows, columns = get_csr_rows(indptr, indices, row_names, columns, secondary_columns)
+        matrix = cls(columns, secondary_columns, multiplicities)
+        column_cells = matrix.column_cells
+        row_heads = matrix.row_heads
+        #Last cell inserted in each column
+        column_last_cells = list(column_cells)
+        for row_number, row in enumerate(rows):
+            row_prev_cell = None
+            for idx in row:
+                current_cell = Cell()
+                current_cell.row_number = row_number
+                current_cell.column_number = idx
+                current_cell.C = column_cells[idx]
+                current_cell.U = column_last_cell = column_last_cells[idx]
+                column_last_cell.D = column_last_cells[idx] = current_cell
+                if row_prev_cell is None:
+                    row_start_cell = current_cell
+                else:
+                    row_prev_cell.R = current_cell
+                    current_cell.L = row_prev_cell
+                row_prev_cell = current_cell
+            row_start_cell.L = row_prev_cell
+            row_prev_cell.R = row_start_cell
+            row_heads.append(row_start_cell)
+        for column_head_cell, last_cell in zip(matrix.column_cells, column_last_cells):
+            last_cell.D = column_head_cell
+            column_head_cell.U = last_cell
+        for column_head_cell, size in zip(matrix.column_cells, count_column_sizes(indices, matrix.number_of_columns)):
+            column_head_cell.size = size
+        matrix.number_of_rows = len(rows)
+        matrix.row_number_to_row_name = RowNames(row_names)
+        return matrix
+
+    @classmethod
+    def from_dense(cls, dense_matrix, row_names = None, secondary_columns = None, multiplicities = None):
+        """
+            Builds a matrix from a dense 0 / 1 matrix (a NumPy array or a list of lists) using from_csr
+            Its last columns are secondary : secondary_columns is their number or the list of their names
+        """
+        indptr, indices, number_of_columns = get_csr_from_dense(dense_matrix)
+        return cls.from_csr(indptr, indices, row_names, get_dense_primary_columns(number_of_columns, secondary_columns), secondary_columns, multiplicities)
+
     def cover(self, column):
         """
             This method covers a column
@@ -138,6 +286,9 @@ class DLXMatrix:
             column = self.column_cells[column]
         if isinstance(column, Cell) and not isinstance(column, HeaderCell):
             column = column.C
+        if self.size_buckets is not None:
+            self.cover_bucketed(column)
+            return
 
         column.R.L = column.L
         column.L.R = column.R
@@ -159,6 +310,9 @@ class DLXMatrix:
             column = self.column_cells[column]
         if isinstance(column, Cell) and not isinstance(column, HeaderCell):
             column = column.C
+        if self.size_buckets is not None:
+            self.uncover_bucketed(column)
+            return
 
         for current_cell in self.iterate_cells(column, 'U'):
             for row_cell in self.iterate_cells(current_cell, 'L'):
@@ -169,6 +323,319 @@ class DLXMatrix:
         column.R.L = column
         column.L.R = column
 
+    def cover_bucketed(self, column):
+        """
+            cover when the size buckets are enabled : every primary column whose size changes moves to its new bucket
+        """
+        next_in_bucket, previous_in_bucket, max_bucket_size = self.size_buckets
+        first_head = self.number_of_columns + 1
+        number_of_primary_columns = self.number_of_primary_columns
+
+        column.R.L = column.L
+        column.L.R = column.R
+        index = column.column_number
+        if column.size <= max_bucket_size and index < number_of_primary_columns:
+            next_in_bucket[previous_in_bucket[index]] = next_in_bucket[index]
+            previous_in_bucket[next_in_bucket[index]] = previous_in_bucket[index]
+
+        for current_cell in self.iterate_cells(column, 'D'):
+            for row_cell in self.iterate_cells(current_cell, 'R'):
+                row_cell.D.U = row_cell.U
+                row_cell.U.D = row_cell.D
+                column_head_cell = row_cell.C
+                column_head_cell.size -= 1
+                size = column_head_cell.size
+                index = column_head_cell.column_number
+                if size <= max_bucket_size and index < number_of_primary_columns:
+                    #Moved to the front of the bucket of its new size (it was in no bucket if it was too large)
+                    if size < max_bucket_size:
+                        next_in_bucket[previous_in_bucket[index]] = next_in_bucket[index]
+                        previous_in_bucket[next_in_bucket[index]] = previous_in_bucket[index]
+                    head = first_head + size
+                    next_in_bucket[index] = next_in_bucket[head]
+                    previous_in_bucket[index] = head
+                    previous_in_bucket[next_in_bucket[head]] = index
+                    next_in_bucket[head] = index
+
+    def uncover_bucketed(self, column):
+        """
+            uncover when the size buckets are enabled
+        """
+        next_in_bucket, previous_in_bucket, max_bucket_size = self.size_buckets
+        first_head = self.number_of_columns + 1
+        number_of_primary_columns = self.number_of_primary_columns
+
+        for current_cell in self.iterate_cells(column, 'U'):
+            for row_cell in self.iterate_cells(current_cell, 'L'):
+                column_head_cell = row_cell.C
+                column_head_cell.size += 1
+                row_cell.D.U = row_cell
+                row_cell.U.D = row_cell
+                size = column_head_cell.size
+                index = column_head_cell.column_number
+                if size <= max_bucket_size + 1 and index < number_of_primary_columns:
+                    next_in_bucket[previous_in_bucket[index]] = next_in_bucket[index]
+                    previous_in_bucket[next_in_bucket[index]] = previous_in_bucket[index]
+                    if size <= max_bucket_size:
+                        head = first_head + size
+                        next_in_bucket[index] = next_in_bucket[head]
+                        previous_in_bucket[index] = head
+                        previous_in_bucket[next_in_bucket[head]] = index
+                        next_in_bucket[head] = index
+
+        column.R.L = column
+        column.L.R = column
+        index = column.column_number
+        if column.size <= max_bucket_size and index < number_of_primary_columns:
+            head = first_head + column.size
+            next_in_bucket[index] = next_in_bucket[head]
+            previous_in_bucket[index] = head
+            previous_in_bucket[next_in_bucket[head]] = index
+            next_in_bucket[head] = index
+
+    def cover_row(self, cell):
+        """
+            This method covers every other column of the row of 'cell' (going right)
+            It is called once 'cell' has been selected as a part of the solution
+        """
+        for row_cell in self.iterate_cells(cell, 'R'):
+            self.cover(row_cell.C)
+
+    def uncover_row(self, cell):
+        """
+            This method undoes cover_row by uncovering the columns in reverse order (going left)
+        """
+        for row_cell in self.iterate_cells(cell, 'L'):
+            self.uncover(row_cell.C)
+
+    def get_column(self, column):
+        """
+            Returns the column head cell of a column given by its index, one of its cells or its head cell
+        """
+        if isinstance(column, int):
+            return self.column_cells[column]
+        return column.C if not isinstance(column, HeaderCell) else column
+
+    def column_size(self, column):
+        """
+            Returns the number of cells of a column head cell
+        """
+        return column.size
+
+    def get_column_index(self, column):
+        """
+            Returns the index of a column head cell
+        """
+        return column.column_number
+
+    def down(self, cell):
+        """
+            Returns the cell below 'cell' in its column (the column head cell after the last one)
+        """
+        return cell.D
+
+    def enable_stats(self, stats):
+        """
+            Counts cover / uncover calls and updates in stats (a SearchStatistics) until disable_stats is called
+        """
+        stats.instrument(self)
+
+    def disable_stats(self, stats):
+        """
+            Stops counting in stats
+        """
+        stats.release(self)
+
+    def enable_size_buckets(self, max_bucket_size = 2):
+        """
+            Indexes the primary columns of the root list by size so that select_column does not scan the column heads
+            (see build_size_buckets), cover and uncover keep the buckets up to date until disable_size_buckets is called
+            Only the columns with at most max_bucket_size cells are indexed (None indexes every size) : moving a column
+            between buckets costs more than reading its size during a scan, small buckets only pay for the columns
+            that select_column is likely to return, the larger ones are scanned when the buckets are empty
+            hide_row and unhide_row do not update them and must not be called in between
+        """
+        self.size_buckets = build_size_buckets(((column.column_number, column.size) for column in self.iterate_cells(self.root, 'R')),
+                                               self.number_of_columns, self.number_of_rows, max_bucket_size)
+
+    def disable_size_buckets(self):
+        """
+            Drops the size buckets, cover and uncover go back to the plain dancing links
+        """
+        self.size_buckets = None
+
+    def is_empty(self):
+        """
+            Returns True if all the columns have been covered
+        """
+        return self.root.R == self.root
+
+    def is_row_available(self, row_number):
+        """
+            Returns True if none of the columns of the row has been covered
+            (a row is removed from the matrix as soon as one of its columns is covered : its cells are unlinked
+            from their columns, except the cell of the covered column whose head is unlinked from the root list)
+        """
+        row_start_cell = self.row_heads[row_number]
+        cell = row_start_cell
+        while True:
+            if cell.U.D != cell:
+                return False
+            if cell.C.column_number < self.number_of_primary_columns and cell.C.L.R != cell.C:
+                return False
+            cell = cell.R
+            if cell == row_start_cell:
+                return True
+
+    def hide_row(self, cell):
+        """
+            Unlinks every cell of the row of 'cell' from its column (including 'cell')
+        """
+        current_cell = cell
+        while True:
+            current_cell.D.U = current_cell.U
+            current_cell.U.D = current_cell.D
+            current_cell.C.size -= 1
+            current_cell = current_cell.R
+            if current_cell == cell:
+                return
+
+    def unhide_row(self, cell):
+        """
+            Undoes hide_row
+        """
+        current_cell = cell
+        while True:
+            current_cell = current_cell.L
+            current_cell.C.size += 1
+            current_cell.D.U = current_cell
+            current_cell.U.D = current_cell
+            if current_cell == cell:
+                return
+
+    def select_row(self, row_number):
+        """
+            This method forces a row into the solution by covering all of its columns
+            The row has to be available (see is_row_available)
+        """
+        row_start_cell = self.row_heads[row_number]
+        self.cover(row_start_cell.C)
+        self.cover_row(row_start_cell)
+
+    def unselect_row(self, row_number):
+        """
+            This method undoes select_row, rows have to be unselected in the reverse order of their selection
+        """
+        row_start_cell = self.row_heads[row_number]
+        self.uncover_row(row_start_cell)
+        self.uncover(row_start_cell.C)
+
+    def shuffle_rows(self, rng):
+        """
+            Randomly reorders the cells of each column (rng is a random.Random) so that the search tries the rows
+            in a random order (which only depends on the state of rng), the matrix must not have covered columns or hidden rows
+        """
+        for column_head_cell in self.column_cells:
+            #Sorted first so that the order only depends on rng
+            column = sorted(self.iterate_cells(column_head_cell, 'D'), key = lambda cell : cell.row_number)
+            rng.shuffle(column)
+            prev_cell = column_head_cell
+            for current_cell in column:
+                prev_cell.D = current_cell
+                current_cell.U = prev_cell
+                prev_cell = current_cell
+            prev_cell.D = column_head_cell
+            column_head_cell.U = prev_cell
+
+    def select_column(self):
+        """
+            Returns the column head cell with the minimum number of cells (leftmost one on ties)
+            The scan stops at the first column with 0 cells (dead end) or 1 cell (forced row) : the leftmost column
+            with at most one cell is returned, which only differs from the minimum when a dead end further right is
+            reached one level deeper (the solutions are found in the same order)
+            With the size buckets enabled a column of the smallest non empty bucket is returned without any scan,
+            the columns are only scanned when every bucket is empty (all the columns are larger than the largest bucket)
+        """
+        if self.size_buckets is not None:
+            index = get_bucketed_column(self.size_buckets, self.number_of_columns + 1)
+            if index is not None:
+                return self.column_cells[index]
+        current_column_head_cell = self.root.R
+        best_column = current_column_head_cell
+        if best_column.size <= 1:
+            return best_column
+
+        while current_column_head_cell != self.root:
+            if current_column_head_cell.size < best_column.size:
+                best_column = current_column_head_cell
+                if best_column.size <= 1:
+                    break
+            current_column_head_cell = current_column_head_cell.R
+        return best_column
+
+    def get_smallest_columns(self):
+        """
+            Returns the list of the column head cells with the minimum number of cells, from left to right
+            (only the first one when that minimum is 0)
+        """
+        if self.size_buckets is not None:
+            indexes = get_bucketed_columns(self.size_buckets, self.number_of_columns + 1)
+            if indexes:
+                return [self.column_cells[index] for index in indexes]
+        smallest_columns = []
+        for column in self.iterate_cells(self.root, 'R'):
+            if not smallest_columns or column.size < smallest_columns[0].size:
+                smallest_columns = [column]
+                if column.size == 0:
+                    break
+            elif column.size == smallest_columns[0].size:
+                smallest_columns.append(column)
+        return smallest_columns
+
+    def iterate_column(self, column):
+        """
+            This method iterates through the cells of a column from top to bottom
+        """
+        return self.iterate_cells(column, 'D')
+
+    def get_row_number(self, cell):
+        """
+            Returns the row number of a cell
+        """
+        return cell.row_number
+
+    def get_row_column_names(self, cell):
+        """
+            Returns the names of the columns of the row of 'cell' starting with the column of 'cell'
+        """
+        row_column_list = [cell.C.name]
+        row_column_list.extend(r.C.name for r in self.iterate_cells(cell, 'R'))
+        return row_column_list
+
+    def get_column_names(self):
+        """
+            Returns the list of column names
+        """
+        return [column.name for column in self.column_cells]
+
+    def get_row_column_indices(self, cell):
+        """
+            Returns the indexes of the columns of the row of 'cell'
+        """
+        row_column_list = [cell.C.column_number]
+        row_column_list.extend(r.C.column_number for r in self.iterate_cells(cell, 'R'))
+        return row_column_list
+
+    def get_sparse_rows(self):
+        """
+            Returns the rows of the matrix in the add_sparse_row format, so that the matrix can be rebuilt elsewhere
+        """
+        rows = []
+        for row_number, row_start_cell in enumerate(self.row_heads):
+            row = self.get_row_column_indices(row_start_cell)
+            rows.append({"row_name" : self.row_number_to_row_name[row_number], "row_value" : row})
+        return rows
+
     def iterate_cells(self, cell, direction):
         """
             This method iterate through the matrix starting from
@@ -187,7 +654,8 @@ class DLXMatrix:
             and - meands that the cell has value 0
         """
         result = [['-' for i in range(self.number_of_columns)] for j in range(self.number_of_rows)]
-        for current_column_head_cell in self.iterate_cells(self.root, 'R'):
+        active_columns = list(self.iterate_cells(self.root, 'R')) + self.column_cells[self.number_of_primary_columns:]
+        for current_column_head_cell in active_columns:
             for current_cell in self.iterate_cells(current_column_head_cell, 'D'):
                 result[current_cell.row_number][current_cell.column_number] = 'X'
 
@@ -197,20 +665,1351 @@ class DLXMatrix:
         return string_result
 
 
-if __name__ == '__main__':
+class ArrayDLXMatrix:
+    """
+        Dancing links matrix where the cells are integer indexes into flat arrays
+        instead of Cell objects : L[i], R[i], U[i], D[i] are the neighbours of cell i
+        and C[i] is the column head of cell i.
+        Cells 0 .. number_of_columns - 1 are the column heads (so a column head is its column number),
+        cell number_of_columns is the root and the following cells are the 1s of the matrix
+        Constructor arguments are the same as DLXMatrix's
+    """
+    def __init__(self, columns, secondary_columns = None, multiplicities = None):
+        #Matrix dimensions
+        self.number_of_columns = 0
+        self.number_of_rows = 0
 
-    columns = 5
-    rows = [
-            {"row_name": "1" , "row_value" : [0, 2, 4]},
-            {"row_name": "2" , "row_value" : [1, 3]},
-            {"row_name": "3" , "row_value" : [0, 3, 4]}
-            ]
+        #Link arrays
+        self.L = array('i')
+        self.R = array('i')
+        self.U = array('i')
+        self.D = array('i')
+        self.C = array('i')
+        #Row number of each cell (-1 for column heads and root)
+        self.row_numbers = array('i')
+        #Number of cells in each column (indexed by column head)
+        self.size = array('i')
+        #First (leftmost) cell of each row
+        self.row_heads = array('i')
+        self.column_names = []
+
+        #Mapping between row id [from 0 to number of rows - 1] and row name (see RowNames)
+        self.row_number_to_row_name = RowNames()
+
+        #Instanciate the column head cells
+        self.prepare_columns(columns, secondary_columns)
+        self.multiplicities = dict(multiplicities or {})
+
+        #(next, previous) links of the size buckets of the primary columns, None unless enabled (see enable_size_buckets)
+        self.size_buckets = None
+
+    def prepare_columns(self, columns, secondary_columns = None):
+        """
+            This method creates the column head cells and the root cell
+            and links the primary column heads and the root in a circular doubly linked list
+        """
+        columns, secondary_columns = get_column_name_lists(columns, secondary_columns)
+        p = self.number_of_primary_columns = len(columns)
+        n = self.number_of_columns = len(columns) + len(secondary_columns)
+        self.column_names = [str(column) for column in columns + secondary_columns]
+        self.root = n
+
+        #Column head i is linked to i - 1 and i + 1, the root closes the ring
+        #Secondary column heads are linked to themselves
+        self.L = array('i', range(-1, n))
+        self.R = array('i', range(1, n + 2))
+        for column in range(p, n):
+            self.L[column] = self.R[column] = column
+        if p == 0:
+            self.L[n] = self.R[n] = n
+        else:
+            self.L[0] = self.R[p - 1] = n
+            self.L[n] = p - 1
+            self.R[n] = 0
+        self.U = array('i', range(n + 1))
+        self.D = array('i', range(n + 1))
+        self.C = array('i', range(n + 1))
+        self.row_numbers = array('i', [-1]) * (n + 1)
+        self.size = array('i', [0]) * (n + 1)
+
+    def add_sparse_row(self, row_dict):
+        """
+            This method appends a sparse row to the matrix
+            input :
+                row_dict is a dictionary with two entries
+                row_name : the name of the row
+                row : a list of column indexes where this row is set to 1
+        """
+        row_name = row_dict["row_name"]
+        row = row_dict["row_value"]
+
+        assert(min(row) >= 0 and max(row) < self.number_of_columns)
+        check_row_columns(row, row_name)
+
+        #Populate the row name <-> row id mappers
+        self.row_number_to_row_name[self.number_of_rows] = row_name
+
+        L, R, U, D, C = self.L, self.R, self.U, self.D, self.C
+        first = len(C)
+        last = first + len(row) - 1
+        self.row_heads.append(first)
+        for cell, idx in enumerate(sorted(row), first):
+            #Horizontal links (the row is circular)
+            L.append(cell - 1 if cell != first else last)
+            R.append(cell + 1 if cell != last else first)
+            #Vertical links : the new cell goes at the bottom of column idx
+            U.append(U[idx])
+            D.append(idx)
+            D[U[idx]] = cell
+            U[idx] = cell
+            C.append(idx)
+            self.size[idx] += 1
+        self.row_numbers.extend([self.number_of_rows] * len(row))
+        self.number_of_rows += 1
+
+    @property
+    def row_name_to_row_number(self):
+        """
+            Dictionary row name -> row number, built on first use
+        """
+        return self.row_number_to_row_name.get_reverse(self.number_of_rows)
+
+    @classmethod
+    def from_csr(cls, indptr, indices, row_names = None, columns = None, secondary_columns = None, multiplicities = None):
+        """
+            Builds a matrix from rows given in CSR form, see DLXMatrix.from_csr
+            With NumPy the link arrays are computed with vectorised operations
+        """
+        if np is None:
+            rows, columns = get_csr_rows(indptr, indices, row_names, columns, secondary_columns)
+            matrix = cls(columns, secondary_columns, multiplicities)
+            #The links are built in lists and converted to arrays at the end
+            L, R, U, D, C = list(matrix.L), list(matrix.R), list(matrix.U), list(matrix.D), list(matrix.C)
+            row_numbers = list(matrix.row_numbers)
+            for row_number, row in enumerate(rows):
+                first = len(C)
+                last = first + len(row) - 1
+                matrix.row_heads.append(first)
+                L.append(last)
+                L.extend(range(first, last))
+                R.extend(range(first + 1, last + 1))
+                R.append(first)
+                C.extend(row)
+                row_numbers.extend([row_number] * len(row))
+            #Vertical links, each column is linked from top to bottom
+            U.extend(C[matrix.root + 1:])
+            D.extend(C[matrix.root + 1:])
+            column_last_cells = list(range(matrix.number_of_columns))
+            for cell in range(matrix.root + 1, len(C)):
+                idx = C[cell]
+                U[cell] = last_cell = column_last_cells[idx]
+                D[last_cell] = column_last_cells[idx] = cell
+            for idx, last_cell in enumerate(column_last_cells):
+                D[last_cell] = idx
+                U[idx] = last_cell
+            matrix.L, matrix.R, matrix.U, matrix.D, matrix.C = (array('i', links) for links in (L, R, U, D, C))
+            matrix.row_numbers = array('i', row_numbers)
+            for idx, size in enumerate(count_column_sizes(indices, matrix.number_of_columns)):
+                matrix.size[idx] = size
+            matrix.number_of_rows = len(rows)
+            matrix.row_number_to_row_name = RowNames(row_names)
+            return matrix
+
+        indptr, indices, columns = check_csr(indptr, indices, row_names, columns, secondary_columns)
+        matrix = cls(columns, secondary_columns, multiplicities)
+        n = matrix.number_of_columns
+        base = matrix.root + 1
+        number_of_rows = len(indptr) - 1
+        number_of_cells = len(indices)
+        cells = np.arange(base, base + number_of_cells)
+        first_cells = indptr[:-1] + base
+        last_cells = indptr[1:] - 1 + base
+
+        #Horizontal links, each row is circular
+        L = cells - 1
+        L[first_cells - base] = last_cells
+        R = cells + 1
+        R[last_cells - base] = first_cells
+
+        #Vertical links : the cells sorted by column (stable so that rows stay in order inside a column)
+        sizes = np.bincount(indices, minlength = n)
+        ends = np.cumsum(sizes)
+        starts = ends - sizes
+        column_cells = np.argsort(indices, kind = "stable") + base
+        up = np.roll(column_cells, 1)
+        down = np.roll(column_cells, -1)
+        non_empty = np.flatnonzero(sizes)
+        up[starts[non_empty]] = non_empty
+        down[ends[non_empty] - 1] = non_empty
+        U = np.empty(number_of_cells, dtype = np.int64)
+        D = np.empty(number_of_cells, dtype = np.int64)
+        U[column_cells - base] = up
+        D[column_cells - base] = down
+        #Column heads point to the last and first cells of their column (to themselves when the column is empty)
+        head_up = np.arange(n)
+        head_up[non_empty] = column_cells[ends[non_empty] - 1]
+        head_down = np.arange(n)
+        head_down[non_empty] = column_cells[starts[non_empty]]
+        matrix.U[:n] = to_int_array(head_up)
+        matrix.D[:n] = to_int_array(head_down)
+
+        matrix.L.extend(to_int_array(L))
+        matrix.R.extend(to_int_array(R))
+        matrix.U.extend(to_int_array(U))
+        matrix.D.extend(to_int_array(D))
+        matrix.C.extend(to_int_array(indices))
+        matrix.row_numbers.extend(to_int_array(np.repeat(np.arange(number_of_rows), np.diff(indptr))))
+        matrix.size[:n] = to_int_array(sizes)
+        matrix.row_heads = to_int_array(first_cells)
+        matrix.number_of_rows = number_of_rows
+        matrix.row_number_to_row_name = RowNames(row_names)
+        return matrix
+
+    @classmethod
+    def from_dense(cls, dense_matrix, row_names = None, secondary_columns = None, multiplicities = None):
+        """
+            Builds a matrix from a dense 0 / 1 matrix, see DLXMatrix.from_dense
+        """
+        indptr, indices, number_of_columns = get_csr_from_dense(dense_matrix)
+        return cls.from_csr(indptr, indices, row_names, get_dense_primary_columns(number_of_columns, secondary_columns), secondary_columns, multiplicities)
+
+    def cover(self, column):
+        """
+            This method covers a column
+            Which means that we remove all rows in which this column is set to 1
+            (By doing this we also remove the column)
+        """
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.size
+        c = column
+        if c > self.root:
+            c = C[c]
+        if self.size_buckets is not None:
+            self.cover_bucketed(c)
+            return
+
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                S[C[j]] -= 1
+                j = R[j]
+            i = D[i]
+
+    def uncover(self, column):
+        """
+            This method uncovers a column
+            Which means that we add back all rows in which this column is set to 1
+            and the column itself
+        """
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.size
+        c = column
+        if c > self.root:
+            c = C[c]
+        if self.size_buckets is not None:
+            self.uncover_bucketed(c)
+            return
+
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                S[C[j]] += 1
+                U[D[j]] = j
+                D[U[j]] = j
+                j = L[j]
+            i = U[i]
+
+        R[L[c]] = c
+        L[R[c]] = c
+
+    def cover_bucketed(self, c):
+        """
+            cover when the size buckets are enabled : every primary column whose size changes moves to its new bucket
+        """
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.size
+        N, P, K = self.size_buckets
+        first_head = self.root + 1
+        p = self.number_of_primary_columns
+
+        R[L[c]] = R[c]
+        L[R[c]] = L[c]
+        if S[c] <= K and c < p:
+            N[P[c]] = N[c]
+            P[N[c]] = P[c]
+
+        i = D[c]
+        while i != c:
+            j = R[i]
+            while j != i:
+                U[D[j]] = U[j]
+                D[U[j]] = D[j]
+                k = C[j]
+                s = S[k] - 1
+                S[k] = s
+                if s <= K and k < p:
+                    #Moved to the front of the bucket of its new size (it was in no bucket if it was too large)
+                    if s < K:
+                        N[P[k]] = N[k]
+                        P[N[k]] = P[k]
+                    h = first_head + s
+                    N[k] = N[h]
+                    P[k] = h
+                    P[N[h]] = k
+                    N[h] = k
+                j = R[j]
+            i = D[i]
+
+    def uncover_bucketed(self, c):
+        """
+            uncover when the size buckets are enabled
+        """
+        L, R, U, D, C, S = self.L, self.R, self.U, self.D, self.C, self.size
+        N, P, K = self.size_buckets
+        first_head = self.root + 1
+        p = self.number_of_primary_columns
+
+        i = U[c]
+        while i != c:
+            j = L[i]
+            while j != i:
+                k = C[j]
+                s = S[k] + 1
+                S[k] = s
+                U[D[j]] = j
+                D[U[j]] = j
+                if s <= K + 1 and k < p:
+                    N[P[k]] = N[k]
+                    P[N[k]] = P[k]
+                    if s <= K:
+                        h = first_head + s
+                        N[k] = N[h]
+                        P[k] = h
+                        P[N[h]] = k
+                        N[h] = k
+                j = L[j]
+            i = U[i]
+
+        R[L[c]] = c
+        L[R[c]] = c
+        if S[c] <= K and c < p:
+            h = first_head + S[c]
+            N[c] = N[h]
+            P[c] = h
+            P[N[h]] = c
+            N[h] = c
+
+    def cover_row(self, cell):
+        """
+            This method covers every other column of the row of 'cell' (going right)
+        """
+        R, C = self.R, self.C
+        j = R[cell]
+        while j != cell:
+            self.cover(C[j])
+            j = R[j]
+
+    def uncover_row(self, cell):
+        """
+            This method undoes cover_row by uncovering the columns in reverse order (going left)
+        """
+        L, C = self.L, self.C
+        j = L[cell]
+        while j != cell:
+            self.uncover(C[j])
+            j = L[j]
+
+    def get_column(self, column):
+        """
+            Returns the column head of a column given by its index or one of its cells
+        """
+        return self.C[column] if column > self.root else column
+
+    def column_size(self, column):
+        """
+            Returns the number of cells of a column
+        """
+        return self.size[column]
+
+    def get_column_index(self, column):
+        """
+            Returns the index of a column head (which is the column head itself)
+        """
+        return column
+
+    def down(self, cell):
+        """
+            Returns the cell below 'cell' in its column (the column head after the last one)
+        """
+        return self.D[cell]
+
+    def enable_stats(self, stats):
+        """
+            Counts cover / uncover calls and updates in stats (a SearchStatistics) until disable_stats is called
+        """
+        stats.instrument(self)
+
+    def disable_stats(self, stats):
+        """
+            Stops counting in stats
+        """
+        stats.release(self)
+
+    def enable_size_buckets(self, max_bucket_size = 2):
+        """
+            Indexes the primary columns of the root list by size, see DLXMatrix.enable_size_buckets
+        """
+        S = self.size
+        self.size_buckets = build_size_buckets(((c, S[c]) for c in self.iterate_cells(self.root, 'R')),
+                                               self.number_of_columns, self.number_of_rows, max_bucket_size)
+
+    def disable_size_buckets(self):
+        """
+            Drops the size buckets, cover and uncover go back to the plain dancing links
+        """
+        self.size_buckets = None
+
+    def is_empty(self):
+        """
+            Returns True if all the columns have been covered
+        """
+        return self.R[self.root] == self.root
+
+    def is_row_available(self, row_number):
+        """
+            Returns True if none of the columns of the row has been covered
+            (a row is removed from the matrix as soon as one of its columns is covered)
+        """
+        L, R, U, D, C = self.L, self.R, self.U, self.D, self.C
+        cell = row_start_cell = self.row_heads[row_number]
+        while True:
+            if D[U[cell]] != cell:
+                return False
+            if C[cell] < self.number_of_primary_columns and R[L[C[cell]]] != C[cell]:
+                return False
+            cell = R[cell]
+            if cell == row_start_cell:
+                return True
+
+    def hide_row(self, cell):
+        """
+            Unlinks every cell of the row of 'cell' from its column (including 'cell')
+        """
+        R, U, D, C, S = self.R, self.U, self.D, self.C, self.size
+        j = cell
+        while True:
+            U[D[j]] = U[j]
+            D[U[j]] = D[j]
+            S[C[j]] -= 1
+            j = R[j]
+            if j == cell:
+                return
+
+    def unhide_row(self, cell):
+        """
+            Undoes hide_row
+        """
+        L, U, D, C, S = self.L, self.U, self.D, self.C, self.size
+        j = cell
+        while True:
+            j = L[j]
+            S[C[j]] += 1
+            U[D[j]] = j
+            D[U[j]] = j
+            if j == cell:
+                return
+
+    def get_column_bounds(self):
+        """
+            Returns the (lower bound, upper bound) of each column :
+            (1, 1) for primary columns and (0, 1) for secondary columns unless multiplicities says otherwise
+        """
+        return get_column_bounds(self.number_of_primary_columns, self.number_of_columns, self.multiplicities)
+
+    def has_multiplicities(self):
+        """
+            Returns True if some column bounds differ from plain exact cover
+        """
+        return self.get_column_bounds() != get_column_bounds(self.number_of_primary_columns, self.number_of_columns, {})
+
+    def get_column_layout(self):
+        """
+            Returns the primary column names, the secondary column names and the multiplicities of the matrix
+        """
+        names = self.get_column_names()
+        return names[:self.number_of_primary_columns], names[self.number_of_primary_columns:], dict(self.multiplicities)
+
+    def select_row(self, row_number):
+        """
+            This method forces a row into the solution by covering all of its columns
+            The row has to be available (see is_row_available)
+        """
+        row_start_cell = self.row_heads[row_number]
+        self.cover(self.C[row_start_cell])
+        self.cover_row(row_start_cell)
+
+    def unselect_row(self, row_number):
+        """
+            This method undoes select_row, rows have to be unselected in the reverse order of their selection
+        """
+        row_start_cell = self.row_heads[row_number]
+        self.uncover_row(row_start_cell)
+        self.uncover(self.C[row_start_cell])
+
+    def shuffle_rows(self, rng):
+        """
+            Randomly reorders the cells of each column, see DLXMatrix.shuffle_rows
+        """
+        U, D = self.U, self.D
+        for c in range(self.number_of_columns):
+            #Cells are numbered row by row, sorting them puts the column back in row order
+            column = sorted(self.iterate_cells(c, 'D'))
+            rng.shuffle(column)
+            prev_cell = c
+            for cell in column:
+                D[prev_cell] = cell
+                U[cell] = prev_cell
+                prev_cell = cell
+            D[prev_cell] = c
+            U[c] = prev_cell
+
+    def select_column(self):
+        """
+            Returns the column with the minimum number of cells (leftmost one on ties),
+            stopping at the first column with at most one cell, see DLXMatrix.select_column
+        """
+        if self.size_buckets is not None:
+            c = get_bucketed_column(self.size_buckets, self.root + 1)
+            if c is not None:
+                return c
+        R, S, root = self.R, self.size, self.root
+        c = best_column = R[root]
+        best_size = S[c]
+        if best_size <= 1:
+            return best_column
+        while c != root:
+            if S[c] < best_size:
+                best_column = c
+                best_size = S[c]
+                if best_size <= 1:
+                    break
+            c = R[c]
+        return best_column
+
+    def get_smallest_columns(self):
+        """
+            Returns the list of the columns with the minimum number of cells, from left to right
+            (only the first one when that minimum is 0)
+        """
+        if self.size_buckets is not None:
+            smallest_columns = get_bucketed_columns(self.size_buckets, self.root + 1)
+            if smallest_columns:
+                return smallest_columns
+        R, S, root = self.R, self.size, self.root
+        smallest_columns = []
+        best_size = None
+        c = R[root]
+        while c != root:
+            if best_size is None or S[c] < best_size:
+                smallest_columns = [c]
+                best_size = S[c]
+                if best_size == 0:
+                    break
+            elif S[c] == best_size:
+                smallest_columns.append(c)
+            c = R[c]
+        return smallest_columns
+
+    def iterate_column(self, column):
+        """
+            This method iterates through the cells of a column from top to bottom
+        """
+        D = self.D
+        i = D[column]
+        while i != column:
+            yield i
+            i = D[i]
+
+    def iterate_cells(self, cell, direction):
+        """
+            This method iterate through the matrix starting from
+            'cell' and going in a specified 'direction' until we get
+            back to cell
+        """
+        links = getattr(self, direction)
+        current_cell = links[cell]
+        while current_cell != cell:
+            yield current_cell
+            current_cell = links[current_cell]
+
+    def get_row_number(self, cell):
+        """
+            Returns the row number of a cell
+        """
+        return self.row_numbers[cell]
+
+    def get_row_column_names(self, cell):
+        """
+            Returns the names of the columns of the row of 'cell' starting with the column of 'cell'
+        """
+        C = self.C
+        row_column_list = [self.column_names[C[cell]]]
+        row_column_list.extend(self.column_names[C[r]] for r in self.iterate_cells(cell, 'R'))
+        return row_column_list
+
+    def get_column_names(self):
+        """
+            Returns the list of column names
+        """
+        return list(self.column_names)
+
+    def get_row_column_indices(self, cell):
+        """
+            Returns the indexes of the columns of the row of 'cell'
+        """
+        C = self.C
+        row_column_list = [C[cell]]
+        row_column_list.extend(C[r] for r in self.iterate_cells(cell, 'R'))
+        return row_column_list
+
+    def get_sparse_rows(self):
+        """
+            Returns the rows of the matrix in the add_sparse_row format, so that the matrix can be rebuilt elsewhere
+        """
+        rows = []
+        for row_number, row_start_cell in enumerate(self.row_heads):
+            row = self.get_row_column_indices(row_start_cell)
+            rows.append({"row_name" : self.row_number_to_row_name[row_number], "row_value" : row})
+        return rows
+
+    def __str__(self):
+        """
+            Returns a string representation of the matrix
+            where X means that the cell has value 1
+            and - meands that the cell has value 0
+        """
+        result = [['-' for i in range(self.number_of_columns)] for j in range(self.number_of_rows)]
+        active_columns = list(self.iterate_cells(self.root, 'R')) + list(range(self.number_of_primary_columns, self.number_of_columns))
+        for column in active_columns:
+            for cell in self.iterate_cells(column, 'D'):
+                result[self.row_numbers[cell]][column] = 'X'
+
+        string_result = ""
+        for row in result:
+            string_result = string_result + str(row) + "\n"
+        return string_result
+
+class BitsetDLXMatrix:
+    """
+        Exact cover matrix stored as bitsets (Python integers) instead of links :
+        bit r of column_rows[c] is set if row r has a 1 in column c, active_rows has the bits of the rows that are
+        still in the matrix and active_columns the bits of the primary columns that are not covered
+        Covering a column removes all of its rows with one mask operation instead of unlinking their cells one by one
+        and the size of a column is the popcount of its active rows, so there is no pointer to chase
+        It has the interface of DLXMatrix so ExactCoverSolver runs on it unchanged and, as the columns are selected
+        and their rows tried in the same order, finds the same solutions in the same order as the linked backends
+        Row r is stored at the bit position row_bits[r] (r itself until shuffle_rows permutes the positions),
+        the rows of a column are tried in bit position order
+        Column c is the integer c, the root is number_of_columns and the 1 of the row at bit position b in column c
+        is the integer number_of_columns + 1 + b * number_of_columns + c
+        Constructor arguments are the same as DLXMatrix's
+    """
+    def __init__(self, columns, secondary_columns = None, multiplicities = None):
+        #Matrix dimensions
+        self.number_of_columns = 0
+        self.number_of_rows = 0
+
+        #Sorted column indexes of each row
+        self.row_columns = []
+        #First (leftmost) cell of each row
+        self.row_heads = []
+        #Bit position of each row and row number at each bit position
+        self.row_bits = []
+        self.bit_rows = []
+        self.column_names = []
+
+        #Mapping between row id [from 0 to number of rows - 1] and row name (see RowNames)
+        self.row_number_to_row_name = RowNames()
+
+        #Instanciate the column bitsets
+        self.prepare_columns(columns, secondary_columns)
+        self.multiplicities = dict(multiplicities or {})
+
+    def prepare_columns(self, columns, secondary_columns = None):
+        """
+            This method creates the (empty) column bitsets, every primary column starts uncovered
+        """
+        columns, secondary_columns = get_column_name_lists(columns, secondary_columns)
+        p = self.number_of_primary_columns = len(columns)
+        n = self.number_of_columns = len(columns) + len(secondary_columns)
+        self.column_names = [str(column) for column in columns + secondary_columns]
+        self.root = n
+        self.first_cell = n + 1
+
+        #Rows of each column
+        self.column_rows = [0] * n
+        #Rows that a covered column removed from active_rows (None while the column is not covered)
+        self.covered_rows = [None] * n
+        self.active_rows = 0
+        self.active_columns = (1 << p) - 1
+
+    def add_sparse_row(self, row_dict):
+        """
+            This method appends a sparse row to the matrix
+            input :
+                row_dict is a dictionary with two entries
+                row_name : the name of the row
+                row : a list of column indexes where this row is set to 1
+        """
+        row_name = row_dict["row_name"]
+        row = sorted(row_dict["row_value"])
+
+        assert(min(row) >= 0 and max(row) < self.number_of_columns)
+        check_row_columns(row, row_name)
+
+        #Populate the row name <-> row id mappers
+        self.row_number_to_row_name[self.number_of_rows] = row_name
+
+        #The positions 0 to number_of_rows - 1 are taken (shuffled or not), the new row goes after them
+        position = self.number_of_rows
+        bit = 1 << position
+        for idx in row:
+            self.column_rows[idx] |= bit
+        self.active_rows |= bit
+        self.row_columns.append(tuple(row))
+        self.row_bits.append(position)
+        self.bit_rows.append(self.number_of_rows)
+        self.row_heads.append(self.first_cell + position * self.number_of_columns + row[0])
+        self.number_of_rows += 1
+
+    @property
+    def row_name_to_row_number(self):
+        """
+            Dictionary row name -> row number, built on first use
+        """
+        return self.row_number_to_row_name.get_reverse(self.number_of_rows)
+
+    @classmethod
+    def from_csr(cls, indptr, indices, row_names = None, columns = None, secondary_columns = None, multiplicities = None):
+        """
+            Builds a matrix from rows given in CSR form, see DLXMatrix.from_csr
+            The bitset of each column is filled in a bytearray and converted to an integer once
+            (or-ing the rows one by one into growing integers would be quadratic)
+        """
+        rows, columns = get_csr_rows(indptr, indices, row_names, columns, secondary_columns)
+        matrix = cls(columns, secondary_columns, multiplicities)
+        matrix.row_columns = [tuple(row) for row in rows]
+        matrix.number_of_rows = len(rows)
+        matrix.set_row_bits(list(range(matrix.number_of_rows)))
+        matrix.row_number_to_row_name = RowNames(row_names)
+        return matrix
+
+    def set_row_bits(self, row_bits):
+        """
+            This method stores row r at the bit position row_bits[r] and rebuilds the column bitsets
+            and the row heads accordingly, every row becomes active and every column uncovered
+        """
+        n = self.number_of_columns
+        number_of_rows = self.number_of_rows
+        bitmaps = [bytearray((number_of_rows + 7) // 8) for _ in range(n)]
+        for position, row in zip(row_bits, self.row_columns):
+            byte, bit = position >> 3, 1 << (position & 7)
+            for idx in row:
+                bitmaps[idx][byte] |= bit
+        self.column_rows = [int.from_bytes(bitmap, "little") for bitmap in bitmaps]
+        self.covered_rows = [None] * n
+        self.active_rows = (1 << number_of_rows) - 1
+        self.active_columns = (1 << self.number_of_primary_columns) - 1
+        self.row_bits = row_bits
+        self.bit_rows = [0] * number_of_rows
+        for row_number, position in enumerate(row_bits):
+            self.bit_rows[position] = row_number
+        self.row_heads = [self.first_cell + position * n + row[0] for position, row in zip(row_bits, self.row_columns)]
+
+    @classmethod
+    def from_dense(cls, dense_matrix, row_names = None, secondary_columns = None, multiplicities = None):
+        """
+            Builds a matrix from a dense 0 / 1 matrix, see DLXMatrix.from_dense
+        """
+        indptr, indices, number_of_columns = get_csr_from_dense(dense_matrix)
+        return cls.from_csr(indptr, indices, row_names, get_dense_primary_columns(number_of_columns, secondary_columns), secondary_columns, multiplicities)
+
+    def cover(self, column):
+        """
+            This method covers a column
+            Which means that we remove all rows in which this column is set to 1
+            (By doing this we also remove the column)
+            The removed rows are kept in covered_rows : they are the rows of the column that uncover puts back
+            and the ones that down goes through
+        """
+        c = column
+        if c > self.root:
+            c = (c - self.first_cell) % self.number_of_columns
+        rows = self.column_rows[c] & self.active_rows
+        self.covered_rows[c] = rows
+        self.active_rows ^= rows
+        if c < self.number_of_primary_columns:
+            self.active_columns ^= 1 << c
+
+    def uncover(self, column):
+        """
+            This method uncovers a column
+            Which means that we add back all rows in which this column is set to 1
+            and the column itself
+        """
+        c = column
+        if c > self.root:
+            c = (c - self.first_cell) % self.number_of_columns
+        self.active_rows |= self.covered_rows[c]
+        self.covered_rows[c] = None
+        if c < self.number_of_primary_columns:
+            self.active_columns |= 1 << c
+
+    def get_row_columns_from_cell(self, cell):
+        """
+            Returns the column indexes of the row of 'cell' in the order of the row starting from the column of 'cell'
+        """
+        position, c = divmod(cell - self.first_cell, self.number_of_columns)
+        columns = self.row_columns[self.bit_rows[position]]
+        if columns[0] == c:
+            return columns
+        k = columns.index(c)
+        return columns[k:] + columns[:k]
+
+    def cover_row(self, cell):
+        """
+            This method covers every other column of the row of 'cell' (going right)
+        """
+        for idx in self.get_row_columns_from_cell(cell)[1:]:
+            self.cover(idx)
+
+    def uncover_row(self, cell):
+        """
+            This method undoes cover_row by uncovering the columns in reverse order (going left)
+        """
+        for idx in reversed(self.get_row_columns_from_cell(cell)[1:]):
+            self.uncover(idx)
+
+    def get_column(self, column):
+        """
+            Returns the column index of a column given by its index or one of its cells
+        """
+        return (column - self.first_cell) % self.number_of_columns if column > self.root else column
+
+    def get_column_rows(self, column):
+        """
+            Returns the bitset of the rows of a column : its active rows, or the rows it removed if it is covered
+        """
+        rows = self.covered_rows[column]
+        return self.column_rows[column] & self.active_rows if rows is None else rows
+
+    def column_size(self, column):
+        """
+            Returns the number of cells of a column
+        """
+        return self.get_column_rows(column).bit_count()
+
+    def get_column_index(self, column):
+        """
+            Returns the index of a column (which is the column itself)
+        """
+        return column
+
+    def down(self, cell):
+        """
+            Returns the cell below 'cell' in its column (the column after the last one) :
+            the cell of the next row of the column, found with the lowest set bit of the rows after the row of 'cell'
+        """
+        n = self.number_of_columns
+        if cell > self.root:
+            position, c = divmod(cell - self.first_cell, n)
+            rows = self.get_column_rows(c) >> (position + 1)
+            if not rows:
+                return c
+            return cell + (rows & -rows).bit_length() * n
+        if cell == self.root:
+            return cell
+        rows = self.get_column_rows(cell)
+        if not rows:
+            return cell
+        return self.first_cell + ((rows & -rows).bit_length() - 1) * n + cell
+
+    def right(self, cell):
+        """
+            Returns the cell on the right of 'cell' in its row, or the next active primary column after a column or the root
+        """
+        root = self.root
+        if cell > root:
+            row_columns = self.get_row_columns_from_cell(cell)
+            return cell - row_columns[0] + (row_columns[1] if len(row_columns) > 1 else row_columns[0])
+        if self.number_of_primary_columns <= cell < root:
+            #Secondary columns are not in the list of columns
+            return cell
+        columns = self.active_columns if cell == root else self.active_columns >> (cell + 1) << (cell + 1)
+        if not columns:
+            return root
+        return (columns & -columns).bit_length() - 1
+
+    def enable_stats(self, stats):
+        """
+            Counts cover / uncover calls and updates in stats (a SearchStatistics) until disable_stats is called
+        """
+        stats.instrument(self)
+
+    def disable_stats(self, stats):
+        """
+            Stops counting in stats
+        """
+        stats.release(self)
+
+    def enable_size_buckets(self, max_bucket_size = 2):
+        """
+            Does nothing : column sizes are popcounts and select_column already stops at the first column
+            with at most one row, there is no list of columns to index
+        """
+
+    def disable_size_buckets(self):
+        """
+            Nothing to drop, see enable_size_buckets
+        """
+
+    def is_empty(self):
+        """
+            Returns True if all the columns have been covered
+        """
+        return self.active_columns == 0
+
+    def is_row_available(self, row_number):
+        """
+            Returns True if none of the columns of the row has been covered and the row is not hidden
+        """
+        return bool(self.active_rows >> self.row_bits[row_number] & 1)
+
+    def hide_row(self, cell):
+        """
+            Removes the row of 'cell' from every column
+        """
+        self.active_rows &= ~(1 << (cell - self.first_cell) // self.number_of_columns)
+
+    def unhide_row(self, cell):
+        """
+            Undoes hide_row
+        """
+        self.active_rows |= 1 << (cell - self.first_cell) // self.number_of_columns
+
+    def get_column_bounds(self):
+        """
+            Returns the (lower bound, upper bound) of each column :
+            (1, 1) for primary columns and (0, 1) for secondary columns unless multiplicities says otherwise
+        """
+        return get_column_bounds(self.number_of_primary_columns, self.number_of_columns, self.multiplicities)
+
+    def has_multiplicities(self):
+        """
+            Returns True if some column bounds differ from plain exact cover
+        """
+        return self.get_column_bounds() != get_column_bounds(self.number_of_primary_columns, self.number_of_columns, {})
+
+    def get_column_layout(self):
+        """
+            Returns the primary column names, the secondary column names and the multiplicities of the matrix
+        """
+        names = self.get_column_names()
+        return names[:self.number_of_primary_columns], names[self.number_of_primary_columns:], dict(self.multiplicities)
+
+    def select_row(self, row_number):
+        """
+            This method forces a row into the solution by covering all of its columns
+            The row has to be available (see is_row_available)
+        """
+        row_start_cell = self.row_heads[row_number]
+        self.cover(row_start_cell)
+        self.cover_row(row_start_cell)
+
+    def unselect_row(self, row_number):
+        """
+            This method undoes select_row, rows have to be unselected in the reverse order of their selection
+        """
+        row_start_cell = self.row_heads[row_number]
+        self.uncover_row(row_start_cell)
+        self.uncover(row_start_cell)
+
+    def shuffle_rows(self, rng):
+        """
+            Randomly permutes the bit positions of the rows (rng is a random.Random) so that the search tries the rows
+            in a random order, see DLXMatrix.shuffle_rows
+            Unlike the linked backends every column gets the same order, the order of their shared rows
+        """
+        row_bits = list(range(self.number_of_rows))
+        rng.shuffle(row_bits)
+        self.set_row_bits(row_bits)
+
+    def select_column(self):
+        """
+            Returns the column with the minimum number of cells (leftmost one on ties),
+            stopping at the first column with at most one cell, see DLXMatrix.select_column
+            The active primary columns are the set bits of active_columns, the size of each one is a popcount
+        """
+        active_rows, column_rows = self.active_rows, self.column_rows
+        columns = self.active_columns
+        best_column = self.root
+        best_size = None
+        while columns:
+            low = columns & -columns
+            c = low.bit_length() - 1
+            size = (column_rows[c] & active_rows).bit_count()
+            if best_size is None or size < best_size:
+                best_column = c
+                best_size = size
+                if size <= 1:
+                    break
+            columns ^= low
+        return best_column
+
+    def get_smallest_columns(self):
+        """
+            Returns the list of the columns with the minimum number of cells, from left to right
+            (only the first one when that minimum is 0)
+        """
+        active_rows, column_rows = self.active_rows, self.column_rows
+        columns = self.active_columns
+        smallest_columns = []
+        best_size = None
+        while columns:
+            low = columns & -columns
+            c = low.bit_length() - 1
+            size = (column_rows[c] & active_rows).bit_count()
+            if best_size is None or size < best_size:
+                smallest_columns = [c]
+                best_size = size
+                if size == 0:
+                    break
+            elif size == best_size:
+                smallest_columns.append(c)
+            columns ^= low
+        return smallest_columns
+
+    def iterate_column(self, column):
+        """
+            This method iterates through the cells of a column from top to bottom
+        """
+        n = self.number_of_columns
+        rows = self.get_column_rows(column)
+        while rows:
+            low = rows & -rows
+            yield self.first_cell + (low.bit_length() - 1) * n + column
+            rows ^= low
+
+    def iterate_cells(self, cell, direction):
+        """
+            This method iterate through the matrix starting from
+            'cell' and going in a specified 'direction' until we get
+            back to cell
+            The links are computed from the bitsets (see right and down), 'L' and 'U' go through 'R' and 'D' backwards
+        """
+        if direction in ('L', 'U'):
+            yield from reversed(list(self.iterate_cells(cell, 'R' if direction == 'L' else 'D')))
+            return
+        step = self.right if direction == 'R' else self.down
+        current_cell = step(cell)
+        while current_cell != cell:
+            yield current_cell
+            current_cell = step(current_cell)
+
+    def get_row_number(self, cell):
+        """
+            Returns the row number of a cell
+        """
+        return self.bit_rows[(cell - self.first_cell) // self.number_of_columns]
+
+    def get_row_column_names(self, cell):
+        """
+            Returns the names of the columns of the row of 'cell' starting with the column of 'cell'
+        """
+        return [self.column_names[idx] for idx in self.get_row_columns_from_cell(cell)]
+
+    def get_column_names(self):
+        """
+            Returns the list of column names
+        """
+        return list(self.column_names)
+
+    def get_row_column_indices(self, cell):
+        """
+            Returns the indexes of the columns of the row of 'cell'
+        """
+        return list(self.get_row_columns_from_cell(cell))
+
+    def get_sparse_rows(self):
+        """
+            Returns the rows of the matrix in the add_sparse_row format, so that the matrix can be rebuilt elsewhere
+        """
+        return [{"row_name" : self.row_number_to_row_name[row_number], "row_value" : list(row)} for row_number, row in enumerate(self.row_columns)]
+
+    def __str__(self):
+        """
+            Returns a string representation of the matrix
+            where X means that the cell has value 1
+            and - meands that the cell has value 0
+        """
+        result = [['-' for i in range(self.number_of_columns)] for j in range(self.number_of_rows)]
+        active_columns = list(self.iterate_cells(self.root, 'R')) + list(range(self.number_of_primary_columns, self.number_of_columns))
+        for column in active_columns:
+            for cell in self.iterate_column(column):
+                result[self.get_row_number(cell)][column] = 'X'
+
+        string_result = ""
+        for row in result:
+            string_result = string_result + str(row) + "\n"
+        return string_result
+
+
+def get_column_name_lists(columns, secondary_columns):
+    """
+        Turns the columns and secondary_columns constructor arguments (a number of columns or a list of names)
+        into two lists of names, secondary columns are numbered after the primary ones by default
+    """
+    if isinstance(columns, int):
+        columns = list(range(columns))
+    if secondary_columns is None:
+        secondary_columns = []
+    if isinstance(secondary_columns, int):
+        secondary_columns = list(range(len(columns), len(columns) + secondary_columns))
+    return list(columns), list(secondary_columns)
+
+def get_column_bounds(number_of_primary_columns, number_of_columns, multiplicities):
+    """
+        Returns the list of (lower bound, upper bound) of each column
+    """
+    bounds = [(1, 1)] * number_of_primary_columns + [(0, 1)] * (number_of_columns - number_of_primary_columns)
+    for column, (lower_bound, upper_bound) in multiplicities.items():
+        if column >= number_of_primary_columns and lower_bound > 0:
+            raise ValueError("Secondary column {} cannot have a positive lower bound".format(column))
+        if not 0 <= lower_bound <= upper_bound or upper_bound == 0:
+            raise ValueError("Invalid bounds ({}, {}) for column {}".format(lower_bound, upper_bound, column))
+        bounds[column] = (lower_bound, upper_bound)
+    return bounds
+
+
+def build_size_buckets(column_sizes, number_of_columns, number_of_rows, max_bucket_size = None):
+    """
+        Returns the (next, previous, max bucket size) size buckets of the given (column index, size) pairs
+        Bucket s is a circular doubly linked list whose head is number_of_columns + 1 + s, columns are linked
+        through their index : the arrays cover every column index (and the root) then one head per size up to
+        max_bucket_size (number_of_rows by default), larger columns are in no bucket
+        The columns are appended in the given order, cover and uncover then put the columns they resize
+        at the front of their new bucket
+    """
+    if max_bucket_size is None or max_bucket_size > number_of_rows:
+        max_bucket_size = number_of_rows
+    first_head = number_of_columns + 1
+    next_in_bucket = array('i', range(first_head + max_bucket_size + 1))
+    previous_in_bucket = array('i', next_in_bucket)
+    for index, size in column_sizes:
+        if size > max_bucket_size:
+            continue
+        head = first_head + size
+        tail = previous_in_bucket[head]
+        next_in_bucket[tail] = index
+        previous_in_bucket[index] = tail
+        next_in_bucket[index] = head
+        previous_in_bucket[head] = index
+    return next_in_bucket, previous_in_bucket, max_bucket_size
+
+def get_bucketed_column(size_buckets, first_head):
+    """
+        Returns the first column of the smallest non empty size bucket, None if they are all empty
+    """
+    next_in_bucket, _, max_bucket_size = size_buckets
+    last_head = first_head + max_bucket_size
+    for head in range(first_head, last_head + 1):
+        if next_in_bucket[head] != head:
+            return next_in_bucket[head]
+    return None
+
+def get_bucketed_columns(size_buckets, first_head):
+    """
+        Returns the columns of the smallest non empty size bucket (only the first one for the bucket of size 0),
+        an empty list if they are all empty
+    """
+    next_in_bucket, _, max_bucket_size = size_buckets
+    head = first_head
+    while head <= first_head + max_bucket_size and next_in_bucket[head] == head:
+        head += 1
+    if head > first_head + max_bucket_size:
+        return []
+    if head == first_head:
+        return [next_in_bucket[head]]
+    columns = []
+    index = next_in_bucket[head]
+    while index != head:
+        columns.append(index)
+        index = next_in_bucket[index]
+    return columns
+
+def get_dense_primary_columns(number_of_columns, secondary_columns):
+    """
+        Number of primary columns of a dense matrix whose last columns are the secondary ones (a number or a list of names)
+    """
+    _, secondary_columns = get_column_name_lists([], secondary_columns)
+    if len(secondary_columns) > number_of_columns:
+        raise ValueError("{} secondary columns for a matrix of {} columns".format(len(secondary_columns), number_of_columns))
+    return number_of_columns - len(secondary_columns)
+
+def check_row_columns(row, row_name):
+    """
+        Checks that a row does not have the same column twice (the linked backends would put it twice in the column)
+    """
+    if len(set(row)) != len(row):
+        raise ValueError("Row {} has a repeated column index".format(row_name))
+
+def get_default_columns(max_index, columns, secondary_columns):
+    """
+        Number of primary columns when from_csr is not given any : all the columns up to max_index that are not secondary
+    """
+    if columns is not None:
+        return columns
+    if isinstance(secondary_columns, int):
+        return max_index + 1 - secondary_columns
+    return max_index + 1 - len(secondary_columns or [])
+
+def check_csr_shape(indptr, number_of_cells, row_names):
+    """
+        Checks that indptr describes non empty rows covering all the cells
+    """
+    if len(indptr) == 0 or indptr[0] != 0 or indptr[-1] != number_of_cells:
+        raise ValueError("indptr must start at 0 and end at len(indices)")
+    if row_names is not None and len(row_names) != len(indptr) - 1:
+        raise ValueError("Expected {} row names, got {}".format(len(indptr) - 1, len(row_names)))
+
+def check_column_range(min_index, max_index, columns, secondary_columns):
+    """
+        Checks that the column indexes of the cells are within the columns of the matrix
+    """
+    primary_columns, secondary_columns = get_column_name_lists(columns, secondary_columns)
+    if min_index < 0 or max_index >= len(primary_columns) + len(secondary_columns):
+        raise ValueError("Column indexes must be in [0, {})".format(len(primary_columns) + len(secondary_columns)))
+
+def get_csr_rows(indptr, indices, row_names, columns, secondary_columns):
+    """
+        Checks a CSR description of the rows of a matrix
+        Returns the sorted list of column indexes of each row and the primary columns
+    """
+    #tolist turns NumPy integers into Python integers
+    indptr = indptr.tolist() if hasattr(indptr, "tolist") else list(indptr)
+    indices = indices.tolist() if hasattr(indices, "tolist") else list(indices)
+    check_csr_shape(indptr, len(indices), row_names)
+    rows = []
+    for start, end in zip(indptr, indptr[1:]):
+        if end <= start:
+            raise ValueError("Rows must have at least one column")
+        row = sorted(indices[start:end])
+        check_row_columns(row, len(rows) if row_names is None else row_names[len(rows)])
+        rows.append(row)
+    columns = get_default_columns(max(indices, default = -1), columns, secondary_columns)
+    if indices:
+        check_column_range(min(indices), max(indices), columns, secondary_columns)
+    return rows, columns
+
+def check_csr(indptr, indices, row_names, columns, secondary_columns):
+    """
+        NumPy version of get_csr_rows
+        Returns indptr, indices with the column indexes of each row sorted and the primary columns
+    """
+    indptr = np.asarray(indptr, dtype = np.int64)
+    indices = np.asarray(indices, dtype = np.int64)
+    check_csr_shape(indptr, len(indices), row_names)
+    row_lengths = np.diff(indptr)
+    if (row_lengths <= 0).any():
+        raise ValueError("Rows must have at least one column")
+    row_ids = np.repeat(np.arange(len(row_lengths)), row_lengths)
+    indices = indices[np.lexsort((indices, row_ids))]
+    repeated = np.flatnonzero((np.diff(indices) == 0) & (np.diff(row_ids) == 0))
+    if len(repeated):
+        row_number = int(row_ids[repeated[0]])
+        raise ValueError("Row {} has a repeated column index".format(row_number if row_names is None else row_names[row_number]))
+    columns = get_default_columns(int(indices.max()) if len(indices) else -1, columns, secondary_columns)
+    if len(indices):
+        check_column_range(int(indices.min()), int(indices.max()), columns, secondary_columns)
+    return indptr, indices, columns
+
+def count_column_sizes(indices, number_of_columns):
+    """
+        Returns the number of cells of each column
+    """
+    if np is not None:
+        return np.bincount(np.asarray(indices, dtype = np.int64), minlength = number_of_columns).tolist()
+    sizes = [0] * number_of_columns
+    for idx in indices:
+        sizes[idx] += 1
+    return sizes
+
+def get_csr_from_dense(dense_matrix):
+    """
+        Returns indptr, indices and the number of columns of a dense 0 / 1 matrix
+    """
+    if np is not None:
+        dense_matrix = np.asarray(dense_matrix)
+        if dense_matrix.ndim != 2:
+            raise ValueError("Expected a 2D matrix")
+        row_ids, indices = np.nonzero(dense_matrix)
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(row_ids, minlength = dense_matrix.shape[0]))))
+        return indptr, indices, dense_matrix.shape[1]
+    indptr = [0]
+    indices = []
+    for row in dense_matrix:
+        indices.extend(idx for idx, value in enumerate(row) if value)
+        indptr.append(len(indices))
+    return indptr, indices, len(dense_matrix[0]) if dense_matrix else 0
+
+def to_int_array(values):
+    """
+        Converts a NumPy array to an array('i')
+    """
+    return array('i', np.ascontiguousarray(values, dtype = np.intc).tobytes())
+
+
+DLX_BACKENDS = {
+    "cells" : DLXMatrix,
+    "array" : ArrayDLXMatrix,
+    "bitset" : BitsetDLXMatrix,
+}
+
+def create_dlx_matrix(columns, backend = "cells", secondary_columns = None, multiplicities = None):
+    """
+        Creates an empty dancing links matrix using one of the DLX_BACKENDS
+        "cells" is the Cell object graph, "array" the flat integer arrays representation
+        and "bitset" the row bitsets of each column (see BitsetDLXMatrix)
+        See DLXMatrix for secondary_columns and multiplicities
+    """
+    if backend not in DLX_BACKENDS:
+        raise ValueError("Unknown DLX backend {}, expected one of {}".format(backend, list(DLX_BACKENDS)))
+    return DLX_BACKENDS[backend](columns, secondary_columns, multiplicities)
+
+
+if __name__ == '__main__':
+
+    columns = 5
+    rows = [
+            {"row_name": "1" , "row_value" : [0, 2, 4]},
+            {"row_name": "2" , "row_value" : [1, 3]},
+            {"row_name": "3" , "row_value" : [0, 3, 4]}
+            ]
+
+    for backend in DLX_BACKENDS:
+        dlx = create_dlx_matrix(columns, backend)
+        for row in rows:
+            dlx.add_sparse_row(row)
+        print(dlx)
+        dlx.cover(1)
+        print(dlx)
+        dlx.uncover(1)
+        print(dlx)
 
-    dlx = DLXMatrix(columns)
-    for row in rows:
-        dlx.add_sparse_row(row)
-    print(dlx)
-    dlx.cover(1)
-    print(dlx)
-    dlx.uncover(1)
-    print(dlx)
+        #Same matrix built in one pass from its CSR form
+        dlx = DLX_BACKENDS[backend].from_csr([0, 3, 5, 8], [0, 2, 4, 1, 3, 0, 3, 4], row_names = ["1", "2", "3"])
+        print(dlx)
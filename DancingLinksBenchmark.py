@@ -0,0 +1,130 @@
+import random
+import time
+import tracemalloc
+from DancingLinks import *
+from ExactCoverSolver import ExactCoverSolver
+from SudokuExactCoverConverter import SudokuExactCoverConverter
+from Sudoku import Sudoku
+
+def measure_memory(build):
+    """
+        Returns the object returned by build and the number of bytes it allocated
+    """
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+def measure_cover_uncover(dlx_matrix, repeat):
+    """
+        Covers and uncovers every column of the matrix 'repeat' times
+        and returns the number of cover + uncover operations per second
+    """
+    columns = list(range(dlx_matrix.number_of_columns))
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for column in columns:
+            dlx_matrix.cover(column)
+            dlx_matrix.uncover(column)
+    return 2 * repeat * len(columns) / (time.perf_counter() - start)
+
+def measure_solve(sudoku_text, backend, repeat):
+    """
+        Returns the number of Sudoku solved per second (matrix construction included)
+    """
+    N, grid = Sudoku.get_grid_from_text(sudoku_text)
+    start = time.perf_counter()
+    for _ in range(repeat):
+        dlx_matrix = SudokuExactCoverConverter.convert_sudoku_to_exact_cover(Sudoku(N, grid), backend)
+        ExactCoverSolver(dlx_matrix, first_only=True).algorithmX()
+    return repeat / (time.perf_counter() - start)
+
+def compare_backends(sudoku_size = 9, repeat = 20):
+    """
+        Compares the DLX backends on the matrix of an empty sudoku_size x sudoku_size Sudoku
+        (memory of the matrix, cover/uncover operations per second and solves per second)
+    """
+    sudoku_text = "_".join(["0"] * sudoku_size * sudoku_size)
+    for backend in DLX_BACKENDS:
+        build = lambda : SudokuExactCoverConverter.convert_sudoku_to_exact_cover(Sudoku(sudoku_size), backend)
+        dlx_matrix, memory = measure_memory(build)
+        ops = measure_cover_uncover(dlx_matrix, repeat)
+        solves = measure_solve(sudoku_text, backend, repeat)
+        print("{:6} : {:>10} bytes | {:>10.0f} cover/uncover per sec | {:>8.1f} solves per sec".format(
+            backend, memory, ops, solves))
+
+def get_random_puzzles(sudoku_size, count, empty_ratio, seed = 0):
+    """
+        Returns count puzzles made of random full grids with a fraction empty_ratio of their cells emptied
+        (they may have several solutions, the benchmarks only look for the first one)
+    """
+    rng = random.Random(seed)
+    dlx_matrix = SudokuExactCoverConverter.convert_sudoku_to_exact_cover(Sudoku(sudoku_size), "array")
+    puzzles = []
+    for _ in range(count):
+        dlx_matrix.shuffle_rows(rng)
+        list_of_dlx_rows, _ = ExactCoverSolver(dlx_matrix, first_only=True).algorithmX()
+        puzzle = SudokuExactCoverConverter.convert_exact_cover_solution_to_sudoku(Sudoku(sudoku_size), list_of_dlx_rows)
+        for position in rng.sample(range(sudoku_size * sudoku_size), int(empty_ratio * sudoku_size * sudoku_size)):
+            puzzle.cells[position] = 0
+        puzzles.append(puzzle)
+    return puzzles
+
+def compare_column_selection(puzzles, backend = "array", options = None):
+    """
+        Solves the puzzles on the template matrix with each set of ExactCoverSolver column selection options
+        and prints the number of nodes, nodes per second and puzzles per second
+    """
+    options = options or [("mrv scan", {}), ("mrv buckets <= 2", {"size_buckets" : True}), ("mrv buckets", {"size_buckets" : None}),
+                          ("random", {"heuristic" : "random"}), ("random buckets", {"heuristic" : "random", "size_buckets" : True}),
+                          ("weighted", {"heuristic" : "weighted"})]
+    dlx_matrix = SudokuExactCoverConverter.get_template_matrix(puzzles[0].get_grid_size(), backend)
+    for name, solver_options in options:
+        nodes = 0
+        start = time.perf_counter()
+        for puzzle in puzzles:
+            clue_rows = SudokuExactCoverConverter.cover_clues(dlx_matrix, puzzle)
+            solver = ExactCoverSolver(dlx_matrix, first_only=True, **solver_options)
+            solver.algorithmX()
+            nodes += solver.number_of_nodes
+            SudokuExactCoverConverter.uncover_clues(dlx_matrix, clue_rows)
+        elapsed = time.perf_counter() - start
+        print("{:16} : {:>8} nodes | {:>8.0f} nodes per sec | {:>8.1f} puzzles per sec".format(name, nodes, nodes / elapsed, len(puzzles) / elapsed))
+
+def compare_search_backends(puzzles, backends = None):
+    """
+        Solves the puzzles on the template matrix of each backend (all of the DLX_BACKENDS by default),
+        checks that every backend finds the same cover and prints nodes per second and puzzles per second
+    """
+    expected_covers = None
+    for backend in backends or list(DLX_BACKENDS):
+        dlx_matrix = SudokuExactCoverConverter.get_template_matrix(puzzles[0].get_grid_size(), backend)
+        covers = []
+        nodes = 0
+        start = time.perf_counter()
+        for puzzle in puzzles:
+            clue_rows = SudokuExactCoverConverter.cover_clues(dlx_matrix, puzzle)
+            solver = ExactCoverSolver(dlx_matrix, first_only=True)
+            list_of_dlx_rows, _ = solver.algorithmX()
+            covers.append(list_of_dlx_rows)
+            nodes += solver.number_of_nodes
+            SudokuExactCoverConverter.uncover_clues(dlx_matrix, clue_rows)
+        elapsed = time.perf_counter() - start
+        if expected_covers is None:
+            expected_covers = covers
+        elif covers != expected_covers:
+            raise AssertionError("The {} backend found different covers".format(backend))
+        print("{:6} : {:>8} nodes | {:>8.0f} nodes per sec | {:>8.1f} puzzles per sec".format(backend, nodes, nodes / elapsed, len(puzzles) / elapsed))
+
+if __name__ == '__main__':
+    for sudoku_size in [9, 16]:
+        print("Empty {0}x{0} Sudoku".format(sudoku_size))
+        compare_backends(sudoku_size)
+
+    for sudoku_size, count, empty_ratio in [(9, 200, 0.7), (16, 20, 0.6), (25, 5, 0.4)]:
+        print("Column selection, {0}x{0} Sudoku with {1:.0%} empty cells".format(sudoku_size, empty_ratio))
+        puzzles = get_random_puzzles(sudoku_size, count, empty_ratio)
+        compare_column_selection(puzzles)
+        print("Search backends, {0}x{0} Sudoku with {1:.0%} empty cells".format(sudoku_size, empty_ratio))
+        compare_search_backends(puzzles)
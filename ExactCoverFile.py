@@ -0,0 +1,171 @@
+import json
+import mmap
+import struct
+from array import array
+from DancingLinks import *
+
+class LazyRowNames:
+    """
+        Sequence of row names that is only decoded from its JSON bytes the first time a name is asked for
+    """
+    def __init__(self, buffer):
+        self.buffer = buffer
+        self.names = None
+
+    def get_names(self):
+        if self.names is None:
+            self.names = json.loads(bytes(self.buffer))
+            self.buffer = None
+        return self.names
+
+    def __getitem__(self, row_number):
+        return self.get_names()[row_number]
+
+    def __len__(self):
+        return len(self.get_names())
+
+class ExactCoverFile:
+    """
+        Binary file format for exact cover instances, so that a matrix does not have to be rebuilt from Python rows
+        in every process that solves it
+        Layout (native byte order, integers are 32 bits like array('i')) :
+            header : magic, byte order check, version, flags, number of primary columns, number of columns,
+                     number of rows, number of cells, length of the metadata and of the row names
+            metadata : JSON column names and multiplicities
+            row names : JSON list (absent when the row numbers are the row names)
+            CSR rows : indptr (number of rows + 1 integers) and indices (number of cells integers)
+            links (optional) : L, R, U, D, C and row_numbers of an untouched ArrayDLXMatrix, then size and row_heads
+        Every section starts on an 8 bytes boundary
+        With the links, load maps the file and the ArrayDLXMatrix arrays are views of the mapped pages :
+        nothing is parsed or copied, and the pages are shared between processes until the search writes to them
+        (the mapping is copy on write, the file itself is never modified)
+    """
+    magic = b"DLXI"
+    byte_order_check = 0x01020304
+    version = 1
+    links_flag = 1
+    header_format = "=4sIIIIIIIQQ"
+
+    @staticmethod
+    def get_padding(length):
+        """
+            Returns the number of bytes to add after a section of 'length' bytes
+        """
+        return -length % 8
+
+    @staticmethod
+    def get_csr(matrix):
+        """
+            Returns the rows of a matrix (of any backend) as CSR arrays, whatever columns are covered
+        """
+        indptr = array('i', [0])
+        indices = array('i')
+        for row_start_cell in matrix.row_heads:
+            indices.extend(matrix.get_row_column_indices(row_start_cell))
+            indptr.append(len(indices))
+        return indptr, indices
+
+    @staticmethod
+    def save(matrix, file_path, include_links = True):
+        """
+            Writes the rows, column layout and row names of a matrix (of any backend) to file_path
+            include_links also stores the link arrays so that load does not have to compute them
+            Row names have to be JSON serializable (strings or numbers)
+        """
+        indptr, indices = ExactCoverFile.get_csr(matrix)
+        primary_columns, secondary_columns, multiplicities = matrix.get_column_layout()
+        metadata = json.dumps({"primary_columns" : primary_columns, "secondary_columns" : secondary_columns,
+                               "multiplicities" : [[column, lower_bound, upper_bound] for column, (lower_bound, upper_bound) in sorted(multiplicities.items())]}).encode()
+        row_names = matrix.row_number_to_row_name.names
+        if row_names is None or list(row_names) == list(range(matrix.number_of_rows)):
+            row_names_data = b""
+        else:
+            row_names_data = json.dumps(list(row_names)).encode()
+        flags = ExactCoverFile.links_flag if include_links else 0
+        header = struct.pack(ExactCoverFile.header_format, ExactCoverFile.magic, ExactCoverFile.byte_order_check, ExactCoverFile.version, flags,
+                             matrix.number_of_primary_columns, matrix.number_of_columns, matrix.number_of_rows, len(indices),
+                             len(metadata), len(row_names_data))
+
+        sections = [header, metadata, row_names_data, indptr.tobytes(), indices.tobytes()]
+        if include_links:
+            #The links of an untouched matrix, whatever the state of 'matrix' is
+            links = ArrayDLXMatrix.from_csr(indptr, indices, None, primary_columns, secondary_columns)
+            sections.extend(getattr(links, name).tobytes() for name in ["L", "R", "U", "D", "C", "row_numbers", "size", "row_heads"])
+        with open(file_path, "wb") as instance_file:
+            for section in sections:
+                instance_file.write(section)
+                instance_file.write(bytes(ExactCoverFile.get_padding(len(section))))
+
+    @staticmethod
+    def load(file_path, backend = "array"):
+        """
+            Returns the matrix saved in file_path using one of the DLX_BACKENDS
+            The array backend is mapped straight from the file when the links were saved, and built with from_csr otherwise
+            A mapped matrix cannot get new rows (add_sparse_row)
+        """
+        with open(file_path, "rb") as instance_file:
+            buffer = mmap.mmap(instance_file.fileno(), 0, access = mmap.ACCESS_COPY)
+        view = memoryview(buffer)
+        header_size = struct.calcsize(ExactCoverFile.header_format)
+        magic, byte_order_check, version, flags, number_of_primary_columns, number_of_columns, number_of_rows, number_of_cells, metadata_length, row_names_length = \
+            struct.unpack_from(ExactCoverFile.header_format, buffer)
+        if magic != ExactCoverFile.magic or byte_order_check != ExactCoverFile.byte_order_check:
+            raise ValueError("{} is not an exact cover instance file written on this platform".format(file_path))
+        if version != ExactCoverFile.version:
+            raise ValueError("Unsupported exact cover instance file version {}".format(version))
+
+        offset = header_size + ExactCoverFile.get_padding(header_size)
+        def read_section(length):
+            nonlocal offset
+            section = view[offset : offset + length]
+            offset += length + ExactCoverFile.get_padding(length)
+            return section
+        def read_integers(count):
+            return read_section(4 * count).cast('i')
+
+        metadata = json.loads(bytes(read_section(metadata_length)))
+        row_names_section = read_section(row_names_length)
+        row_names = LazyRowNames(row_names_section) if row_names_length else None
+        multiplicities = {column : (lower_bound, upper_bound) for column, lower_bound, upper_bound in metadata["multiplicities"]}
+        indptr = read_integers(number_of_rows + 1)
+        indices = read_integers(number_of_cells)
+
+        if backend != "array" or not flags & ExactCoverFile.links_flag:
+            if backend not in DLX_BACKENDS:
+                raise ValueError("Unknown DLX backend {}, expected one of {}".format(backend, list(DLX_BACKENDS)))
+            matrix = DLX_BACKENDS[backend].from_csr(indptr, indices, row_names, metadata["primary_columns"], metadata["secondary_columns"], multiplicities)
+        else:
+            matrix = ArrayDLXMatrix(metadata["primary_columns"], metadata["secondary_columns"], multiplicities)
+            number_of_links = number_of_columns + 1 + number_of_cells
+            for name in ["L", "R", "U", "D", "C", "row_numbers"]:
+                setattr(matrix, name, read_integers(number_of_links))
+            matrix.size = read_integers(number_of_columns + 1)
+            matrix.row_heads = read_integers(number_of_rows)
+            matrix.number_of_rows = number_of_rows
+            matrix.row_number_to_row_name = RowNames(row_names)
+        assert(matrix.number_of_primary_columns == number_of_primary_columns and matrix.number_of_columns == number_of_columns)
+        #Keeps the mapping alive as long as the matrix and lets solve_parallel workers load the same file
+        matrix.instance_buffer = buffer
+        matrix.instance_file_path = file_path
+        return matrix
+
+
+if __name__ == '__main__':
+    import os
+    import tempfile
+    import time
+    from ExactCoverSolver import ExactCoverSolver
+    from SudokuExactCoverConverter import SudokuExactCoverConverter
+
+    #The 9x9 Sudoku exact cover matrix (729 rows, 324 columns)
+    matrix = SudokuExactCoverConverter.get_template_matrix(9, "array")
+    file_path = os.path.join(tempfile.mkdtemp(), "sudoku.dlx")
+    ExactCoverFile.save(matrix, file_path)
+    print(os.path.getsize(file_path), "bytes")
+
+    for backend in DLX_BACKENDS:
+        start = time.perf_counter()
+        loaded = ExactCoverFile.load(file_path, backend)
+        print(backend, "loaded in {:.6f} s".format(time.perf_counter() - start))
+        print(loaded.get_sparse_rows() == matrix.get_sparse_rows())
+        print(ExactCoverSolver(loaded).search(), loaded.row_number_to_row_name[0])
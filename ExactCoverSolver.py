@@ -1,67 +1,573 @@
+import collections
+import multiprocessing
+import os
+import queue
+import time
 from DancingLinks import *
+from ExactCoverFile import ExactCoverFile
+from SearchStatistics import SearchStatistics
+from ColumnHeuristics import get_column_heuristic
 
 class ExactCoverSolver:
-    def __init__(self, problem):
+    def __init__(self, problem, max_solutions=None, first_only=False, stats=None, heuristic=None, size_buckets=False):
         """
             ExactCoverSolver takes an instance of an Exact Cover problem
             in the form of a sparse Dancing Links Matrix
             and solves it using Knuth's algorithmX
+            The matrix can be any of the DLX_BACKENDS (DLXMatrix or ArrayDLXMatrix)
 
+            max_solutions : the search stops as soon as this many solutions have been found
+                            (None means that the whole search tree is explored)
+            first_only : shortcut for max_solutions = 1
+            stats : True (or a SearchStatistics to accumulate into) to count nodes, cover / uncover calls,
+                    updates, max depth and select_column time, the counters end up in self.stats
+                    (None or False means no statistics and no overhead)
+            heuristic : column selection heuristic, a name of ColumnHeuristics.COLUMN_HEURISTICS ("mrv", "random", "weighted")
+                        or an object with a select_column(problem) method (None is the matrix's select_column, same as "mrv")
+            size_buckets : keeps the primary columns in buckets indexed by size while the search runs
+                           (see DLXMatrix.enable_size_buckets) : select_column reads the smallest bucket instead of scanning
+                           the column heads, cover and uncover do more work per update. Ties are then broken by bucket order
+                           instead of leftmost
+                           True indexes the columns with at most 2 rows, an int the columns with at most that many rows and None
+                           every size (the larger columns are scanned when no column is that small)
+                           This is not a speedup in general : the scan already stops at the first column with at most one row,
+                           in DancingLinksBenchmark buckets are slower on 9x9 Sudokus and about even on 16x16 and 25x25 ones
+                           The bitset backend has no buckets to keep, this option does nothing there
+
+            The search is iterative : instead of recursing once per selected row we keep an explicit stack
+            of [column, current row] entries, one per level. This means that the depth of the search is not
+            limited by Python's recursion limit and that the search can be paused and resumed (see search)
+
+            Secondary columns (covered at most once) need nothing special. When the matrix has multiplicities
+            (see DLXMatrix) the search follows Knuth's algorithm M instead (see search_bounded)
+            Algorithm M picks its own columns and its levels are not (column, row) pairs : with multiplicities
+            heuristic and size_buckets raise a ValueError here, and so do split, solve_parallel, abort_with_frontier
+            and get_checkpoint / restore_checkpoint (search, iter_solutions and count_solutions work as usual)
         """
         self.problem = problem
-        self.backtrack_solution_trace = {}
+        self.stack = []
+        #True when the next step is to expand the node at the top of the stack, False when we have to backtrack
+        self.descending = True
+        self.finished = False
         self.solution = {}
         self.list_of_solution_rows = []
+        self.number_of_solutions = 0
+        self.number_of_nodes = 0
+        if first_only:
+            max_solutions = 1
+        self.max_solutions = max_solutions
+        if stats is True:
+            stats = SearchStatistics()
+        self.stats = stats or None
+        #Column bounds and number of selected rows containing each column, only used with multiplicities
+        self.bounds = problem.get_column_bounds() if problem.has_multiplicities() else None
+        self.counts = None if self.bounds is None else [0] * len(self.bounds)
+        self.heuristic = None if heuristic is None else get_column_heuristic(heuristic)
+        self.size_buckets = size_buckets
+        if heuristic is not None or size_buckets is not False:
+            #search_bounded has its own column selection
+            self.check_unbounded("heuristic / size_buckets")
 
     def select_column(self):
-        current_column_head_cell = self.problem.root.R
-        best_column = current_column_head_cell
-
-        while current_column_head_cell != self.problem.root:
-            if current_column_head_cell.size < best_column.size:
-                best_column = current_column_head_cell
-            current_column_head_cell = current_column_head_cell.R
-        return best_column
+        """
+            Returns the column with the minimum number of cells (Knuth's S heuristic) or the column chosen by the heuristic
+        """
+        if self.heuristic is not None:
+            return self.heuristic.select_column(self.problem)
+        return self.problem.select_column()
 
-    def create_solution(self, d):
+    def build_cover(self):
         """
-            We construct the final solution based on what we saved in the backtracking solution trace
+            Builds the cover made of the rows currently on the stack
+            Returns the list of selected row names and a dictionary row name -> list of column names
         """
-        for k, row in self.backtrack_solution_trace.items():
-            if k >= d:
+        list_of_rows = []
+        cover = {}
+        for entry in self.stack:
+            row = entry[1]
+            if row is None:
                 continue
-            row_column_list = [row.C.name]
-            row_column_list.extend(r.C.name for r in self.problem.iterate_cells(row, 'R'))
-            row_name = self.problem.row_number_to_row_name[row.row_number]
-            self.solution[row_name] = row_column_list
-            self.list_of_solution_rows.append(row_name)
+            row_name = self.problem.row_number_to_row_name[self.problem.get_row_number(row)]
+            cover[row_name] = self.problem.get_row_column_names(row)
+            list_of_rows.append(row_name)
+        return list_of_rows, cover
+
+    def get_row_numbers(self):
+        """
+            Returns the row numbers of the rows currently on the stack, the cover found by search without any row
+            or column name (callers that know how the rows are numbered decode it themselves)
+        """
+        problem = self.problem
+        return [problem.get_row_number(entry[1]) for entry in self.stack if entry[1] is not None]
+
+    def create_solution(self):
+        """
+            We construct the final solution based on the rows that are on the stack
+            Returns True if the search has to stop because we reached max_solutions
+        """
+        list_of_rows, cover = self.build_cover()
+        self.solution.update(cover)
+        self.list_of_solution_rows.extend(list_of_rows)
+        self.number_of_solutions += 1
+        return self.max_solutions is not None and self.number_of_solutions >= self.max_solutions
 
-    def search_helper(self, d):
+    def search(self, max_nodes=None, time_budget=None, max_depth=None):
         """
             This is main backtracking method that solves the exact cover problem
             Each column has to have only one selected solution row in which it is set to 1
-            So in each recursive step of the algorithm:
+            So at each level of the search:
                 We select a column c
                 We cover c so that it will not be considered anymore
                 Now we try all rows r in which c is set to 1:
                     We select r as a part of the solution
                     We cover all columns j in which r is set to 1 because by picking we already satisfy j
-                    We recurse
+                    We go one level deeper
                     If that did not work we uncover all column that we have covered and try next r
+            The search runs until the next solution is found (the rows are on the stack) and returns "solution",
+            until the search tree is exhausted and returns "done",
+            or until max_nodes nodes have been expanded or time_budget seconds have passed and returns "paused"
+            With max_depth, nodes at that depth are not expanded : the search stops there and returns "frontier"
+            (the rows leading to the node are on the stack)
+            Calling search again resumes from where it stopped
         """
-        if self.problem.root.R == self.problem.root:
-            self.create_solution(d)
-            return
-        c = self.select_column()
-        self.problem.cover(c)
-        for r in self.problem.iterate_cells(c, 'D'):
-            self.backtrack_solution_trace[d] = r
-            for j in self.problem.iterate_cells(r, 'R'):
-                self.problem.cover(j)
-            self.search_helper(d + 1)
-            for j in self.problem.iterate_cells(r, 'L'):
-                self.problem.uncover(j)
-        self.problem.uncover(c)
+        if self.finished:
+            return "done"
+        if self.bounds is not None:
+            return self.search_bounded(max_nodes, time_budget, max_depth)
+        problem = self.problem
+        stack = self.stack
+        stats = self.stats
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        number_of_nodes = 0
+        descending = self.descending
+        self.start_stats()
+        try:
+            while True:
+                if descending:
+                    if problem.is_empty():
+                        if stats is not None:
+                            stats.record_solution(len(stack))
+                        self.descending = False
+                        return "solution"
+                    if len(stack) == max_depth:
+                        self.descending = False
+                        return "frontier"
+                    if (max_nodes is not None and number_of_nodes >= max_nodes) or (deadline is not None and time.perf_counter() >= deadline):
+                        self.descending = True
+                        return "paused"
+                    number_of_nodes += 1
+                    self.number_of_nodes += 1
+                    c = self.select_column()
+                    if stats is not None:
+                        stats.record_node(len(stack), problem.column_size(c))
+                    problem.cover(c)
+                    r = problem.down(c)
+                    if r == c:
+                        #Dead end, no row can cover c
+                        problem.uncover(c)
+                        descending = False
+                        continue
+                    stack.append([c, r])
+                    problem.cover_row(r)
+                else:
+                    if not stack:
+                        self.finished = True
+                        return "done"
+                    entry = stack[-1]
+                    c, r = entry
+                    problem.uncover_row(r)
+                    r = problem.down(r)
+                    if r == c:
+                        stack.pop()
+                        problem.uncover(c)
+                        continue
+                    entry[1] = r
+                    problem.cover_row(r)
+                    descending = True
+        finally:
+            self.stop_stats()
+
+    def search_bounded(self, max_nodes=None, time_budget=None, max_depth=None):
+        """
+            search for matrices with multiplicities : each column j has to be in between lower(j) and upper(j) selected rows
+            At each level of the search:
+                We select the primary column p with the fewest options (its rows, plus one if p can already be closed)
+                We try all rows r of p:
+                    We select r and hide it so that it cannot be selected twice
+                    Every column j of r whose count reaches upper(j) is covered
+                    We go one level deeper
+                    Then we undo r but leave it hidden, so the next siblings never select it again
+                If p has enough rows we finally try to close p : we cover it so that no more rows containing it are selected
+                Once all the options have been tried we unhide the rows of p
+            Stack entries are [column, current row (None when closed), hidden rows, covered columns, closed]
+            The return values are the same as search's
+        """
+        problem = self.problem
+        stack = self.stack
+        stats = self.stats
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        number_of_nodes = 0
+        descending = self.descending
+        self.start_stats()
+        try:
+            while True:
+                if descending:
+                    if problem.is_empty():
+                        if stats is not None:
+                            stats.record_solution(len(stack))
+                        self.descending = False
+                        return "solution"
+                    if len(stack) == max_depth:
+                        self.descending = False
+                        return "frontier"
+                    if (max_nodes is not None and number_of_nodes >= max_nodes) or (deadline is not None and time.perf_counter() >= deadline):
+                        self.descending = True
+                        return "paused"
+                    number_of_nodes += 1
+                    self.number_of_nodes += 1
+                    p, options = self.select_bounded_column()
+                    if stats is not None:
+                        stats.record_node(len(stack), max(options, 0))
+                    if options <= 0:
+                        #Dead end, p cannot reach its lower bound
+                        descending = False
+                        continue
+                    stack.append([p, None, [], [], False])
+                else:
+                    if not stack:
+                        self.finished = True
+                        return "done"
+                if self.next_bounded_option(stack[-1]):
+                    descending = True
+                else:
+                    stack.pop()
+                    descending = False
+        finally:
+            self.stop_stats()
+
+    def select_bounded_column(self):
+        """
+            Returns the primary column with the fewest options and its number of options
+            (0 or less if the column cannot reach its lower bound anymore), leftmost one on ties
+        """
+        problem = self.problem
+        bounds = self.bounds
+        counts = self.counts
+        best_column = None
+        best_options = None
+        for column in problem.iterate_cells(problem.root, 'R'):
+            column_index = problem.get_column_index(column)
+            lower_bound = bounds[column_index][0]
+            size = problem.column_size(column)
+            if counts[column_index] >= lower_bound:
+                options = size + 1
+            elif lower_bound - counts[column_index] > size:
+                return column, 0
+            else:
+                options = size
+            if best_options is None or options < best_options:
+                best_column = column
+                best_options = options
+        return best_column, best_options
+
+    def undo_bounded_option(self, entry):
+        """
+            Undoes the option currently selected by a search_bounded stack entry, a selected row stays hidden
+        """
+        problem = self.problem
+        p, r, hidden_rows, covered_columns, closed = entry
+        if closed:
+            problem.uncover(p)
+            entry[4] = False
+        elif r is not None:
+            while covered_columns:
+                problem.uncover(covered_columns.pop())
+            for column_index in problem.get_row_column_indices(r):
+                self.counts[column_index] -= 1
+            hidden_rows.append(r)
+            entry[1] = None
+
+    def next_bounded_option(self, entry):
+        """
+            Undoes the current option of a search_bounded stack entry and selects the next one
+            Returns False, with every row of the column unhidden, once all the options have been tried
+        """
+        problem = self.problem
+        was_closed = entry[4]
+        self.undo_bounded_option(entry)
+        p, _, hidden_rows, covered_columns, _ = entry
+        if not was_closed:
+            #The rows already tried are hidden so the next row is always the first one
+            r = problem.down(p)
+            if r != p:
+                problem.hide_row(r)
+                for column_index in problem.get_row_column_indices(r):
+                    self.counts[column_index] += 1
+                    if self.counts[column_index] == self.bounds[column_index][1]:
+                        column = problem.get_column(column_index)
+                        problem.cover(column)
+                        covered_columns.append(column)
+                entry[1] = r
+                return True
+            if self.counts[problem.get_column_index(p)] >= self.bounds[problem.get_column_index(p)][0]:
+                problem.cover(p)
+                entry[4] = True
+                return True
+        while hidden_rows:
+            problem.unhide_row(hidden_rows.pop())
+        return False
+
+    def count_solutions(self, limit=None, memoize=False):
+        """
+            Counts the solutions without building them : leaves only increment a counter
+            The count stops at limit (None means that the whole search tree is explored), limit = 2 is enough to tell
+            if a solution is unique
+            With memoize, the number of solutions below each node is saved under the set of columns covered
+            since the beginning of the count (an integer bitmask), subproblems with the same remaining columns
+            are then only counted once
+            Returns the number of solutions (at most limit), the matrix is left untouched
+        """
+        if limit is not None and limit <= 0:
+            return 0
+        if self.bounds is not None:
+            #Matrices with multiplicities are counted through search_bounded, without memoisation
+            count = 0
+            try:
+                while (limit is None or count < limit) and self.search() == "solution":
+                    count += 1
+            finally:
+                self.abort()
+            self.number_of_solutions = count
+            return count
+        problem = self.problem
+        stats = self.stats
+        memo = {} if memoize else None
+        row_masks = {}
+        #Entries are [column, current row, solutions counted before the node, covered columns mask of the node]
+        stack = []
+        key = 0
+        count = 0
+        descending = True
+        self.start_stats()
+        try:
+            while True:
+                if descending:
+                    descending = False
+                    if problem.is_empty():
+                        count += 1
+                        if stats is not None:
+                            stats.record_solution(len(stack))
+                    elif memo is not None and key in memo:
+                        count += memo[key]
+                    else:
+                        self.number_of_nodes += 1
+                        c = self.select_column()
+                        if stats is not None:
+                            stats.record_node(len(stack), problem.column_size(c))
+                        problem.cover(c)
+                        r = problem.down(c)
+                        if r == c:
+                            problem.uncover(c)
+                            if memo is not None:
+                                memo[key] = 0
+                        else:
+                            stack.append([c, r, count, key])
+                            problem.cover_row(r)
+                            if memo is not None:
+                                key |= self.get_row_mask(r, row_masks)
+                            descending = True
+                            continue
+                    if limit is not None and count >= limit:
+                        break
+                else:
+                    if not stack:
+                        break
+                    entry = stack[-1]
+                    c, r, start_count, node_key = entry
+                    problem.uncover_row(r)
+                    r = problem.down(r)
+                    if r == c:
+                        stack.pop()
+                        problem.uncover(c)
+                        if memo is not None:
+                            memo[node_key] = count - start_count
+                        continue
+                    entry[1] = r
+                    problem.cover_row(r)
+                    if memo is not None:
+                        key = node_key | self.get_row_mask(r, row_masks)
+                    descending = True
+        finally:
+            while stack:
+                c, r, _, _ = stack.pop()
+                problem.uncover_row(r)
+                problem.uncover(c)
+            self.stop_stats()
+
+        if limit is not None:
+            count = min(count, limit)
+        self.number_of_solutions = count
+        return count
+
+    def get_row_mask(self, row, row_masks):
+        """
+            Returns the bitmask of the columns of a row, masks are cached by row number in row_masks
+        """
+        row_number = self.problem.get_row_number(row)
+        mask = row_masks.get(row_number)
+        if mask is None:
+            mask = 0
+            for column_index in self.problem.get_row_column_indices(row):
+                mask |= 1 << column_index
+            row_masks[row_number] = mask
+        return mask
+
+    def abort(self):
+        """
+            Stops the search and uncovers everything that has been covered so the matrix is left untouched
+        """
+        while self.stack:
+            entry = self.stack.pop()
+            if self.bounds is not None:
+                self.undo_bounded_option(entry)
+                for r in reversed(entry[2]):
+                    self.problem.unhide_row(r)
+                continue
+            c, r = entry
+            self.problem.uncover_row(r)
+            self.problem.uncover(c)
+        self.finished = True
+
+    def abort_with_frontier(self):
+        """
+            Stops a paused search like abort and returns the part of the search tree that has not been explored
+            as a list of prefixes (tuples of row numbers) : the node that was about to be expanded
+            and, at each level, the rows of the column that had not been tried yet
+        """
+        self.check_unbounded("abort_with_frontier")
+        problem = self.problem
+        frontier = []
+        path = [problem.get_row_number(r) for _, r in self.stack]
+        if self.descending and not self.finished:
+            frontier.append(tuple(path))
+        while self.stack:
+            c, r = self.stack.pop()
+            path.pop()
+            problem.uncover_row(r)
+            #The column is back in the state it had when its rows were tried
+            sibling = problem.down(r)
+            while sibling != c:
+                frontier.append(tuple(path) + (problem.get_row_number(sibling),))
+                sibling = problem.down(sibling)
+            problem.uncover(c)
+        self.finished = True
+        return frontier
+
+    def split(self, split_depth):
+        """
+            Splits the search tree at split_depth
+            Returns the list of prefixes (tuples of row numbers) of the nodes at that depth
+            and the list of covers (tuples of row numbers) found above it
+        """
+        self.check_unbounded("split")
+        prefixes = []
+        covers = []
+        while True:
+            status = self.search(max_depth=split_depth)
+            if status == "done":
+                break
+            path = tuple(self.problem.get_row_number(r) for _, r in self.stack)
+            if status == "frontier":
+                prefixes.append(path)
+            else:
+                covers.append(path)
+        return prefixes, covers
+
+    def solve_parallel(self, workers=None, split_depth=2, node_budget=20000, count_only=False):
+        """
+            Solves the problem on a pool of worker processes
+            The search tree is split at split_depth into prefixes (see split), each worker rebuilds its own copy of the matrix,
+            selects the rows of a prefix and searches below it
+            A worker that has not finished its prefix after node_budget nodes gives its unexplored siblings back (see abort_with_frontier)
+            so that idle workers can pick them up and uneven subtrees get balanced
+            Returns the list of covers (each one is a list of row names, empty with count_only) and the number of solutions
+            The matrix must not have covered columns, max_solutions is honoured
+            A matrix loaded with ExactCoverFile.load is loaded from its file by the workers instead of being rebuilt
+        """
+        self.check_unbounded("solve_parallel")
+        if workers is None:
+            workers = os.cpu_count() or 1
+        problem = self.problem
+        prefixes, covers = self.split(split_depth)
+        list_of_covers = [] if count_only else [[problem.row_number_to_row_name[row] for row in cover] for cover in covers]
+        number_of_solutions = len(covers)
+
+        pending = collections.deque(prefixes)
+        results = queue.Queue()
+        if getattr(problem, "instance_file_path", None) is not None:
+            backend = next(name for name, matrix_class in DLX_BACKENDS.items() if isinstance(problem, matrix_class))
+            initializer, initargs = init_parallel_worker_from_file, (problem.instance_file_path, backend)
+        else:
+            initializer, initargs = init_parallel_worker, (type(problem), problem.get_column_layout(), problem.get_sparse_rows())
+        with multiprocessing.Pool(workers, initializer=initializer, initargs=initargs) as pool:
+            in_flight = 0
+            while pending or in_flight:
+                if self.max_solutions is not None and number_of_solutions >= self.max_solutions:
+                    break
+                while pending and in_flight < 2 * workers:
+                    task = (pending.popleft(), node_budget, count_only, self.max_solutions)
+                    pool.apply_async(solve_prefix_worker, (task,), callback=results.put, error_callback=results.put)
+                    in_flight += 1
+                result = results.get()
+                in_flight -= 1
+                if isinstance(result, BaseException):
+                    raise result
+                worker_covers, worker_solutions, frontier = result
+                list_of_covers.extend(worker_covers)
+                number_of_solutions += worker_solutions
+                pending.extend(frontier)
+
+        if self.max_solutions is not None and number_of_solutions > self.max_solutions:
+            number_of_solutions = self.max_solutions
+            list_of_covers = list_of_covers[:self.max_solutions]
+        self.finished = True
+        self.number_of_solutions = number_of_solutions
+        return list_of_covers, number_of_solutions
+
+    def get_checkpoint(self):
+        """
+            Returns a picklable snapshot of a paused search : the (column index, row number) selected at each level
+            A fresh solver on a fresh copy of the matrix can continue from it (see restore_checkpoint)
+        """
+        self.check_unbounded("get_checkpoint")
+        path = [(self.problem.get_column_index(c), self.problem.get_row_number(r)) for c, r in self.stack]
+        return {"path" : path, "descending" : self.descending, "finished" : self.finished, "number_of_solutions" : self.number_of_solutions}
+
+    def restore_checkpoint(self, checkpoint):
+        """
+            Replays the covers of a checkpoint on the (untouched) matrix of this solver
+        """
+        self.check_unbounded("restore_checkpoint")
+        problem = self.problem
+        for column_index, row_number in checkpoint["path"]:
+            c = problem.get_column(column_index)
+            problem.cover(c)
+            r = problem.down(c)
+            while problem.get_row_number(r) != row_number:
+                r = problem.down(r)
+            self.stack.append([c, r])
+            problem.cover_row(r)
+        self.descending = checkpoint["descending"]
+        self.finished = checkpoint["finished"]
+        self.number_of_solutions = checkpoint["number_of_solutions"]
+
+    def check_unbounded(self, method_name):
+        """
+            Raises a ValueError on a matrix with multiplicities : prefixes and checkpoints are made of (column, row) pairs,
+            which cannot describe the options of search_bounded, and search_bounded has its own column selection
+        """
+        if self.bounds is not None:
+            raise ValueError("{} is not supported on matrices with multiplicities".format(method_name))
 
     def algorithmX(self):
         """
@@ -69,9 +575,106 @@ class ExactCoverSolver:
             Return the list of row names to be selected and a dictionary of list that correspond to the values of those rows
             If the problem is unsolvable we will get an empty list and an empty dictionary
         """
-        self.search_helper(0)
+        if self.max_solutions is not None and self.max_solutions <= 0:
+            return self.list_of_solution_rows, self.solution
+        while self.search() == "solution":
+            if self.create_solution():
+                self.abort()
         return self.list_of_solution_rows, self.solution
 
+    def iter_solutions(self):
+        """
+            Lazily yields each cover as a separate (list of row names, dictionary of row name -> column names) tuple
+            The search is suspended between two solutions and stops after max_solutions covers
+        """
+        number_of_solutions = 0
+        if self.max_solutions is not None and self.max_solutions <= 0:
+            return
+        try:
+            while self.search() == "solution":
+                yield self.build_cover()
+                number_of_solutions += 1
+                if self.max_solutions is not None and number_of_solutions >= self.max_solutions:
+                    return
+        finally:
+            self.abort()
+
+    def start_stats(self):
+        """
+            Instruments the matrix and select_column when statistics are enabled
+            and indexes the columns by size when size_buckets is set
+        """
+        if self.size_buckets is not False:
+            if self.size_buckets is True:
+                self.problem.enable_size_buckets()
+            else:
+                self.problem.enable_size_buckets(self.size_buckets)
+        if self.stats is not None:
+            self.problem.enable_stats(self.stats)
+            self.select_column = self.stats.timed_select_column(self.select_column)
+
+    def stop_stats(self):
+        """
+            Removes the instrumentation and the size buckets, the matrix may be shared with other solvers
+        """
+        if self.stats is not None:
+            self.problem.disable_stats(self.stats)
+            del self.select_column
+        if self.size_buckets is not False:
+            self.problem.disable_size_buckets()
+
+#Copy of the matrix owned by each solve_parallel worker process
+parallel_problem = None
+
+def init_parallel_worker(matrix_class, column_layout, rows):
+    """
+        Pool initializer : rebuilds the matrix once per worker, column_layout comes from get_column_layout
+    """
+    global parallel_problem
+    parallel_problem = matrix_class(*column_layout)
+    for row in rows:
+        parallel_problem.add_sparse_row(row)
+
+def init_parallel_worker_from_file(file_path, backend):
+    """
+        Pool initializer : maps the matrix saved in file_path (see ExactCoverFile)
+    """
+    global parallel_problem
+    parallel_problem = ExactCoverFile.load(file_path, backend)
+
+def solve_prefix_worker(task):
+    """
+        Pool task : searches below a prefix for at most node_budget nodes
+        Returns the covers found (lists of row names), the number of solutions and the unexplored prefixes
+    """
+    prefix, node_budget, count_only, max_solutions = task
+    problem = parallel_problem
+    for row_number in prefix:
+        problem.select_row(row_number)
+    prefix_names = [problem.row_number_to_row_name[row_number] for row_number in prefix]
+    solver = ExactCoverSolver(problem, max_solutions=max_solutions)
+    covers = []
+    frontier = []
+    try:
+        while True:
+            status = solver.search(max_nodes=node_budget - solver.number_of_nodes)
+            if status == "done":
+                break
+            if status == "paused":
+                frontier = [prefix + suffix for suffix in solver.abort_with_frontier()]
+                break
+            solver.number_of_solutions += 1
+            if not count_only:
+                covers.append(prefix_names + solver.build_cover()[0])
+            if max_solutions is not None and solver.number_of_solutions >= max_solutions:
+                break
+    finally:
+        solver.abort()
+        for row_number in reversed(prefix):
+            problem.unselect_row(row_number)
+    return covers, solver.number_of_solutions, frontier
+
+
 if __name__ == '__main__':
     columns = 7
     rows = [
@@ -83,12 +686,41 @@ if __name__ == '__main__':
             {"row_name": "6" , "row_value" : [3, 4, 6]},
             ]
 
-    dlx = DLXMatrix(columns)
-    for row in rows:
-        dlx.add_sparse_row(row)
-    print(dlx)
-    solver = ExactCoverSolver(dlx)
-    list_rows, full_solution = solver.algorithmX()
-    for a, v in full_solution.items():
-        print(a, v)
-    print(list_rows)
+    for backend in DLX_BACKENDS:
+        dlx = create_dlx_matrix(columns, backend)
+        for row in rows:
+            dlx.add_sparse_row(row)
+        print(dlx)
+        solver = ExactCoverSolver(dlx)
+        list_rows, full_solution = solver.algorithmX()
+        for a, v in full_solution.items():
+            print(a, v)
+        print(list_rows)
+
+        for list_rows, cover in ExactCoverSolver(dlx).iter_solutions():
+            print(list_rows, cover)
+
+        solver = ExactCoverSolver(dlx, stats = SearchStatistics(branching_histogram = True))
+        solver.algorithmX()
+        print(solver.stats, solver.stats.branching_histogram)
+
+        #Pause after each node, save a checkpoint and resume on a new solver
+        solver = ExactCoverSolver(dlx)
+        print(solver.search(max_nodes = 1))
+        checkpoint = solver.get_checkpoint()
+        solver.abort()
+        solver = ExactCoverSolver(dlx)
+        solver.restore_checkpoint(checkpoint)
+        while solver.search(max_nodes = 1) == "paused":
+            continue
+        print(solver.build_cover())
+        solver.abort()
+
+        print(ExactCoverSolver(dlx).count_solutions(), ExactCoverSolver(dlx).count_solutions(memoize = True))
+
+        #Same rows, column 0 can now be covered by up to two rows and column 6 is secondary
+        dlx = create_dlx_matrix(6, backend, secondary_columns = [6], multiplicities = {0 : (1, 2)})
+        for row in rows:
+            dlx.add_sparse_row(row)
+        for list_rows, cover in ExactCoverSolver(dlx).iter_solutions():
+            print(list_rows, cover)
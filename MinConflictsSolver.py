@@ -0,0 +1,108 @@
+import random
+from CSP import *
+
+class MinConflictsSolver:
+    """
+        Min-conflicts local search for a CSP instance
+        We start from a complete assignment and, at each step, pick a random conflicted variable
+        and give it the value with the fewest conflicts (ties are broken at random)
+        Conflicts are tracked incrementally by the CSP's conflict model (see CSP.get_conflict_model)
+        Options :
+            max_steps : step budget, the search gives up after that many steps
+            tabu_tenure : a variable cannot go back to a value it left during the next tabu_tenure steps
+                          (unless that value removes all its conflicts)
+            random_walk : probability of giving a random value instead of the best one
+            max_candidates : number of values sampled by the conflict model when looking for the best value
+                             (None means that the whole domain is scanned), useful for huge domains
+    """
+    def __init__(self, csp, max_steps = 100000, tabu_tenure = 0, random_walk = 0.0, max_candidates = None, seed = None):
+        self.csp = csp
+        self.max_steps = max_steps
+        self.tabu_tenure = tabu_tenure
+        self.random_walk = random_walk
+        self.max_candidates = max_candidates
+        self.rng = random.Random(seed)
+        self.assignment = None
+        self.model = None
+        self.number_of_steps = 0
+
+    def select_value(self, X, step, tabu):
+        """
+            Returns the value of X with the fewest conflicts that is not tabu
+        """
+        model = self.model
+        values = model.values(X)
+        if self.random_walk and self.rng.random() < self.random_walk:
+            return self.rng.choice(values)
+        if self.max_candidates is not None and len(values) > self.max_candidates:
+            values = model.sample_values(X, self.rng, self.max_candidates)
+        best_values, best_conflicts = [], None
+        for x in values:
+            conflicts = model.conflicts(X, x)
+            if conflicts and tabu.get((X, x), -1) >= step:
+                continue
+            if best_conflicts is None or conflicts < best_conflicts:
+                best_values, best_conflicts = [x], conflicts
+            elif conflicts == best_conflicts:
+                best_values.append(x)
+        if not best_values:
+            return self.assignment[X]
+        return self.rng.choice(best_values)
+
+    def solve(self):
+        """
+            Runs the local search, returns the assignment {variable : value} when it has no conflict
+            and None if the step budget is exhausted
+        """
+        self.assignment = self.csp.get_initial_assignment(self.rng)
+        self.model = model = self.csp.get_conflict_model(self.assignment)
+
+        #Conflicted variables are kept in a list with their positions so that we can pick and remove one in O(1)
+        #The list may contain variables whose conflicts have been fixed, they are removed when picked
+        candidates = []
+        positions = {}
+
+        def add_candidate(X):
+            if X not in positions:
+                positions[X] = len(candidates)
+                candidates.append(X)
+
+        def remove_candidate(X):
+            position = positions.pop(X)
+            last = candidates.pop()
+            if last != X:
+                candidates[position] = last
+                positions[last] = position
+
+        for X in model.conflicted_variables():
+            add_candidate(X)
+
+        tabu = {}
+        step = 0
+        while step < self.max_steps:
+            if not candidates:
+                #Every candidate has been fixed, double check before declaring victory
+                for X in model.conflicted_variables():
+                    add_candidate(X)
+                if not candidates:
+                    break
+            X = candidates[self.rng.randrange(len(candidates))]
+            if model.variable_conflicts(X) == 0:
+                remove_candidate(X)
+                continue
+            step += 1
+            x = self.select_value(X, step, tabu)
+            old_x = self.assignment[X]
+            if x == old_x:
+                continue
+            for Y in model.move(X, x):
+                add_candidate(Y)
+            if self.tabu_tenure:
+                tabu[(X, old_x)] = step + self.tabu_tenure
+            if model.variable_conflicts(X) == 0:
+                remove_candidate(X)
+
+        self.number_of_steps = step
+        if model.total_conflicts() == 0:
+            return self.assignment
+        return None
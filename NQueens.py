@@ -0,0 +1,150 @@
+from array import array
+from CSP import CSP
+
+class NQueensNeighbors:
+    """
+        Every queen is a neighbor of every other queen, the neighbors are generated on demand
+        instead of storing n * (n - 1) pairs
+    """
+    def __init__(self, n):
+        self.n = n
+
+    def __getitem__(self, X):
+        return (Y for Y in range(self.n) if Y != X)
+
+class NQueensDomains(dict):
+    """
+        Domains are created the first time they are accessed
+    """
+    def __init__(self, n):
+        super().__init__()
+        self.n = n
+
+    def __missing__(self, X):
+        self[X] = domain = list(range(self.n))
+        return domain
+
+class NQueensCSP(CSP):
+    """
+        N-Queens as a CSP : variable X is the queen of column X and its value is its row
+        Two queens conflict if they share a row or a diagonal
+    """
+    def __init__(self, n):
+        super().__init__()
+        self.n = n
+        self.variables = list(range(n))
+        self.domains = NQueensDomains(n)
+        self.neighbors = NQueensNeighbors(n)
+        self.constraints = lambda X, x, Y, y : x != y and abs(x - y) != abs(X - Y)
+
+    def get_initial_assignment(self, rng):
+        """
+            Greedy start : queens get distinct rows (a random permutation) and each queen
+            tries a few of the remaining rows looking for one with free diagonals
+        """
+        n = self.n
+        rows = list(range(n))
+        rng.shuffle(rows)
+        diagonals = array('i', [0]) * (2 * n)
+        anti_diagonals = array('i', [0]) * (2 * n)
+        for X in range(n):
+            for _ in range(min(n - X, 20)):
+                k = rng.randrange(X, n)
+                x = rows[k]
+                if not diagonals[x + X] and not anti_diagonals[x - X + n]:
+                    rows[X], rows[k] = rows[k], rows[X]
+                    break
+            x = rows[X]
+            diagonals[x + X] += 1
+            anti_diagonals[x - X + n] += 1
+        return dict(enumerate(rows))
+
+    def get_conflict_model(self, assignment):
+        return NQueensConflictModel(self.n, assignment)
+
+class NQueensConflictModel:
+    """
+        Conflict model of N-Queens : we count the queens on each row and diagonal so that
+        the conflicts of a queen are computed in O(1)
+        Each line also keeps the xor of the queens on it, which gives the queen of a line that has only one
+        Rows without queen are kept in a set, they are always part of the sampled values
+    """
+    def __init__(self, n, assignment):
+        self.n = n
+        self.assignment = assignment
+        self.rows = range(n)
+        self.counts = [array('i', [0]) * (2 * n) for _ in range(3)]
+        self.xors = [array('i', [0]) * (2 * n) for _ in range(3)]
+        self.pairs = 0
+        for X in range(n):
+            self.add(X, assignment[X])
+        self.empty_rows = {x for x in range(n) if self.counts[0][x] == 0}
+
+    def lines(self, X, x):
+        return (x, x + X, x - X + self.n)
+
+    def add(self, X, x):
+        """
+            Puts queen X on row x and returns the queens that were alone on the lines X joins
+        """
+        alone = []
+        for counts, xors, line in zip(self.counts, self.xors, self.lines(X, x)):
+            if counts[line] == 1:
+                alone.append(xors[line])
+            self.pairs += counts[line]
+            counts[line] += 1
+            xors[line] ^= X
+        return alone
+
+    def remove(self, X, x):
+        """
+            Removes queen X from row x
+        """
+        for counts, xors, line in zip(self.counts, self.xors, self.lines(X, x)):
+            counts[line] -= 1
+            self.pairs -= counts[line]
+            xors[line] ^= X
+
+    def values(self, X):
+        return self.rows
+
+    def sample_values(self, X, rng, number_of_values):
+        values = [rng.randrange(self.n) for _ in range(number_of_values)]
+        values.extend(self.empty_rows)
+        return values
+
+    def conflicts(self, X, x):
+        rows, diagonals, anti_diagonals = self.counts
+        result = rows[x] + diagonals[x + X] + anti_diagonals[x - X + self.n]
+        if self.assignment[X] == x:
+            result -= 3
+        return result
+
+    def variable_conflicts(self, X):
+        return self.conflicts(X, self.assignment[X])
+
+    def total_conflicts(self):
+        return self.pairs
+
+    def conflicted_variables(self):
+        return [X for X in range(self.n) if self.variable_conflicts(X) > 0]
+
+    def move(self, X, x):
+        old_x = self.assignment[X]
+        self.remove(X, old_x)
+        if self.counts[0][old_x] == 0:
+            self.empty_rows.add(old_x)
+        self.empty_rows.discard(x)
+        self.assignment[X] = x
+        return self.add(X, x)
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    from MinConflictsSolver import MinConflictsSolver
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    curr_time = time.time()
+    solver = MinConflictsSolver(NQueensCSP(n), max_candidates = 100, seed = 0)
+    solution = solver.solve()
+    print("{}-Queens : solved {} in {} steps, {:.2f}s".format(n, solution is not None, solver.number_of_steps, time.time() - curr_time))
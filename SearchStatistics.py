@@ -0,0 +1,116 @@
+import time
+
+class SearchStatistics:
+    """
+        Counters of an exact cover search
+            nodes : number of search nodes (a column has been selected or a solution has been reached)
+            solutions : number of solutions found
+            cover_calls, uncover_calls : number of cover / uncover of a column
+            updates : number of cells removed from their column by cover (Knuth's updates)
+            max_depth : deepest level reached
+            select_column_time : seconds spent selecting columns
+            branching_histogram : optional {depth : {branching factor : number of nodes}}
+        Matrices are only instrumented while a solver uses them (see instrument / release)
+        so nothing is counted, and nothing is paid, when statistics are disabled
+    """
+    counters = ["nodes", "solutions", "cover_calls", "uncover_calls", "updates", "max_depth", "select_column_time"]
+
+    def __init__(self, branching_histogram = False):
+        self.nodes = 0
+        self.solutions = 0
+        self.cover_calls = 0
+        self.uncover_calls = 0
+        self.updates = 0
+        self.max_depth = 0
+        self.select_column_time = 0.0
+        self.branching_histogram = {} if branching_histogram else None
+
+    def record_node(self, depth, branching_factor):
+        """
+            Records a search node at depth where the selected column has branching_factor rows
+        """
+        self.nodes += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+        if self.branching_histogram is not None:
+            depth_histogram = self.branching_histogram.setdefault(depth, {})
+            depth_histogram[branching_factor] = depth_histogram.get(branching_factor, 0) + 1
+
+    def record_solution(self, depth):
+        """
+            Records a solution found at depth
+        """
+        self.nodes += 1
+        self.solutions += 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def instrument(self, dlx_matrix):
+        """
+            Replaces the cover and uncover methods of the matrix instance by counting versions
+        """
+        cover = dlx_matrix.cover
+        uncover = dlx_matrix.uncover
+
+        def counted_cover(column):
+            column = dlx_matrix.get_column(column)
+            self.cover_calls += 1
+            for cell in dlx_matrix.iterate_column(column):
+                for _ in dlx_matrix.iterate_cells(cell, 'R'):
+                    self.updates += 1
+            cover(column)
+
+        def counted_uncover(column):
+            self.uncover_calls += 1
+            uncover(column)
+
+        dlx_matrix.cover = counted_cover
+        dlx_matrix.uncover = counted_uncover
+
+    def release(self, dlx_matrix):
+        """
+            Gives the matrix its original cover and uncover methods back
+        """
+        dlx_matrix.__dict__.pop("cover", None)
+        dlx_matrix.__dict__.pop("uncover", None)
+
+    def timed_select_column(self, select_column):
+        """
+            Returns a version of select_column that accumulates its running time
+        """
+        def timed():
+            start = time.perf_counter()
+            column = select_column()
+            self.select_column_time += time.perf_counter() - start
+            return column
+        return timed
+
+    def merge(self, other):
+        """
+            Adds the counters of other (a SearchStatistics or its as_dict) to this one
+        """
+        if isinstance(other, SearchStatistics):
+            other = other.as_dict()
+        for counter in SearchStatistics.counters:
+            if counter == "max_depth":
+                self.max_depth = max(self.max_depth, other[counter])
+            else:
+                setattr(self, counter, getattr(self, counter) + other[counter])
+        if self.branching_histogram is not None and other.get("branching_histogram"):
+            for depth, depth_histogram in other["branching_histogram"].items():
+                own_histogram = self.branching_histogram.setdefault(depth, {})
+                for branching_factor, count in depth_histogram.items():
+                    own_histogram[branching_factor] = own_histogram.get(branching_factor, 0) + count
+        return self
+
+    def as_dict(self):
+        """
+            Returns the counters as a dictionary (compact enough to be sent back by worker processes)
+        """
+        result = {counter : getattr(self, counter) for counter in SearchStatistics.counters}
+        if self.branching_histogram is not None:
+            result["branching_histogram"] = self.branching_histogram
+        return result
+
+    def __str__(self):
+        return ", ".join("{} {}".format(counter, getattr(self, counter)) for counter in SearchStatistics.counters)
@@ -1,10 +1,129 @@
 import math
+
+#Translation tables between dense digit text and cell values ('.' is accepted for empty cells)
+DENSE_TEXT_TO_VALUES = bytes.maketrans(b"0123456789.", bytes(range(10)) + b"\x00")
+VALUES_TO_DENSE_TEXT = bytes.maketrans(bytes(range(10)), b"0123456789")
+
+class SudokuRow:
+    """
+        View of one row of a Sudoku grid that reads from and writes through to the cells of the Sudoku
+        (it compares equal to and prints like the list of its values)
+    """
+    __slots__ = ("sudoku", "row")
+
+    def __init__(self, sudoku, row):
+        self.sudoku = sudoku
+        self.row = row
+
+    def __len__(self):
+        return self.sudoku.grid_size
+
+    def get_position(self, col):
+        """
+            Returns the position in the cells of column col of the row (negative columns count from the end)
+        """
+        N = self.sudoku.grid_size
+        if col < 0:
+            col += N
+        if not 0 <= col < N:
+            raise IndexError("Column {} out of range".format(col))
+        return self.row * N + col
+
+    def __getitem__(self, col):
+        if isinstance(col, slice):
+            return list(self)[col]
+        return self.sudoku.cells[self.get_position(col)]
+
+    def __setitem__(self, col, value):
+        if isinstance(col, slice):
+            values = list(self)
+            values[col] = value
+            if len(values) != len(self):
+                raise ValueError("A row of the grid cannot change size")
+            N = self.sudoku.grid_size
+            self.sudoku.cells[self.row * N : self.row * N + N] = bytes(values)
+            return
+        self.sudoku.cells[self.get_position(col)] = value
+
+    def __iter__(self):
+        N = self.sudoku.grid_size
+        return iter(self.sudoku.cells[self.row * N : self.row * N + N])
+
+    def __eq__(self, other):
+        try:
+            return list(self) == list(other)
+        except TypeError:
+            return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(list(self))
+
 class Sudoku:
-    def __init__(self, sudoku_size, sudoku_grid = None):
+    """
+        A Sudoku grid stored row by row in a flat bytearray (0 means empty cell)
+        so values up to 255 can be stored
+        Boxes are box_shape = (rows, columns) rectangles, by default the most square shape
+        that divides the grid size (3x3 for 9x9, 2x3 for 6x6, 3x4 for 12x12)
+    """
+    __slots__ = ("grid_size", "box_shape", "cells", "box_of_cell", "box_cells")
+
+    #Box lookup tables indexed by (grid size, box shape) : (box id of each cell, list of (row, col) positions of each box)
+    box_tables = {}
+
+    def __init__(self, sudoku_size, sudoku_grid = None, box_shape = None):
         self.grid_size = sudoku_size
-        self.grid = [[0 for i in range(self.grid_size)] for j in range(self.grid_size)]
-        if sudoku_grid:
-            self.grid = sudoku_grid
+        self.box_shape = box_shape = box_shape or Sudoku.get_default_box_shape(sudoku_size)
+        if sudoku_grid is None:
+            self.cells = bytearray(sudoku_size * sudoku_size)
+        elif isinstance(sudoku_grid, (bytes, bytearray)):
+            self.cells = bytearray(sudoku_grid)
+        else:
+            self.cells = bytearray(value for row in sudoku_grid for value in row)
+        self.box_of_cell, self.box_cells = Sudoku.get_box_tables(sudoku_size, box_shape)
+
+    @staticmethod
+    def get_default_box_shape(sudoku_size):
+        """
+            Returns the (rows, columns) box shape with the most rows not above sqrt(sudoku_size) that divides sudoku_size
+        """
+        box_rows = int(math.sqrt(sudoku_size))
+        while sudoku_size % box_rows:
+            box_rows -= 1
+        return (box_rows, sudoku_size // box_rows)
+
+    @staticmethod
+    def get_box_tables(sudoku_size, box_shape = None):
+        """
+            Returns the box lookup tables of a grid size and box shape, they are computed once per size and shape
+        """
+        box_shape = box_shape or Sudoku.get_default_box_shape(sudoku_size)
+        key = (sudoku_size, box_shape)
+        if key not in Sudoku.box_tables:
+            box_rows, box_columns = box_shape
+            if box_rows * box_columns != sudoku_size:
+                raise ValueError("{}x{} boxes do not fit a {}x{} grid".format(box_rows, box_columns, sudoku_size, sudoku_size))
+            #Boxes are numbered row by row, there are box_columns boxes on top of each other and box_rows side by side
+            boxes_per_row = sudoku_size // box_columns
+            box_of_cell = [(row // box_rows) * boxes_per_row + col // box_columns for row in range(sudoku_size) for col in range(sudoku_size)]
+            box_cells = [[] for _ in range(sudoku_size)]
+            for position, box_id in enumerate(box_of_cell):
+                box_cells[box_id].append(divmod(position, sudoku_size))
+            Sudoku.box_tables[key] = (box_of_cell, box_cells)
+        return Sudoku.box_tables[key]
+
+    @property
+    def grid(self):
+        """
+            The grid as a list of rows, each row is a view of the cells (see SudokuRow) so sudoku.grid[R][C] = V
+            sets a value, use list(row) for a detached copy of a row
+        """
+        return [SudokuRow(self, row) for row in range(self.grid_size)]
+
+    @grid.setter
+    def grid(self, sudoku_grid):
+        self.cells = bytearray(value for row in sudoku_grid for value in row)
 
     def get_columns(self):
         """
@@ -40,42 +159,85 @@ class Sudoku:
         """
             Returns value at position (row, col)
         """
-        return self.grid[row][col]
+        return self.cells[row * self.grid_size + col]
 
     def set_value(self, row, col, value):
         """
             Set the value in position (row, col)
         """
-        self.grid[row][col] = value
+        self.cells[row * self.grid_size + col] = value
 
     def iterate_box_cells(self, box_id):
         """
             Returns list of (row, col) position of box id
         """
-        n = int(math.sqrt(self.grid_size))
-        r, c = box_id // n, box_id % n
-        row, col = r * n, c * n
-        for r in range(row, row + n):
-            for c in range(col, col + n):
-                yield (r, c)
+        return iter(self.box_cells[box_id])
 
     def get_box_id(self, row, col):
         """
             Returns box id (row, col) position
         """
-        n = int(math.sqrt(self.grid_size))
-        r = row // n
-        c = col // n
-        return r * n + c
+        return self.box_of_cell[row * self.grid_size + col]
+
+    def copy(self):
+        """
+            Returns a copy of the Sudoku (only the cells are copied, the lookup tables are shared)
+        """
+        return Sudoku(self.grid_size, self.cells, self.box_shape)
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __eq__(self, other):
+        return isinstance(other, Sudoku) and self.grid_size == other.grid_size and self.box_shape == other.box_shape and self.cells == other.cells
+
+    def __hash__(self):
+        #The cells are mutable : a Sudoku must not be changed while it is a key of a dictionary or in a set
+        return hash((self.grid_size, self.box_shape, bytes(self.cells)))
 
     def __str__(self):
         """
             Return a string representation of the Sudoku grid
         """
-        result = ""
-        for row in self.grid:
-            result = result + str(row) + "\n"
-        return result
+        return "".join(str(row) + "\n" for row in self.grid)
+
+    def to_dense_text(self):
+        """
+            Returns the grid as a string of N * N digits (the format of the Kaggle dataset), only for values up to 9
+        """
+        return self.cells.translate(VALUES_TO_DENSE_TEXT).decode("ascii")
+
+    def to_text(self):
+        """
+            Returns the grid as a string of integers separated by '_'
+        """
+        return "_".join(map(str, self.cells))
+
+    def to_compact_text(self):
+        """
+            Returns the dense text when all values fit in one digit and the '_' separated text otherwise
+        """
+        if self.grid_size <= 9:
+            return self.to_dense_text()
+        return self.to_text()
+
+    @staticmethod
+    def from_dense_text(text, box_shape = None):
+        """
+            Builds a Sudoku from a string of N * N digits ('0' or '.' for empty cells)
+        """
+        cells = text.encode("ascii").translate(DENSE_TEXT_TO_VALUES)
+        return Sudoku(int(math.sqrt(len(cells))), cells, box_shape)
+
+    @staticmethod
+    def from_text(text, box_shape = None):
+        """
+            Builds a Sudoku from either the '_' separated text or the dense digit text
+        """
+        if "_" not in text:
+            return Sudoku.from_dense_text(text, box_shape)
+        cells = bytearray(map(int, text.split("_")))
+        return Sudoku(int(math.sqrt(len(cells))), cells, box_shape)
 
     @staticmethod
     def get_grid_from_text(text):
@@ -92,13 +254,32 @@ class Sudoku:
         """
             Static helper method that takes a grid and returns a corresponding string of integers separated by '_'
         """
-        result = ""
-        for row in grid:
-            char_row = list(map(lambda x : str(x), row))
-            result = result + "_".join(char_row) + "_"
-        return result[:-1]
+        return "_".join("_".join(map(str, row)) for row in grid)
+
+    @staticmethod
+    def get_grid_from_dense_text(text):
+        """
+            Static helper method that takes a string of N * N digits (the format of the Kaggle dataset) and returns the Sudoku grid
+            Only grids with values up to 9 can be written this way
+        """
+        N = int(math.sqrt(len(text)))
+        grid = [list(map(int, text[i : i + N])) for i in range(0, len(text), N)]
+        return N, grid
+
+    @staticmethod
+    def get_dense_text_from_grid(grid):
+        """
+            Static helper method that takes a grid and returns the corresponding string of digits
+        """
+        return "".join("".join(map(str, row)) for row in grid)
 
 if __name__ == '__main__':
     grid = [[1, 25], [12, 2]]
     print(Sudoku.get_text_from_grid(grid))
     print(Sudoku.get_grid_from_text(Sudoku.get_text_from_grid(grid)))
+    grid = [[1, 2, 3, 4], [3, 4, 1, 2], [2, 1, 4, 3], [4, 3, 2, 1]]
+    print(Sudoku.get_dense_text_from_grid(grid))
+    print(Sudoku.get_grid_from_dense_text(Sudoku.get_dense_text_from_grid(grid)))
+    sudoku = Sudoku.from_text("1.34341221434321")
+    print(sudoku)
+    print(sudoku.to_dense_text(), sudoku.to_text())
@@ -0,0 +1,224 @@
+from Sudoku import Sudoku
+
+class SudokuBitmaskSolver:
+    """
+        Solves a Sudoku directly on its grid using candidate bitmasks
+        Bit v - 1 of a mask stands for value v. For each row, column and box we keep the mask of the values
+        already placed in it, the candidates of a cell are the values that are in none of its three masks
+        The search alternates constraint propagation (naked and hidden singles) and branching on the
+        empty cell with the fewest candidates (MRV)
+    """
+    #Lookup tables indexed by (grid size, box shape)
+    tables = {}
+
+    def __init__(self, sudoku_config):
+        self.sudoku_config = sudoku_config
+        self.grid_size = N = sudoku_config.get_grid_size()
+        self.full_mask = (1 << N) - 1
+        self.row_of, self.column_of, self.box_of, self.units = SudokuBitmaskSolver.get_tables(sudoku_config)
+
+        #Flat grid (0 means empty) and masks of placed values
+        self.cells = list(sudoku_config.cells)
+        self.row_masks = [0] * N
+        self.column_masks = [0] * N
+        self.box_masks = [0] * N
+        #Cells that have been assigned during the search, in order, to undo assignments when backtracking
+        self.trail = []
+        self.consistent = True
+        for cell, value in enumerate(self.cells):
+            if value == 0:
+                continue
+            bit = 1 << (value - 1)
+            if not self.get_candidates(cell) & bit:
+                self.consistent = False
+            self.place(cell, bit)
+        self.trail = []
+
+    @staticmethod
+    def get_tables(sudoku_config):
+        """
+            Returns (row of cell, column of cell, box of cell, list of units) for the grid size and box shape of sudoku_config
+            where a unit is the list of cells of a row, a column or a box
+        """
+        N = sudoku_config.get_grid_size()
+        key = (N, sudoku_config.box_shape)
+        if key not in SudokuBitmaskSolver.tables:
+            row_of = [cell // N for cell in range(N * N)]
+            column_of = [cell % N for cell in range(N * N)]
+            box_of = list(sudoku_config.box_of_cell)
+            units = [[R * N + C for C in range(N)] for R in range(N)]
+            units += [[R * N + C for R in range(N)] for C in range(N)]
+            units += [[R * N + C for (R, C) in sudoku_config.iterate_box_cells(box)] for box in range(N)]
+            SudokuBitmaskSolver.tables[key] = (row_of, column_of, box_of, units)
+        return SudokuBitmaskSolver.tables[key]
+
+    def get_candidates(self, cell):
+        """
+            Returns the mask of values that can still be placed in an empty cell
+        """
+        return self.full_mask & ~(self.row_masks[self.row_of[cell]] | self.column_masks[self.column_of[cell]] | self.box_masks[self.box_of[cell]])
+
+    def place(self, cell, bit):
+        """
+            Places the value of 'bit' in cell and records it in the trail
+        """
+        self.cells[cell] = bit.bit_length()
+        self.row_masks[self.row_of[cell]] |= bit
+        self.column_masks[self.column_of[cell]] |= bit
+        self.box_masks[self.box_of[cell]] |= bit
+        self.trail.append(cell)
+
+    def undo(self, trail_length):
+        """
+            Removes the values placed after the trail had trail_length cells
+        """
+        while len(self.trail) > trail_length:
+            cell = self.trail.pop()
+            bit = ~(1 << (self.cells[cell] - 1))
+            self.cells[cell] = 0
+            self.row_masks[self.row_of[cell]] &= bit
+            self.column_masks[self.column_of[cell]] &= bit
+            self.box_masks[self.box_of[cell]] &= bit
+
+    def propagate(self):
+        """
+            Places naked singles (cells with one candidate) and hidden singles (values with one possible cell in a unit)
+            until nothing changes
+            Returns the empty cell with the fewest candidates, -1 if the grid is full and None on a contradiction
+            (get_candidates is inlined, this is the inner loop of the search)
+        """
+        cells = self.cells
+        row_masks, column_masks, box_masks = self.row_masks, self.column_masks, self.box_masks
+        row_of, column_of, box_of = self.row_of, self.column_of, self.box_of
+        full_mask = self.full_mask
+        #Candidates of the empty cells computed by the naked singles pass
+        candidates_of = [0] * len(cells)
+        changed = True
+        while changed:
+            changed = False
+            best_cell, best_count = -1, self.grid_size + 1
+            #Naked singles
+            for cell in range(len(cells)):
+                if cells[cell]:
+                    continue
+                candidates = full_mask & ~(row_masks[row_of[cell]] | column_masks[column_of[cell]] | box_masks[box_of[cell]])
+                if candidates == 0:
+                    return None
+                if candidates & (candidates - 1) == 0:
+                    self.place(cell, candidates)
+                    changed = True
+                    continue
+                candidates_of[cell] = candidates
+                count = candidates.bit_count()
+                if count < best_count:
+                    best_cell, best_count = cell, count
+            if changed:
+                continue
+            #Hidden singles, the candidates of the naked singles pass are only a superset of the actual ones once a hidden single
+            #has been placed : placing checks the actual candidates and a contradiction left unseen is found by the next pass
+            for unit in self.units:
+                once = twice = placed = 0
+                for cell in unit:
+                    if cells[cell]:
+                        placed |= 1 << (cells[cell] - 1)
+                        continue
+                    candidates = candidates_of[cell]
+                    twice |= once & candidates
+                    once |= candidates
+                if once | placed != full_mask:
+                    return None
+                hidden = once & ~twice
+                if hidden == 0:
+                    continue
+                for cell in unit:
+                    if cells[cell] == 0:
+                        bit = self.get_candidates(cell) & hidden
+                        if bit == 0:
+                            continue
+                        if bit & (bit - 1):
+                            #Two values can only go in this cell
+                            return None
+                        self.place(cell, bit)
+                        changed = True
+        return best_cell
+
+    def search(self):
+        """
+            Propagates then branches on the MRV cell, returns True when the grid is solved
+        """
+        trail_length = len(self.trail)
+        cell = self.propagate()
+        if cell == -1:
+            return True
+        if cell is not None:
+            candidates = self.get_candidates(cell)
+            while candidates:
+                bit = candidates & -candidates
+                candidates ^= bit
+                branch_length = len(self.trail)
+                self.place(cell, bit)
+                if self.search():
+                    return True
+                self.undo(branch_length)
+        self.undo(trail_length)
+        return False
+
+    def count_solutions(self, limit = None):
+        """
+            Counts the solutions (stopping at limit, None counts them all) with the propagation and branching of search,
+            the grid is left as it was. limit = 2 is enough to tell if the solution is unique
+            The number of search nodes and of guesses (nodes that branch on the MRV cell, every other value was a single)
+            end up in self.nodes and self.guesses
+        """
+        self.nodes = 0
+        self.guesses = 0
+        if not self.consistent:
+            return 0
+        return self.count_below(limit)
+
+    def count_below(self, limit):
+        """
+            Counts the solutions below the current node, see count_solutions
+        """
+        self.nodes += 1
+        trail_length = len(self.trail)
+        cell = self.propagate()
+        count = 0
+        if cell == -1:
+            count = 1
+        elif cell is not None:
+            self.guesses += 1
+            candidates = self.get_candidates(cell)
+            while candidates and (limit is None or count < limit):
+                bit = candidates & -candidates
+                candidates ^= bit
+                branch_length = len(self.trail)
+                self.place(cell, bit)
+                count += self.count_below(None if limit is None else limit - count)
+                self.undo(branch_length)
+        self.undo(trail_length)
+        return count
+
+    def set_clue(self, cell, value):
+        """
+            Replaces the value of a cell of the puzzle by value (0 empties the cell) between two searches,
+            the clues have to stay consistent
+        """
+        if self.cells[cell]:
+            bit = ~(1 << (self.cells[cell] - 1))
+            self.cells[cell] = 0
+            self.row_masks[self.row_of[cell]] &= bit
+            self.column_masks[self.column_of[cell]] &= bit
+            self.box_masks[self.box_of[cell]] &= bit
+        if value:
+            self.place(cell, 1 << (value - 1))
+            #A clue is not an assignment of the search, undo must not remove it
+            self.trail.pop()
+
+    def solve(self):
+        """
+            Returns the solved Sudoku config (a copy of the puzzle if it has no solution)
+        """
+        if self.consistent and self.search():
+            return Sudoku(self.grid_size, bytearray(self.cells), self.sudoku_config.box_shape)
+        return self.sudoku_config.copy()
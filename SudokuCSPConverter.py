@@ -0,0 +1,54 @@
+from CSP import CSP
+
+class SudokuCSPConverter:
+    """
+        A class that contains methods that converts Sudoku instance to a CSP and a solved CSP back to Sudoku instance
+    """
+    #Neighbors of each cell indexed by (grid size, box shape)
+    neighbors = {}
+
+    @staticmethod
+    def get_neighbors(sudoku_config):
+        """
+            Returns a dictionary (R, C) -> list of cells that share a row, a column or a box with (R, C)
+        """
+        N = sudoku_config.get_grid_size()
+        key = (N, sudoku_config.box_shape)
+        if key not in SudokuCSPConverter.neighbors:
+            cell_neighbors = {}
+            for R in range(N):
+                for C in range(N):
+                    cells = {(R, c) for c in range(N)} | {(r, C) for r in range(N)}
+                    cells |= set(sudoku_config.iterate_box_cells(sudoku_config.get_box_id(R, C)))
+                    cells.discard((R, C))
+                    cell_neighbors[(R, C)] = sorted(cells)
+            SudokuCSPConverter.neighbors[key] = cell_neighbors
+        return SudokuCSPConverter.neighbors[key]
+
+    @staticmethod
+    def convert_sudoku_to_csp(sudoku_config):
+        """
+            Converts a Sudoku instance to a CSP
+            Each cell (R, C) is a variable whose domain is [1 .. N] (or the clue)
+            and two neighbor cells must have different values
+        """
+        N = sudoku_config.get_grid_size()
+        csp = CSP()
+        csp.variables = [(R, C) for R in range(N) for C in range(N)]
+        for (R, C) in csp.variables:
+            value = sudoku_config.get_value(R, C)
+            csp.domains[(R, C)] = [value] if value else list(range(1, N + 1))
+        csp.neighbors = SudokuCSPConverter.get_neighbors(sudoku_config)
+        csp.constraints = lambda X, x, Y, y : x != y
+        return csp
+
+    @staticmethod
+    def convert_csp_solution_to_sudoku(sudoku_config, csp):
+        """
+            This method takes as input the initial Sudoku instance and the solved CSP and returns the final Sudoku result
+        """
+        sudoku_result = sudoku_config.copy()
+        for (R, C) in csp.variables:
+            if csp.assigned((R, C)):
+                sudoku_result.set_value(R, C, csp.get((R, C)))
+        return sudoku_result
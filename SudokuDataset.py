@@ -0,0 +1,71 @@
+import itertools
+import random
+
+class SudokuDataset:
+    """
+        Streams the puzzles of a quizzes/solutions CSV file (the format of the Kaggle dataset)
+        without loading the whole file in memory
+        Puzzles and solutions are yielded as dense digit strings that SudokuSolver accepts directly
+    """
+    def __init__(self, file_path, chunk_size = 1 << 20):
+        """
+            chunk_size is the approximate number of bytes read from the file at a time
+        """
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+
+    def iterate_chunks(self):
+        """
+            Yields lists of (quiz, solution) pairs, one list per chunk of the file
+        """
+        with open(self.file_path) as csv_file:
+            header = csv_file.readline().strip().split(",")
+            quiz_index, solution_index = header.index("quizzes"), header.index("solutions")
+            while True:
+                lines = csv_file.readlines(self.chunk_size)
+                if not lines:
+                    return
+                chunk = []
+                for line in lines:
+                    fields = line.rstrip("\r\n").split(",")
+                    if len(fields) > 1:
+                        chunk.append((fields[quiz_index], fields[solution_index]))
+                yield chunk
+
+    def __iter__(self):
+        """
+            Yields all (quiz, solution) pairs of the file
+        """
+        for chunk in self.iterate_chunks():
+            yield from chunk
+
+    def iterate(self, offset = 0, limit = None):
+        """
+            Yields the (quiz, solution) pairs from position offset, at most limit of them (all of them if limit is None)
+        """
+        stop = None if limit is None else offset + limit
+        return itertools.islice(iter(self), offset, stop)
+
+    def sample(self, sample_size, seed = None):
+        """
+            Returns sample_size (quiz, solution) pairs drawn uniformly from the file in one pass (reservoir sampling)
+            The pairs are returned in file order
+        """
+        rng = random.Random(seed)
+        reservoir = []
+        for position, pair in enumerate(self):
+            if position < sample_size:
+                reservoir.append((position, pair))
+                continue
+            replaced = rng.randint(0, position)
+            if replaced < sample_size:
+                reservoir[replaced] = (position, pair)
+        reservoir.sort()
+        return [pair for _, pair in reservoir]
+
+
+if __name__ == '__main__':
+    import sys
+    dataset = SudokuDataset(sys.argv[1] if len(sys.argv) > 1 else "sudoku.csv")
+    for quiz, solution in dataset.iterate(limit = 3):
+        print(quiz, solution)
@@ -1,10 +1,39 @@
 import itertools
-from copy import deepcopy
-from DancingLinks import DLXMatrix
+from DancingLinks import create_dlx_matrix, DLX_BACKENDS
+from Sudoku import Sudoku
+from SudokuVariants import SudokuVariant
+
+class SudokuRowNames:
+    """
+        Row names R_C_V of a template matrix, computed from the row number when they are asked for
+        (the template row number of R_C_V is (R * N + C) * N + V, see SudokuExactCoverConverter.get_template_row_number)
+        followed by the names of the extra rows of the variant (see SudokuVariant)
+        The solvers work with row numbers, so solving a puzzle never formats a name
+    """
+    def __init__(self, sudoku_grid_size, extra_row_names = ()):
+        self.sudoku_grid_size = sudoku_grid_size
+        self.extra_row_names = extra_row_names
+
+    def __len__(self):
+        return self.sudoku_grid_size ** 3 + len(self.extra_row_names)
+
+    def __getitem__(self, row_number):
+        if not 0 <= row_number < len(self):
+            raise IndexError("Row number {} out of range".format(row_number))
+        if row_number >= self.sudoku_grid_size ** 3:
+            return self.extra_row_names[row_number - self.sudoku_grid_size ** 3]
+        position, V = divmod(row_number, self.sudoku_grid_size)
+        R, C = divmod(position, self.sudoku_grid_size)
+        return "{}_{}_{}".format(R, C, V)
+
 class SudokuExactCoverConverter:
     """
         A class that contains methods that converts Sudoku instance to DLX Matrix and ExactCover Solution back to Sudoku instance
+        The columns of the matrix come from a SudokuVariant (the standard variant of the grid size and box shape by default)
     """
+    #Template matrices of empty Sudoku grids indexed by (variant key, backend)
+    template_matrices = {}
+
     @staticmethod
     def get_constrains_rows(sudoku_config, sudoku_row, sudoku_column, sudoku_value):
         """
@@ -14,51 +43,151 @@ class SudokuExactCoverConverter:
             2- Each value appears exactly once in a row (second 81 columns correspond to this constraint)
             3- Each value appears exactly once in a column (third 81 columns correspond to this constraint)
             4- Each value appears exactly once in a box (fourth 81 columns correspond to this constraint)
+            The columns are looked up in the standard variant of the grid (see SudokuVariants)
         """
         sudoku_grid_size = sudoku_config.get_grid_size()
-
-        row_column_position = sudoku_row * sudoku_grid_size + sudoku_column
-
-        row_value_position = sudoku_row * sudoku_grid_size + sudoku_value + sudoku_grid_size * sudoku_grid_size
-
-        column_value_position = sudoku_column * sudoku_grid_size + sudoku_value + 2 * sudoku_grid_size * sudoku_grid_size
-
-        sudoku_box = sudoku_config.get_box_id(sudoku_row, sudoku_column)
-        box_value_position = sudoku_box * sudoku_grid_size + sudoku_value + 3 * sudoku_grid_size * sudoku_grid_size
-
-        result = [row_column_position, row_value_position, column_value_position, box_value_position]
-        return result
+        variant = SudokuVariant.standard(sudoku_grid_size, sudoku_config.box_shape)
+        return list(variant.row_columns[(sudoku_row * sudoku_grid_size + sudoku_column) * sudoku_grid_size + sudoku_value])
 
     @staticmethod
-    def convert_sudoku_to_exact_cover(sudoku_config):
+    def convert_sudoku_to_exact_cover(sudoku_config, backend = "cells", variant = None):
         """
         Converts a Sudoku instance to DLX Matrix and returns it
         Each row in DLX Matrix will correspond to setting cell (R, C) to value V (ranges from 0 to N - 1)
         And each row has name R_C_V
+        backend selects the DLX matrix representation (see DancingLinks.DLX_BACKENDS)
+        variant gives the columns of each row (see SudokuVariants), the candidates it excludes have no row
+        and its extra rows come after the cell rows
         """
         sudoku_grid_size = sudoku_config.get_grid_size()
-        number_of_constraints = 4 * sudoku_grid_size * sudoku_grid_size
+        variant = SudokuVariant.get_variant(sudoku_config, variant)
+        excluded_candidates = set(variant.excluded_candidates)
         list_sudoku_columns = sudoku_config.get_columns()
         list_sudoku_rows = sudoku_config.get_rows()
         list_sudoku_values = sudoku_config.get_values()
         cartesian_product_list = [list_sudoku_columns, list_sudoku_rows, list_sudoku_values]
 
-        dlx_matrix = DLXMatrix(number_of_constraints)
-        for (R, C, V) in itertools.product(*cartesian_product_list):
-            if sudoku_config.get_value(R, C) == 0 or sudoku_config.get_value(R, C) == V + 1:
-                row_constraints = SudokuExactCoverConverter.get_constrains_rows(sudoku_config, R, C, V)
-                row_constraints_dictionary = {"row_name" : "{}_{}_{}".format(R, C, V) , "row_value" : row_constraints}
+        dlx_matrix = create_dlx_matrix(variant.number_of_primary_columns, backend, variant.get_secondary_columns())
+        for row_number, (R, C, V) in enumerate(itertools.product(*cartesian_product_list)):
+            if (sudoku_config.get_value(R, C) == 0 or sudoku_config.get_value(R, C) == V + 1) and (R * sudoku_grid_size + C, V + 1) not in excluded_candidates:
+                row_constraints_dictionary = {"row_name" : "{}_{}_{}".format(R, C, V) , "row_value" : variant.row_columns[row_number]}
                 dlx_matrix.add_sparse_row(row_constraints_dictionary)
+        for row_name, row_columns in zip(variant.extra_row_names, variant.row_columns[sudoku_grid_size ** 3:]):
+            dlx_matrix.add_sparse_row({"row_name" : row_name, "row_value" : row_columns})
         return dlx_matrix
 
+    @staticmethod
+    def get_template_matrix(sudoku_grid_size, backend = "cells", variant = None):
+        """
+            Returns the DLX Matrix of an empty sudoku_grid_size x sudoku_grid_size Sudoku
+            The matrix is built once per (variant, backend) and shared by all the puzzles of that variant :
+            the clues of a puzzle are applied with cover_clues and removed with uncover_clues
+            variant defaults to the standard variant with the default box shape of the size
+            All the (R, C, V) rows are in the template so that row numbers stay (R * N + C) * N + V (the extra rows of the variant
+            come after them), the rows of the candidates that the variant excludes are hidden once and for all
+            Row names are only formatted on demand (see SudokuRowNames), solutions are decoded from the row numbers
+            (see convert_row_numbers_to_sudoku)
+        """
+        if variant is None:
+            variant = SudokuVariant.standard(sudoku_grid_size)
+        key = (variant.key, backend)
+        if key not in SudokuExactCoverConverter.template_matrices:
+            if backend not in DLX_BACKENDS:
+                raise ValueError("Unknown DLX backend {}, expected one of {}".format(backend, list(DLX_BACKENDS)))
+            dlx_matrix = DLX_BACKENDS[backend].from_csr(variant.indptr, variant.indices, SudokuRowNames(sudoku_grid_size, variant.extra_row_names),
+                                                        variant.number_of_primary_columns, variant.get_secondary_columns())
+            SudokuExactCoverConverter.hide_candidates(dlx_matrix, sudoku_grid_size, variant.excluded_candidates)
+            SudokuExactCoverConverter.template_matrices[key] = dlx_matrix
+        return SudokuExactCoverConverter.template_matrices[key]
+
+    @staticmethod
+    def get_template_row_number(sudoku_grid_size, sudoku_row, sudoku_column, sudoku_value):
+        """
+            Returns the row number of R_C_V in the template matrix
+        """
+        return (sudoku_row * sudoku_grid_size + sudoku_column) * sudoku_grid_size + sudoku_value
+
+    @staticmethod
+    def cover_clues(dlx_matrix, sudoku_config):
+        """
+            Selects the template rows of the clues of sudoku_config so that the matrix only contains the empty cells
+            Returns the list of selected row numbers, to be given back to uncover_clues once the puzzle is solved
+            If two clues contradict each other the matrix is restored and None is returned
+        """
+        sudoku_grid_size = sudoku_config.get_grid_size()
+        selected_rows = []
+        for position, value in enumerate(sudoku_config.cells):
+            if value == 0:
+                continue
+            #Template rows are ordered by cell position then value
+            row_number = position * sudoku_grid_size + value - 1
+            if not dlx_matrix.is_row_available(row_number):
+                SudokuExactCoverConverter.uncover_clues(dlx_matrix, selected_rows)
+                return None
+            dlx_matrix.select_row(row_number)
+            selected_rows.append(row_number)
+        return selected_rows
+
+    @staticmethod
+    def uncover_clues(dlx_matrix, selected_rows):
+        """
+            Restores the template matrix by unselecting the clue rows in the reverse order
+        """
+        for row_number in reversed(selected_rows):
+            dlx_matrix.unselect_row(row_number)
+
+    @staticmethod
+    def hide_candidates(dlx_matrix, sudoku_grid_size, eliminated_candidates):
+        """
+            Hides the template rows of the (position, value) pairs that propagation ruled out
+            (the rows of values that conflict with a clue are already gone once the clues are covered)
+            Returns the list of hidden row numbers, to be given back to unhide_candidates
+        """
+        hidden_rows = []
+        for position, value in eliminated_candidates:
+            row_number = position * sudoku_grid_size + value - 1
+            if dlx_matrix.is_row_available(row_number):
+                dlx_matrix.hide_row(dlx_matrix.row_heads[row_number])
+                hidden_rows.append(row_number)
+        return hidden_rows
+
+    @staticmethod
+    def unhide_candidates(dlx_matrix, hidden_rows):
+        """
+            Puts back the rows hidden by hide_candidates in the reverse order
+        """
+        for row_number in reversed(hidden_rows):
+            dlx_matrix.unhide_row(dlx_matrix.row_heads[row_number])
+
     @staticmethod
     def convert_exact_cover_solution_to_sudoku(sudoku_config, list_of_dlx_rows):
         """
             This method takes as input the initial Sudoku instance and the list of solution
             rows selected by the Exact Cover Solver and returns the final Sudoku result
         """
-        sudoku_result = deepcopy(sudoku_config)
+        sudoku_result = sudoku_config.copy()
         for dlx_row in list_of_dlx_rows:
+            if dlx_row.count('_') != 2:
+                #Extra row of the variant (killer cage value set), it sets no cell
+                continue
             row, col, val = list(map(int, dlx_row.split('_')))
             sudoku_result.set_value(row, col, val + 1)
         return sudoku_result
+
+    @staticmethod
+    def convert_row_numbers_to_sudoku(sudoku_config, row_numbers):
+        """
+            Same as convert_exact_cover_solution_to_sudoku for the row numbers of a template matrix solution
+            (see ExactCoverSolver.get_row_numbers) : row (R * N + C) * N + V puts V + 1 at position R * N + C,
+            the values are written straight into the cells of a copy of sudoku_config, the extra rows of the variant are skipped
+        """
+        sudoku_grid_size = sudoku_config.get_grid_size()
+        number_of_cell_rows = sudoku_grid_size ** 3
+        sudoku_result = sudoku_config.copy()
+        cells = sudoku_result.cells
+        for row_number in row_numbers:
+            if row_number >= number_of_cell_rows:
+                continue
+            position, value = divmod(row_number, sudoku_grid_size)
+            cells[position] = value + 1
+        return sudoku_result
@@ -0,0 +1,160 @@
+import multiprocessing
+import os
+import random
+from SudokuExactCoverConverter import *
+from ExactCoverSolver import *
+from Sudoku import *
+from SudokuBitmaskSolver import SudokuBitmaskSolver
+
+class SudokuGenerator:
+    """
+        Generates Sudoku puzzles that have a unique solution
+            1- A full grid is built by Algorithm X on an empty grid matrix whose rows are shuffled first
+            2- Clues are removed one by one in a random order, a clue stays if the puzzle without it has another solution
+            3- The puzzle is rated from the statistics of its search (see rate)
+        The generator owns its DLX matrix (the shuffled rows would change the shared templates' search order)
+        Steps 2 and 3 run on candidate bitmasks (SudokuBitmaskSolver) : a uniqueness probe is mostly propagation,
+        which costs far less than covering and uncovering the columns of a DLX search
+    """
+    #Difficulty labels by maximum number of guesses (search nodes with more than one row to try)
+    difficulty_levels = [(0, "easy"), (3, "medium"), (15, "hard")]
+
+    def __init__(self, sudoku_size = 9, backend = "array", seed = None):
+        """
+            seed makes the generated puzzles reproducible
+        """
+        self.sudoku_size = sudoku_size
+        self.backend = backend
+        self.rng = random.Random(seed)
+        self.dlx_matrix = SudokuExactCoverConverter.convert_sudoku_to_exact_cover(Sudoku(sudoku_size), backend)
+
+    def generate_full_grid(self):
+        """
+            Returns a random full grid (a solved Sudoku config)
+        """
+        self.dlx_matrix.shuffle_rows(self.rng)
+        list_of_dlx_rows, _ = ExactCoverSolver(self.dlx_matrix, first_only=True).algorithmX()
+        return SudokuExactCoverConverter.convert_exact_cover_solution_to_sudoku(Sudoku(self.sudoku_size), list_of_dlx_rows)
+
+    def remove_clues(self, solution, target_clues = None):
+        """
+            Removes clues of a full grid in a random order as long as the puzzle keeps a unique solution
+            (or until only target_clues clues are left) and returns the puzzle
+            The probes run on the candidate bitmasks of a single SudokuBitmaskSolver whose clues are removed
+            (and put back when they have to stay) in place, see has_other_solution
+        """
+        N = self.sudoku_size
+        positions = list(range(N * N))
+        self.rng.shuffle(positions)
+        puzzle = solution.copy()
+        solver = SudokuBitmaskSolver(puzzle)
+        number_of_clues = N * N
+        for position in positions:
+            if target_clues is not None and number_of_clues <= target_clues:
+                break
+            value = puzzle.cells[position]
+            solver.set_clue(position, 0)
+            if SudokuGenerator.has_other_solution(solver, position, value):
+                solver.set_clue(position, value)
+            else:
+                puzzle.cells[position] = 0
+                number_of_clues -= 1
+        return puzzle
+
+    @staticmethod
+    def has_other_solution(solver, position, value):
+        """
+            Returns True if the puzzle of solver, whose cell 'position' has just been emptied, has a solution
+            where that cell is not value (the puzzle without this clue is not unique)
+            If the other clues force value (a naked single) there is nothing to search, otherwise each other candidate
+            is placed and SudokuBitmaskSolver.search looks for a solution : propagation usually refutes it at once
+        """
+        trail_length = len(solver.trail)
+        candidates = solver.get_candidates(position) & ~(1 << (value - 1))
+        while candidates:
+            bit = candidates & -candidates
+            candidates ^= bit
+            solver.place(position, bit)
+            found = solver.search()
+            solver.undo(trail_length)
+            if found:
+                return True
+        return False
+
+    def rate(self, puzzle):
+        """
+            Rates a puzzle from the statistics of the search that proves its solution is unique
+            (SudokuBitmaskSolver.count_solutions up to 2), which does not depend on the generator's row order
+            Naked and hidden singles are placed by propagation, the nodes that branch on a cell are guesses
+            Returns a dictionary with the number of clues, nodes, guesses and a difficulty label
+        """
+        solver = SudokuBitmaskSolver(puzzle)
+        number_of_solutions = solver.count_solutions(limit=2)
+        guesses = solver.guesses
+        difficulty = next((label for max_guesses, label in SudokuGenerator.difficulty_levels if guesses <= max_guesses), "expert")
+        return {"clues" : sum(1 for value in puzzle.cells if value), "nodes" : solver.nodes, "guesses" : guesses,
+                "solutions" : number_of_solutions, "difficulty" : difficulty}
+
+    def generate(self, target_clues = None):
+        """
+            Returns a (puzzle, solution, rating) tuple
+        """
+        solution = self.generate_full_grid()
+        puzzle = self.remove_clues(solution, target_clues)
+        return puzzle, solution, self.rate(puzzle)
+
+    @staticmethod
+    def generate_many(count, workers = None, chunksize = 16, sudoku_size = 9, backend = "array", seed = None, target_clues = None):
+        """
+            Yields count (puzzle text, solution text, rating) tuples generated on a pool of worker processes
+            Each worker keeps its own generator, puzzle i is generated with a generator seeded with (seed, i)
+            so that the puzzles do not depend on the number of workers
+            workers defaults to the number of cores, with workers = 1 everything runs in the current process
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        initargs = (sudoku_size, backend, seed, target_clues)
+        if workers == 1:
+            init_generate_many_worker(*initargs)
+            for index in range(count):
+                yield generate_many_worker(index)
+            return
+
+        with multiprocessing.Pool(workers, initializer = init_generate_many_worker, initargs = initargs) as pool:
+            yield from pool.imap(generate_many_worker, range(count), chunksize)
+
+
+#State of the generate_many worker processes
+generate_many_generator = None
+generate_many_seed = None
+generate_many_target_clues = None
+
+def init_generate_many_worker(sudoku_size, backend, seed, target_clues):
+    """
+        Pool initializer : builds the generator (and its DLX matrix) once per worker
+    """
+    global generate_many_generator, generate_many_seed, generate_many_target_clues
+    generate_many_generator = SudokuGenerator(sudoku_size, backend)
+    generate_many_seed = seed
+    generate_many_target_clues = target_clues
+
+def generate_many_worker(index):
+    """
+        Pool task : generates puzzle number index and returns (puzzle text, solution text, rating)
+    """
+    if generate_many_seed is not None:
+        generate_many_generator.rng.seed("{}:{}".format(generate_many_seed, index))
+    puzzle, solution, rating = generate_many_generator.generate(generate_many_target_clues)
+    return puzzle.to_compact_text(), solution.to_compact_text(), rating
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    start = time.perf_counter()
+    for puzzle_text, solution_text, rating in SudokuGenerator.generate_many(count, seed = 0):
+        print(puzzle_text, rating)
+    elapsed = time.perf_counter() - start
+    print("{} puzzles in {:.2f} s ({:.1f} puzzles / s)".format(count, elapsed, count / elapsed))
@@ -0,0 +1,236 @@
+from Sudoku import Sudoku
+from SudokuVariants import SudokuVariant
+
+class SudokuPropagator:
+    """
+        Constraint propagation on the grid of a Sudoku, without any search
+        Each cell has a candidate bitmask (bit v - 1 stands for value v) and the following rules are applied until nothing changes :
+            1- Naked singles : a cell with one candidate gets that value
+            2- Hidden singles : a value with one possible cell in a row, column or box goes in that cell
+            3- Locked candidates : if the candidates for a value in a box all lie in one row (or column)
+               the value is removed from the rest of that row (pointing) and conversely, if the candidates for a value
+               in a row (or column) all lie in one box the value is removed from the rest of that box (claiming)
+        Most puzzles are solved by these rules alone, the others are left with fewer empty cells and candidates
+        The units, groups of different values and excluded candidates come from a SudokuVariant (the standard one by default) :
+        the same rules apply to diagonals, jigsaw regions (locked candidates on any two units sharing two cells or more)
+        and to the cells of killer cages (peers only, a cage does not contain every value)
+    """
+    #Lookup tables indexed by variant key : (peers of each cell, list of (intersection, unit rest, other unit rest) of the units that share cells)
+    tables = {}
+
+    def __init__(self, sudoku_config, variant = None):
+        self.sudoku_config = sudoku_config
+        self.grid_size = N = sudoku_config.get_grid_size()
+        self.full_mask = (1 << N) - 1
+        variant = SudokuVariant.get_variant(sudoku_config, variant)
+        self.units = variant.units
+        self.peers, self.intersections = SudokuPropagator.get_tables(variant)
+
+        self.cells = [0] * (N * N)
+        self.candidates = [self.full_mask] * (N * N)
+        self.consistent = True
+        for position, value in variant.excluded_candidates:
+            self.candidates[position] &= ~(1 << (value - 1))
+            if self.candidates[position] == 0:
+                #Every value of the cell is excluded (a killer cage sum that no set of values adds up to)
+                self.consistent = False
+        #Number of values placed by each rule and of candidates removed by locked candidates
+        self.naked_singles = 0
+        self.hidden_singles = 0
+        self.locked_candidates = 0
+        for cell, value in enumerate(sudoku_config.cells):
+            if value:
+                self.place(cell, value)
+
+    @staticmethod
+    def get_tables(variant):
+        """
+            Returns the peers of each cell (the other cells of its groups : row, column, box, ...)
+            and the unit intersections used by locked candidates
+        """
+        N = variant.grid_size
+        if variant.key not in SudokuPropagator.tables:
+            peers = [set() for _ in range(N * N)]
+            for group in variant.groups:
+                for cell in group:
+                    peers[cell].update(group)
+            peers = [sorted(cell_peers - {cell}) for cell, cell_peers in enumerate(peers)]
+
+            #Every pair of units sharing at least two cells (a unit and a single cell of another unit is a hidden single),
+            #for standard Sudoku each box with the rows and columns that cross it
+            intersections = []
+            unit_sets = [set(unit) for unit in variant.units]
+            for index, unit in enumerate(variant.units):
+                for other_unit, other_unit_set in zip(variant.units[:index], unit_sets[:index]):
+                    intersection = [cell for cell in other_unit if cell in unit_sets[index]]
+                    if len(intersection) > 1:
+                        unit_rest = [cell for cell in unit if cell not in other_unit_set]
+                        other_unit_rest = [cell for cell in other_unit if cell not in unit_sets[index]]
+                        intersections.append((intersection, unit_rest, other_unit_rest))
+            SudokuPropagator.tables[variant.key] = (peers, intersections)
+        return SudokuPropagator.tables[variant.key]
+
+    def place(self, cell, value):
+        """
+            Sets cell to value and removes value from the candidates of its peers
+        """
+        bit = 1 << (value - 1)
+        if not self.candidates[cell] & bit:
+            self.consistent = False
+            return
+        self.cells[cell] = value
+        self.candidates[cell] = bit
+        for peer in self.peers[cell]:
+            self.eliminate(peer, bit)
+
+    def eliminate(self, cell, bits):
+        """
+            Removes bits from the candidates of cell, returns True if something was removed
+        """
+        candidates = self.candidates[cell]
+        if not candidates & bits:
+            return False
+        if self.cells[cell]:
+            #Two peers with the same value
+            self.consistent = False
+            return False
+        candidates &= ~bits
+        self.candidates[cell] = candidates
+        if candidates == 0:
+            self.consistent = False
+        return True
+
+    def place_naked_singles(self):
+        """
+            Returns True if at least one value was placed
+        """
+        placed = False
+        for cell in range(len(self.cells)):
+            candidates = self.candidates[cell]
+            if self.cells[cell] == 0 and candidates & (candidates - 1) == 0:
+                if candidates == 0:
+                    #No value left for the cell
+                    self.consistent = False
+                    return True
+                self.place(cell, candidates.bit_length())
+                self.naked_singles += 1
+                placed = True
+                if not self.consistent:
+                    return True
+        return placed
+
+    def place_hidden_singles(self):
+        """
+            Returns True if at least one value was placed
+        """
+        cells = self.cells
+        placed = False
+        for unit in self.units:
+            once = twice = 0
+            for cell in unit:
+                candidates = self.candidates[cell]
+                twice |= once & candidates
+                once |= candidates
+            if once != self.full_mask:
+                #A value cannot go anywhere in the unit
+                self.consistent = False
+                return True
+            hidden = once & ~twice
+            if hidden == 0:
+                continue
+            for cell in unit:
+                bit = self.candidates[cell] & hidden
+                if bit and cells[cell] == 0:
+                    if bit & (bit - 1):
+                        #Two values can only go in this cell
+                        self.consistent = False
+                        return True
+                    self.place(cell, bit.bit_length())
+                    self.hidden_singles += 1
+                    placed = True
+                    if not self.consistent:
+                        return True
+        return placed
+
+    def eliminate_locked_candidates(self):
+        """
+            Returns True if at least one candidate was removed
+        """
+        candidates = self.candidates
+        cells = self.cells
+        eliminated = False
+        for intersection, unit_rest, other_unit_rest in self.intersections:
+            intersection_mask = 0
+            for cell in intersection:
+                if cells[cell] == 0:
+                    intersection_mask |= candidates[cell]
+            if intersection_mask == 0:
+                continue
+            unit_rest_mask = other_unit_rest_mask = 0
+            for cell in unit_rest:
+                unit_rest_mask |= candidates[cell]
+            for cell in other_unit_rest:
+                other_unit_rest_mask |= candidates[cell]
+            #Values of a unit that can only be in the intersection are removed from the rest of the other unit (a box and a line :
+            #pointing from the box, claiming from the line)
+            pointing = intersection_mask & ~unit_rest_mask
+            claiming = intersection_mask & ~other_unit_rest_mask
+            for rest, bits in ((other_unit_rest, pointing), (unit_rest, claiming)):
+                if bits == 0:
+                    continue
+                for cell in rest:
+                    if cells[cell] == 0 and self.eliminate(cell, bits):
+                        self.locked_candidates += 1
+                        eliminated = True
+                        if not self.consistent:
+                            return True
+        return eliminated
+
+    def propagate(self, locked_candidates = True):
+        """
+            Applies the rules until nothing changes, the cheapest ones first
+            Returns False if the puzzle has no solution
+        """
+        #An empty cell without candidates never reaches the rules
+        if any(value == 0 and candidates == 0 for value, candidates in zip(self.cells, self.candidates)):
+            self.consistent = False
+        while self.consistent:
+            if self.place_naked_singles():
+                continue
+            if self.place_hidden_singles():
+                continue
+            if locked_candidates and self.eliminate_locked_candidates():
+                continue
+            break
+        return self.consistent
+
+    def is_solved(self):
+        """
+            Returns True if every cell has a value
+        """
+        return all(self.cells)
+
+    def get_sudoku(self):
+        """
+            Returns the Sudoku config with the values placed so far
+        """
+        return Sudoku(self.grid_size, bytearray(self.cells), self.sudoku_config.box_shape)
+
+    def get_eliminated_candidates(self):
+        """
+            Yields the (position, value) pairs that have been removed from the candidates of the empty cells
+        """
+        for position, value in enumerate(self.cells):
+            if value:
+                continue
+            candidates = self.candidates[position]
+            for value in range(1, self.grid_size + 1):
+                if not candidates >> (value - 1) & 1:
+                    yield position, value
+
+
+if __name__ == '__main__':
+    sudoku_test = "004300209005009001070060043006002087190007400050083000600000105003508690042910300"
+    propagator = SudokuPropagator(Sudoku.from_text(sudoku_test))
+    print(propagator.propagate(), propagator.is_solved(), propagator.naked_singles, propagator.hidden_singles)
+    print(propagator.get_sudoku())
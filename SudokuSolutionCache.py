@@ -0,0 +1,259 @@
+import collections
+import itertools
+import shelve
+import time
+from Sudoku import Sudoku
+from SudokuSolver import SudokuSolver
+
+class SudokuSolutionCache:
+    """
+        Cache of Sudoku solutions in front of SudokuSolver.solve_sudoku_exact_cover
+        Puzzles are keyed by a canonical form under the symmetries of the Sudoku :
+        band and row (within a band) permutations, stack and column (within a stack) permutations, transposition
+        and digit relabeling. Two puzzles that are the same up to these symmetries share one cache entry,
+        the solution is stored in canonical coordinates and mapped back through the inverse transform
+        The canonical form is the smallest grid among the transforms that sort bands, rows, stacks and columns
+        by invariants (clue counts) with the digits relabeled by order of first appearance. Rows or columns that
+        the invariants cannot tell apart are enumerated, up to max_candidates orders : beyond that some symmetric
+        duplicates may get different keys (a miss), never a wrong solution since every key is an actual transform
+        Entries live in a bounded LRU dictionary, and in a shelve file when file_path is given
+        Bands are box_rows rows and stacks box_columns columns (see Sudoku.box_shape), grids are only transposed
+        when the boxes are square and the key starts with the box shape
+    """
+    def __init__(self, capacity = 100000, file_path = None, max_candidates = 64):
+        self.capacity = capacity
+        self.max_candidates = max_candidates
+        self.entries = collections.OrderedDict()
+        self.shelf = shelve.open(file_path) if file_path is not None else None
+        #Metrics
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lookup_time = 0.0
+        self.max_lookup_time = 0.0
+
+    def close(self):
+        """
+            Closes the on-disk backend
+        """
+        if self.shelf is not None:
+            self.shelf.close()
+            self.shelf = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @staticmethod
+    def get_line_orders(line_key, group_key, number_of_groups, group_size, max_candidates):
+        """
+            Returns up to max_candidates orders of the N lines (rows or columns) : groups (bands or stacks) are sorted
+            by group_key and the lines of each group by line_key, ties are enumerated
+        """
+        def get_tied_permutations(items, key):
+            #Sorted items, every order of the items that have the same key
+            items = sorted(items, key = key)
+            groups = [list(group) for _, group in itertools.groupby(items, key)]
+            return [list(itertools.chain.from_iterable(choice)) for choice in itertools.product(*(itertools.permutations(group) for group in groups))]
+
+        line_orders_in_group = [get_tied_permutations(range(group * group_size, group * group_size + group_size), line_key) for group in range(number_of_groups)]
+        orders = []
+        for group_order in get_tied_permutations(range(number_of_groups), group_key):
+            for choice in itertools.product(*(line_orders_in_group[group] for group in group_order)):
+                orders.append(list(itertools.chain.from_iterable(choice)))
+                if len(orders) >= max_candidates:
+                    return orders
+        return orders
+
+    def get_canonical_form(self, sudoku_config):
+        """
+            Returns (key, transform) where key is the box shape and the canonical grid as bytes and transform
+            is (transposed, row order, column order, relabeling) : canonical cell (i, j) is cell (row order[i], column order[j])
+            of the (transposed) puzzle and canonical digit relabeling[v] stands for digit v
+        """
+        N = sudoku_config.get_grid_size()
+        box_rows, box_columns = sudoku_config.box_shape
+        cells = bytes(sudoku_config.cells)
+        best = None
+        for transposed in ((False, True) if box_rows == box_columns else (False,)):
+            grid = bytes(cells[C * N + R] for R in range(N) for C in range(N)) if transposed else cells
+            row_counts = [sum(1 for C in range(N) if grid[R * N + C]) for R in range(N)]
+            column_counts = [sum(1 for R in range(N) if grid[R * N + C]) for C in range(N)]
+            #A row is described by its number of clues and the clue counts of the columns of its clues, and conversely
+            row_keys = [(row_counts[R], sorted(column_counts[C] for C in range(N) if grid[R * N + C])) for R in range(N)]
+            column_keys = [(column_counts[C], sorted(row_counts[R] for R in range(N) if grid[R * N + C])) for C in range(N)]
+            band_keys = [sorted(row_keys[R] for R in range(band * box_rows, band * box_rows + box_rows)) for band in range(N // box_rows)]
+            stack_keys = [sorted(column_keys[C] for C in range(stack * box_columns, stack * box_columns + box_columns)) for stack in range(N // box_columns)]
+
+            row_orders = SudokuSolutionCache.get_line_orders(row_keys.__getitem__, band_keys.__getitem__, N // box_rows, box_rows, self.max_candidates)
+            column_orders = SudokuSolutionCache.get_line_orders(column_keys.__getitem__, stack_keys.__getitem__, N // box_columns, box_columns, self.max_candidates)
+            for row_order, column_order in itertools.islice(itertools.product(row_orders, column_orders), self.max_candidates):
+                candidate = bytes(grid[R * N + C] for R in row_order for C in column_order)
+                relabeling = SudokuSolutionCache.get_relabeling(candidate, N)
+                key = bytes(sudoku_config.box_shape) + candidate.translate(relabeling)
+                if best is None or key < best[0]:
+                    best = (key, (transposed, row_order, column_order, relabeling))
+        return best
+
+    @staticmethod
+    def get_relabeling(candidate, N):
+        """
+            Returns the translation table that numbers the digits by order of first appearance
+            (the digits that do not appear come next, in increasing order)
+        """
+        relabeling = bytearray(range(256))
+        next_label = 1
+        seen = set()
+        for value in candidate:
+            if value and value not in seen:
+                seen.add(value)
+                relabeling[value] = next_label
+                next_label += 1
+        for value in range(1, N + 1):
+            if value not in seen:
+                relabeling[value] = next_label
+                next_label += 1
+        return bytes(relabeling)
+
+    @staticmethod
+    def to_canonical(solution_cells, N, transform):
+        """
+            Applies a transform to the cells of a full grid
+        """
+        transposed, row_order, column_order, relabeling = transform
+        if transposed:
+            solution_cells = bytes(solution_cells[C * N + R] for R in range(N) for C in range(N))
+        return bytes(solution_cells[R * N + C] for R in row_order for C in column_order).translate(relabeling)
+
+    @staticmethod
+    def from_canonical(canonical_cells, N, transform):
+        """
+            Applies the inverse of a transform to the cells of a full grid
+        """
+        transposed, row_order, column_order, relabeling = transform
+        inverse_relabeling = bytearray(range(256))
+        for value in range(1, N + 1):
+            inverse_relabeling[relabeling[value]] = value
+        canonical_cells = bytes(canonical_cells).translate(inverse_relabeling)
+        cells = bytearray(N * N)
+        for i, R in enumerate(row_order):
+            for j, C in enumerate(column_order):
+                cells[R * N + C] = canonical_cells[i * N + j]
+        if transposed:
+            cells = bytearray(cells[C * N + R] for R in range(N) for C in range(N))
+        return cells
+
+    def get_entry(self, key):
+        """
+            Returns the canonical solution stored under key (b"" for a puzzle without solution) or None
+        """
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.entries.move_to_end(key)
+            return entry
+        if self.shelf is not None:
+            entry = self.shelf.get(key.hex())
+            if entry is not None:
+                self.disk_hits += 1
+                self.put_entry(key, entry, False)
+        return entry
+
+    def put_entry(self, key, entry, persist = True):
+        """
+            Stores an entry, evicting the least recently used ones beyond capacity
+        """
+        self.entries[key] = entry
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last = False)
+            self.evictions += 1
+        if persist and self.shelf is not None:
+            self.shelf[key.hex()] = entry
+
+    def lookup(self, sudoku_config):
+        """
+            Returns the cached solution of a puzzle (the puzzle itself if it has no solution), None on a miss
+        """
+        return self.lookup_with_key(sudoku_config)[0]
+
+    def lookup_with_key(self, sudoku_config):
+        """
+            Returns (cached solution or None, key, transform) : the canonical form is handed to store on a miss
+        """
+        start = time.perf_counter()
+        N = sudoku_config.get_grid_size()
+        key, transform = self.get_canonical_form(sudoku_config)
+        entry = self.get_entry(key)
+        if entry is None:
+            solution = None
+            self.misses += 1
+        else:
+            self.hits += 1
+            if entry:
+                solution = Sudoku(N, SudokuSolutionCache.from_canonical(entry, N, transform), sudoku_config.box_shape)
+            else:
+                solution = sudoku_config.copy()
+        elapsed = time.perf_counter() - start
+        self.lookup_time += elapsed
+        self.max_lookup_time = max(self.max_lookup_time, elapsed)
+        return solution, key, transform
+
+    def store(self, sudoku_config, solution, canonical_form = None):
+        """
+            Caches the solution of a puzzle (a solution with empty cells means that the puzzle has no solution)
+            canonical_form is the (key, transform) pair of the puzzle when it is already known (see lookup_with_key)
+        """
+        N = sudoku_config.get_grid_size()
+        key, transform = canonical_form or self.get_canonical_form(sudoku_config)
+        if all(solution.cells):
+            self.put_entry(key, SudokuSolutionCache.to_canonical(solution.cells, N, transform))
+        else:
+            self.put_entry(key, b"")
+
+    def solve(self, sudoku_config, backend = "cells", propagate = False):
+        """
+            Returns the solution of a puzzle (text, grid or Sudoku config) from the cache,
+            or solves it with SudokuSolver.solve_sudoku_exact_cover and caches it
+        """
+        sudoku_config = SudokuSolver.get_sudoku_config(sudoku_config)
+        solution, key, transform = self.lookup_with_key(sudoku_config)
+        if solution is None:
+            solution = SudokuSolver.solve_sudoku_exact_cover(sudoku_config, backend, propagate = propagate)
+            self.store(sudoku_config, solution, (key, transform))
+        return solution
+
+    def get_metrics(self):
+        """
+            Returns the cache metrics as a dictionary : hits (of which disk_hits), misses, hit rate, evictions,
+            number of entries in memory, mean and max lookup latency in seconds (canonical form included)
+        """
+        lookups = self.hits + self.misses
+        return {"hits" : self.hits, "disk_hits" : self.disk_hits, "misses" : self.misses,
+                "hit_rate" : self.hits / lookups if lookups else 0.0, "evictions" : self.evictions, "entries" : len(self.entries),
+                "mean_lookup_time" : self.lookup_time / lookups if lookups else 0.0, "max_lookup_time" : self.max_lookup_time}
+
+
+if __name__ == '__main__':
+    import random
+    from SudokuGenerator import SudokuGenerator
+
+    #Random symmetric copies of a few puzzles
+    rng = random.Random(0)
+    puzzles = [SudokuGenerator(seed = seed).generate()[0] for seed in range(5)]
+    cache = SudokuSolutionCache(capacity = 1000)
+    for _ in range(200):
+        grid = rng.choice(puzzles).grid
+        digits = list(range(1, 10))
+        rng.shuffle(digits)
+        bands = rng.sample(range(3), 3)
+        rows = [3 * band + row for band in bands for row in rng.sample(range(3), 3)]
+        grid = [[digits[grid[R][C] - 1] if grid[R][C] else 0 for C in range(9)] for R in rows]
+        if rng.random() < 0.5:
+            grid = [list(column) for column in zip(*grid)]
+        puzzle = Sudoku(9, grid)
+        solution = cache.solve(puzzle, "array")
+        assert all(value == 0 or value == solved for value, solved in zip(puzzle.cells, solution.cells))
+    print(cache.get_metrics())
@@ -1,23 +1,217 @@
+import multiprocessing
+import os
+import time
 from SudokuExactCoverConverter import *
 from ExactCoverSolver import *
 from DancingLinks import *
 from Sudoku import *
+from SudokuBitmaskSolver import SudokuBitmaskSolver
+from SudokuPropagator import SudokuPropagator
+from SudokuVariants import SudokuVariant
+from SudokuCSPConverter import SudokuCSPConverter
+from CSPSolver import CSPSolver
+from SearchStatistics import SearchStatistics
 
 class SudokuSolver:
     @staticmethod
-    def solve_sudoku_exact_cover(sudoku_config):
+    def solve_sudoku_exact_cover(sudoku_config, backend = "cells", return_stats = False, propagate = False, variant = None, time_budget = None):
         """
             Takes a sudoku config and returns a sudoku config solution
+            backend selects the DLX matrix representation (see DancingLinks.DLX_BACKENDS)
+            The DLX matrix is the cached template of the grid size, the clues are covered before
+            the search and uncovered afterwards so the template can serve the next puzzle
+            With propagate, naked / hidden singles and locked candidates are applied on the grid first (see SudokuPropagator) :
+            the search is skipped when they solve the puzzle, else only the remaining cells and candidates are searched
+            If return_stats is True a (solution, search statistics dictionary) pair is returned (see SearchStatistics),
+            the dictionary also tells which path the puzzle took in "path" : "propagation" (solved without search),
+            "exact_cover" (searched) or "contradiction" (propagation proved there is no solution)
+            variant is a SudokuVariant (X-Sudoku, jigsaw, killer, ...), by default the standard variant of the grid size and box shape.
+            When the variant has checks that the columns do not express (killer cage sums) the search goes on until a solution passes them
+            With time_budget (in seconds) the search is aborted once the budget is spent and TimeoutError is raised
         """
-        if isinstance(sudoku_config, str):
-            N, grid = Sudoku.get_grid_from_text(sudoku_config)
-            sudoku_config = Sudoku(N, grid)
-        if isinstance(sudoku_config, list):
-            sudoku_config = Sudoku(len(sudoku_config), sudoku_config)
+        sudoku_config = SudokuSolver.get_sudoku_config(sudoku_config)
+        variant = SudokuVariant.get_variant(sudoku_config, variant)
+        stats = SearchStatistics() if return_stats else None
+        path = "exact_cover"
+        remaining_sudoku_config = sudoku_config
+        eliminated_candidates = []
+        row_numbers = []
 
-        dlx_matrix = SudokuExactCoverConverter.convert_sudoku_to_exact_cover(sudoku_config)
-        solver = ExactCoverSolver(dlx_matrix)
-        list_of_dlx_rows, _ = solver.algorithmX()
+        if propagate:
+            propagator = SudokuPropagator(sudoku_config, variant)
+            if not propagator.propagate():
+                path = "contradiction"
+            else:
+                remaining_sudoku_config = propagator.get_sudoku()
+                if propagator.is_solved():
+                    #Propagation only knows the constraints of the columns, a single grid left that fails the checks has no solution
+                    path = "propagation" if variant.is_solution(propagator.cells) else "contradiction"
+                else:
+                    eliminated_candidates = propagator.get_eliminated_candidates()
 
-        final_grid = SudokuExactCoverConverter.convert_exact_cover_solution_to_sudoku(sudoku_config, list_of_dlx_rows)
+        if path == "exact_cover":
+            dlx_matrix = SudokuExactCoverConverter.get_template_matrix(sudoku_config.get_grid_size(), backend, variant)
+            clue_rows = SudokuExactCoverConverter.cover_clues(dlx_matrix, remaining_sudoku_config)
+            if clue_rows is not None:
+                hidden_rows = SudokuExactCoverConverter.hide_candidates(dlx_matrix, sudoku_config.get_grid_size(), eliminated_candidates)
+                try:
+                    row_numbers = SudokuSolver.search_solution(dlx_matrix, remaining_sudoku_config, variant, stats, time_budget)
+                finally:
+                    SudokuExactCoverConverter.unhide_candidates(dlx_matrix, hidden_rows)
+                    SudokuExactCoverConverter.uncover_clues(dlx_matrix, clue_rows)
+
+        if path == "contradiction" or (path == "exact_cover" and not row_numbers):
+            #No solution, the puzzle itself is returned
+            final_grid = sudoku_config.copy()
+        else:
+            final_grid = SudokuExactCoverConverter.convert_row_numbers_to_sudoku(remaining_sudoku_config, row_numbers)
+        if return_stats:
+            stats = stats.as_dict()
+            stats["path"] = path
+            return final_grid, stats
         return final_grid
+
+    @staticmethod
+    def search_solution(dlx_matrix, sudoku_config, variant, stats = None, time_budget = None):
+        """
+            Returns the row numbers of the first exact cover of dlx_matrix (a template matrix with the clues of sudoku_config covered)
+            whose grid passes the checks of variant, or an empty list
+            The search is resumed in slices until time_budget seconds have passed, it is then aborted
+            (the matrix is restored) and TimeoutError is raised
+        """
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        solver = ExactCoverSolver(dlx_matrix, stats=stats)
+        try:
+            while True:
+                status = solver.search(time_budget = None if deadline is None else max(0.0, deadline - time.perf_counter()))
+                if status == "done":
+                    return []
+                if status == "paused":
+                    raise TimeoutError("No solution found within {} s".format(time_budget))
+                row_numbers = solver.get_row_numbers()
+                if not variant.checked_families or variant.is_solution(SudokuExactCoverConverter.convert_row_numbers_to_sudoku(sudoku_config, row_numbers).cells):
+                    return row_numbers
+        finally:
+            solver.abort()
+
+    @staticmethod
+    def solve_sudoku_bitmask(sudoku_config):
+        """
+            Takes a sudoku config and returns a sudoku config solution
+            Uses candidate bitmasks with naked/hidden singles propagation and MRV branching (see SudokuBitmaskSolver)
+        """
+        sudoku_config = SudokuSolver.get_sudoku_config(sudoku_config)
+
+        return SudokuBitmaskSolver(sudoku_config).solve()
+
+    @staticmethod
+    def solve_sudoku_csp(sudoku_config, inference = "mac"):
+        """
+            Takes a sudoku config and returns a sudoku config solution
+            The Sudoku is solved as a CSP by backtracking with the given inference (see CSPSolver)
+        """
+        sudoku_config = SudokuSolver.get_sudoku_config(sudoku_config)
+
+        csp = SudokuCSPConverter.convert_sudoku_to_csp(sudoku_config)
+        if not CSPSolver(csp, inference).solve():
+            return sudoku_config.copy()
+        return SudokuCSPConverter.convert_csp_solution_to_sudoku(sudoku_config, csp)
+
+    @staticmethod
+    def get_sudoku_config(puzzle):
+        """
+            Returns the Sudoku config of a puzzle given as text (dense digits or '_' separated), grid or Sudoku config
+        """
+        if isinstance(puzzle, str):
+            return Sudoku.from_text(puzzle)
+        if isinstance(puzzle, list):
+            return Sudoku(len(puzzle), puzzle)
+        return puzzle
+
+    @staticmethod
+    def solve_sudoku_text(sudoku_text, backend = "cells", engine = "exact_cover", return_stats = False, propagate = False, time_budget = None):
+        """
+            Takes a puzzle in text form and returns its solution in compact text form
+            (the puzzle itself is returned when it has no solution)
+            engine is one of "exact_cover", "bitmask" or "csp"
+            If return_stats is True a (solution, search statistics dictionary) pair is returned,
+            only the exact_cover engine has statistics (None for the others)
+            propagate and time_budget only apply to the exact_cover engine (see solve_sudoku_exact_cover)
+        """
+        stats = None
+        if engine == "bitmask":
+            solution = SudokuSolver.solve_sudoku_bitmask(sudoku_text)
+        elif engine == "csp":
+            solution = SudokuSolver.solve_sudoku_csp(sudoku_text)
+        elif engine == "exact_cover":
+            solution = SudokuSolver.solve_sudoku_exact_cover(sudoku_text, backend, return_stats, propagate, time_budget = time_budget)
+            if return_stats:
+                solution, stats = solution
+        else:
+            raise ValueError("Unknown Sudoku engine {}, expected exact_cover, bitmask or csp".format(engine))
+        if return_stats:
+            return solution.to_compact_text(), stats
+        return solution.to_compact_text()
+
+    @staticmethod
+    def solve_many(puzzles, workers = None, chunksize = 64, ordered = True, backend = "cells", engine = "exact_cover", return_stats = False, propagate = False):
+        """
+            Solves an iterable of puzzles (text, grids or Sudoku configs) on a pool of worker processes
+            Each worker keeps its own template DLX matrices warm, puzzles and solutions travel as compact text
+            If ordered is True solutions are yielded in the order of the puzzles
+            else (puzzle index, solution) pairs are yielded as soon as they are solved
+            workers defaults to the number of cores, with workers = 1 everything runs in the current process
+            engine is one of "exact_cover", "bitmask" or "csp" (see solve_sudoku_text)
+            If return_stats is True each solution is a (solution, search statistics dictionary) pair
+            propagate runs constraint propagation before the exact cover search (see solve_sudoku_exact_cover)
+        """
+        tasks = ((index, SudokuSolver.get_puzzle_text(puzzle)) for index, puzzle in enumerate(puzzles))
+        if workers is None:
+            workers = os.cpu_count() or 1
+        if workers == 1:
+            for index, sudoku_text in tasks:
+                solution = SudokuSolver.solve_sudoku_text(sudoku_text, backend, engine, return_stats, propagate)
+                yield solution if ordered else (index, solution)
+            return
+
+        with multiprocessing.Pool(workers, initializer = init_solve_many_worker, initargs = (backend, engine, return_stats, propagate)) as pool:
+            if ordered:
+                for _, solution in pool.imap(solve_many_worker, tasks, chunksize):
+                    yield solution
+            else:
+                yield from pool.imap_unordered(solve_many_worker, tasks, chunksize)
+
+    @staticmethod
+    def get_puzzle_text(puzzle):
+        """
+            Returns the text form of a puzzle given as text, grid or Sudoku config
+        """
+        if isinstance(puzzle, str):
+            return puzzle
+        return SudokuSolver.get_sudoku_config(puzzle).to_compact_text()
+
+
+#State of the solve_many worker processes
+solve_many_backend = "cells"
+solve_many_engine = "exact_cover"
+solve_many_return_stats = False
+solve_many_propagate = False
+
+def init_solve_many_worker(backend, engine, return_stats = False, propagate = False):
+    """
+        Pool initializer : builds the 9x9 template matrix once per worker
+    """
+    global solve_many_backend, solve_many_engine, solve_many_return_stats, solve_many_propagate
+    solve_many_backend = backend
+    solve_many_engine = engine
+    solve_many_return_stats = return_stats
+    solve_many_propagate = propagate
+    if engine == "exact_cover":
+        SudokuExactCoverConverter.get_template_matrix(9, backend)
+
+def solve_many_worker(task):
+    """
+        Pool task : solves one (index, puzzle text) pair and returns (index, solution text)
+    """
+    index, sudoku_text = task
+    return index, SudokuSolver.solve_sudoku_text(sudoku_text, solve_many_backend, solve_many_engine, solve_many_return_stats, solve_many_propagate)
@@ -0,0 +1,391 @@
+import itertools
+from array import array
+from Sudoku import Sudoku
+
+class ConstraintFamily:
+    """
+        A family of exact cover columns of a Sudoku variant
+        Setting cell (R, C) to value V (ranges from 0 to N - 1) covers the columns get_row_columns(R, C, V, N)
+        of each family, numbered from 0 inside the family (SudokuVariant adds the offsets)
+        Columns of a primary family are covered exactly once, columns of a secondary family at most once
+        Besides its columns a family describes itself to the grid based solvers :
+            get_units : lists of cells in which every value appears exactly once
+            get_groups : lists of cells whose values are all different (the units by default)
+            get_excluded_candidates : (position, value) pairs that can never be part of a solution
+            is_satisfied : check of a full grid, for the constraints that the grid based solvers cannot express (has_check)
+        get_extra_rows lists the rows of the family that are not a cell assignment, as (name, columns) pairs
+    """
+    secondary = False
+    has_check = False
+
+    def get_number_of_columns(self, N):
+        """
+            Returns the number of columns of the family on an N x N grid, none by default
+        """
+        return 0
+
+    def get_row_columns(self, R, C, V, N):
+        """
+            Returns the columns (numbered inside the family) covered by setting cell (R, C) to value V + 1, none by default
+        """
+        return []
+
+    def get_units(self, N):
+        """
+            Returns the lists of positions in which every value appears exactly once
+        """
+        return []
+
+    def get_groups(self, N):
+        """
+            Returns the lists of positions whose values are all different, the units by default
+        """
+        return self.get_units(N)
+
+    def get_excluded_candidates(self, N):
+        """
+            Returns the (position, value) pairs that can never be part of a solution
+        """
+        return []
+
+    def is_satisfied(self, cells, N):
+        """
+            Returns True if a full grid (flat list of values) satisfies the constraints that the units and groups do not express
+        """
+        return True
+
+    def get_extra_rows(self, N):
+        """
+            Returns the (name, columns) pairs of the rows of the family that are not a cell assignment
+        """
+        return []
+
+    def get_key(self):
+        """
+            Returns a hashable description of the family, used to share the tables of equal variants
+        """
+        return (type(self).__name__,)
+
+class CellFamily(ConstraintFamily):
+    """
+        Each cell has only one value
+    """
+    def get_number_of_columns(self, N):
+        return N * N
+
+    def get_row_columns(self, R, C, V, N):
+        return [R * N + C]
+
+class RowFamily(ConstraintFamily):
+    """
+        Each value appears exactly once in a row
+    """
+    def get_number_of_columns(self, N):
+        return N * N
+
+    def get_row_columns(self, R, C, V, N):
+        return [R * N + V]
+
+    def get_units(self, N):
+        return [[R * N + C for C in range(N)] for R in range(N)]
+
+class ColumnFamily(ConstraintFamily):
+    """
+        Each value appears exactly once in a column
+    """
+    def get_number_of_columns(self, N):
+        return N * N
+
+    def get_row_columns(self, R, C, V, N):
+        return [C * N + V]
+
+    def get_units(self, N):
+        return [[R * N + C for R in range(N)] for C in range(N)]
+
+class RegionFamily(ConstraintFamily):
+    """
+        Each value appears exactly once in a region, region_of_cell gives the region id (0 to N - 1) of each position
+        Regions can have any shape (jigsaw Sudoku) as long as there are N of them with N cells each
+    """
+    def __init__(self, region_of_cell):
+        self.region_of_cell = tuple(region_of_cell)
+        sizes = [0] * len(set(self.region_of_cell))
+        for region in self.region_of_cell:
+            if not 0 <= region < len(sizes):
+                raise ValueError("Region ids must be numbered from 0 to the number of regions - 1")
+            sizes[region] += 1
+        if len(sizes) * len(sizes) != len(self.region_of_cell) or any(size != len(sizes) for size in sizes):
+            raise ValueError("A {0}x{0} grid needs {0} regions of {0} cells".format(len(sizes)))
+
+    def get_number_of_columns(self, N):
+        return N * N
+
+    def get_row_columns(self, R, C, V, N):
+        return [self.region_of_cell[R * N + C] * N + V]
+
+    def get_units(self, N):
+        units = [[] for _ in range(N)]
+        for position, region in enumerate(self.region_of_cell):
+            units[region].append(position)
+        return units
+
+    def get_key(self):
+        return ("RegionFamily", self.region_of_cell)
+
+class BoxFamily(RegionFamily):
+    """
+        Each value appears exactly once in a box, boxes are box_shape = (rows, columns) rectangles (see Sudoku.get_box_tables)
+    """
+    def __init__(self, N, box_shape = None):
+        self.box_shape = box_shape or Sudoku.get_default_box_shape(N)
+        RegionFamily.__init__(self, Sudoku.get_box_tables(N, self.box_shape)[0])
+
+    def get_key(self):
+        return ("BoxFamily", self.box_shape)
+
+class DiagonalFamily(ConstraintFamily):
+    """
+        Each value appears exactly once on each of the two main diagonals (X-Sudoku)
+        The first N columns are the values of the main diagonal, the next N the values of the anti-diagonal
+    """
+    def get_number_of_columns(self, N):
+        return 2 * N
+
+    def get_row_columns(self, R, C, V, N):
+        columns = []
+        if R == C:
+            columns.append(V)
+        if R + C == N - 1:
+            columns.append(N + V)
+        return columns
+
+    def get_units(self, N):
+        return [[R * N + R for R in range(N)], [R * N + N - 1 - R for R in range(N)]]
+
+class CageFamily(ConstraintFamily):
+    """
+        Killer Sudoku cages : the values of a cage are all different and add up to the cage sum
+        cages is a list of (list of (R, C) cells, sum), a cell belongs to at most one cage
+        The sums are exact cover constraints : each cage has a column covered by one of its extra rows, one per set
+        of different values that adds up to the cage sum (see get_cage_combinations), and a column (cage, value) per value.
+        Column (cage, value) is covered either by the cell of the cage that takes the value or by the extra row of a set
+        without the value, so the cells of the cage take exactly the values of the set of the selected extra row
+        The search only goes down the value sets of the right sum, instead of checking the sums on full grids
+        The grid based solvers do not know the extra rows : the values that are in no set are excluded
+        from the candidates of the cage cells and the sums are checked on their solutions
+    """
+    has_check = True
+
+    def __init__(self, cages):
+        self.cages = tuple((tuple(sorted(cells)), cage_sum) for cells, cage_sum in cages)
+        self.cage_of_cell = {}
+        for cage, (cells, _) in enumerate(self.cages):
+            for cell in cells:
+                if cell in self.cage_of_cell:
+                    raise ValueError("Cell {} is in two cages".format(cell))
+                self.cage_of_cell[cell] = cage
+
+    def get_number_of_columns(self, N):
+        #(cage, value) columns then one column per cage
+        return len(self.cages) * (N + 1)
+
+    def get_row_columns(self, R, C, V, N):
+        cage = self.cage_of_cell.get((R, C))
+        return [] if cage is None else [cage * N + V]
+
+    def get_extra_rows(self, N):
+        extra_rows = []
+        for cage, (cells, cage_sum) in enumerate(self.cages):
+            for values in CageFamily.get_cage_combinations(N, len(cells), cage_sum):
+                name = "cage{}={}".format(cage, "+".join(map(str, values)))
+                columns = [V for V in range(N) if V + 1 not in values]
+                extra_rows.append((name, [len(self.cages) * N + cage] + [cage * N + V for V in columns]))
+        return extra_rows
+
+    @staticmethod
+    def get_cage_combinations(N, size, cage_sum):
+        """
+            Returns the sets of 'size' different values (1 to N) adding up to cage_sum, as increasing tuples
+        """
+        combinations = []
+        def extend(values, smallest, total):
+            left = size - len(values)
+            if left == 0:
+                if total == cage_sum:
+                    combinations.append(tuple(values))
+                return
+            for value in range(smallest, N - left + 2):
+                #The smallest and the largest sums that the values after this one can add
+                if total + value * left + left * (left - 1) // 2 > cage_sum:
+                    break
+                if total + value + (left - 1) * (2 * N - left + 2) // 2 < cage_sum:
+                    continue
+                values.append(value)
+                extend(values, value + 1, total + value)
+                values.pop()
+        extend([], 1, 0)
+        return combinations
+
+    def get_groups(self, N):
+        return [[R * N + C for R, C in cells] for cells, _ in self.cages]
+
+    @staticmethod
+    def get_cage_values(N, size, cage_sum):
+        """
+            Returns the set of values that appear in at least one set of 'size' different values (1 to N) adding up to cage_sum
+        """
+        values = set()
+        for value in range(1, N + 1):
+            #(count, sum) pairs reachable with different values other than 'value'
+            reachable = {(0, 0)}
+            for other in range(1, N + 1):
+                if other != value:
+                    reachable |= {(count + 1, total + other) for count, total in reachable if count + 1 < size and total + other <= cage_sum}
+            if (size - 1, cage_sum - value) in reachable:
+                values.add(value)
+        return values
+
+    def get_excluded_candidates(self, N):
+        excluded = []
+        for cells, cage_sum in self.cages:
+            values = CageFamily.get_cage_values(N, len(cells), cage_sum)
+            excluded.extend((R * N + C, value) for R, C in cells for value in range(1, N + 1) if value not in values)
+        return excluded
+
+    def is_satisfied(self, cells, N):
+        return all(sum(cells[R * N + C] for R, C in cage_cells) == cage_sum for cage_cells, cage_sum in self.cages)
+
+    def get_key(self):
+        return ("CageFamily", self.cages)
+
+class SudokuVariant:
+    """
+        A Sudoku variant as a list of constraint families over an N x N grid
+        The exact cover columns of every (R, C, V) row are computed once per variant : primary families first, in order,
+        then the secondary ones, each family starting at the offset that follows the previous family's columns
+        row_columns[(R * N + C) * N + V] is the list of columns of row R_C_V (the template row numbers, see SudokuExactCoverConverter),
+        the extra rows of the families (killer cage value sets) come after the N ** 3 cell rows, their names are in extra_row_names
+        The standard variant (cells, rows, columns, boxes) has the column layout of SudokuExactCoverConverter.get_constrains_rows
+    """
+    #Standard variants indexed by (grid size, box shape)
+    standard_variants = {}
+
+    def __init__(self, grid_size, families, name = None):
+        N = self.grid_size = grid_size
+        self.name = name
+        self.families = list(families)
+        #Primary families first so that the secondary columns come last
+        ordered_families = [family for family in self.families if not family.secondary] + [family for family in self.families if family.secondary]
+        offsets = list(itertools.accumulate((family.get_number_of_columns(N) for family in ordered_families), initial = 0))
+        self.number_of_primary_columns = sum(family.get_number_of_columns(N) for family in ordered_families if not family.secondary)
+        self.number_of_columns = offsets[-1]
+
+        #CSR form of the rows : the columns of row i are indices[indptr[i] : indptr[i + 1]]
+        self.indptr = array('i', [0])
+        self.indices = array('i')
+        self.row_columns = []
+        for R, C, V in itertools.product(range(N), range(N), range(N)):
+            columns = [offset + column for family, offset in zip(ordered_families, offsets) for column in family.get_row_columns(R, C, V, N)]
+            self.row_columns.append(columns)
+            self.indices.extend(columns)
+            self.indptr.append(len(self.indices))
+        self.extra_row_names = []
+        for family, offset in zip(ordered_families, offsets):
+            for name, columns in family.get_extra_rows(N):
+                columns = [offset + column for column in columns]
+                self.extra_row_names.append(name)
+                self.row_columns.append(columns)
+                self.indices.extend(columns)
+                self.indptr.append(len(self.indices))
+
+        self.units = [unit for family in self.families for unit in family.get_units(N)]
+        self.groups = [group for family in self.families for group in family.get_groups(N)]
+        self.excluded_candidates = sorted(set(candidate for family in self.families for candidate in family.get_excluded_candidates(N)))
+        self.checked_families = [family for family in self.families if family.has_check]
+        self.key = (N, tuple(family.get_key() for family in self.families))
+
+    def get_secondary_columns(self):
+        """
+            Returns the number of secondary columns
+        """
+        return self.number_of_columns - self.number_of_primary_columns
+
+    def is_solution(self, cells):
+        """
+            Returns True if a full grid (flat list of values) passes the checks of the families that have one
+        """
+        return all(family.is_satisfied(cells, self.grid_size) for family in self.checked_families)
+
+    @staticmethod
+    def standard(N, box_shape = None):
+        """
+            Returns the variant of classic Sudoku with box_shape boxes (see Sudoku.get_default_box_shape), built once
+        """
+        box_shape = box_shape or Sudoku.get_default_box_shape(N)
+        key = (N, box_shape)
+        if key not in SudokuVariant.standard_variants:
+            SudokuVariant.standard_variants[key] = SudokuVariant(N, [CellFamily(), RowFamily(), ColumnFamily(), BoxFamily(N, box_shape)], "standard")
+        return SudokuVariant.standard_variants[key]
+
+    @staticmethod
+    def x_sudoku(N, box_shape = None):
+        """
+            Returns the variant where the two main diagonals also contain every value once
+        """
+        return SudokuVariant(N, [CellFamily(), RowFamily(), ColumnFamily(), BoxFamily(N, box_shape), DiagonalFamily()], "x_sudoku")
+
+    @staticmethod
+    def jigsaw(N, regions):
+        """
+            Returns the variant where the boxes are replaced by irregular regions,
+            regions is a flat list of region ids or an N x N grid of region ids
+        """
+        if regions and isinstance(regions[0], (list, tuple)):
+            regions = [region for row in regions for region in row]
+        return SudokuVariant(N, [CellFamily(), RowFamily(), ColumnFamily(), RegionFamily(regions)], "jigsaw")
+
+    @staticmethod
+    def killer(N, cages, box_shape = None):
+        """
+            Returns the variant of standard Sudoku with killer cages (see CageFamily)
+        """
+        return SudokuVariant(N, [CellFamily(), RowFamily(), ColumnFamily(), BoxFamily(N, box_shape), CageFamily(cages)], "killer")
+
+    @staticmethod
+    def get_variant(sudoku_config, variant = None):
+        """
+            Returns variant, or the standard variant of the grid size and box shape of sudoku_config when variant is None
+        """
+        if variant is None:
+            return SudokuVariant.standard(sudoku_config.get_grid_size(), sudoku_config.box_shape)
+        if variant.grid_size != sudoku_config.get_grid_size():
+            raise ValueError("A {0}x{0} variant cannot solve a {1}x{1} grid".format(variant.grid_size, sudoku_config.get_grid_size()))
+        return variant
+
+
+if __name__ == '__main__':
+    import time
+    from SudokuSolver import SudokuSolver
+    from SudokuPropagator import SudokuPropagator
+
+    #Empty grids of every size go through the same template pipeline
+    for N in [6, 9, 12, 16, 25]:
+        start = time.perf_counter()
+        solution = SudokuSolver.solve_sudoku_exact_cover(Sudoku(N), "array")
+        print(N, solution.box_shape, all(solution.cells), "{:.3f} s".format(time.perf_counter() - start))
+
+    x_sudoku = SudokuVariant.x_sudoku(9)
+    print(SudokuSolver.solve_sudoku_exact_cover(Sudoku(9), "array", variant = x_sudoku))
+
+    #Killer Sudoku : the two cell cages of a full grid with a few clues
+    full = SudokuSolver.solve_sudoku_exact_cover(Sudoku(9), "array")
+    cages = [([(R, C), (R, C + 1)], full.get_value(R, C) + full.get_value(R, C + 1)) for R in range(9) for C in range(0, 8, 2)]
+    puzzle = Sudoku(9, [[full.get_value(R, C) if (R + C) % 4 == 0 else 0 for C in range(9)] for R in range(9)])
+    solution = SudokuSolver.solve_sudoku_exact_cover(puzzle, "array", propagate = True, variant = SudokuVariant.killer(9, cages))
+    print(solution)
+
+    #No two different values add up to 1 : the cage cells have no candidates, propagation finds the contradiction
+    impossible = SudokuVariant.killer(9, [([(0, 0), (0, 1)], 1)])
+    for propagate in [False, True]:
+        assert SudokuSolver.solve_sudoku_exact_cover(Sudoku(9), "array", propagate = propagate, variant = impossible) == Sudoku(9)
+    assert not SudokuPropagator(Sudoku(9), impossible).propagate()
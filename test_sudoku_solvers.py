@@ -1,24 +1,96 @@
-import pandas as pd
-import random
-import time
-from tqdm import tqdm
-from glob import glob
+import argparse
+import collections
+import multiprocessing
 import os
+import resource
+import time
+from SudokuDataset import SudokuDataset
 from SudokuSolver import *
+
+def solve_and_time(task):
+    """
+        Pool task : solves one puzzle and returns (solution, time spent in seconds, search statistics or None)
+    """
+    sudoku_test, backend, engine, return_stats, propagate = task
+    start = time.perf_counter()
+    solution = SudokuSolver.solve_sudoku_text(sudoku_test, backend, engine, return_stats, propagate)
+    elapsed = time.perf_counter() - start
+    if return_stats:
+        return solution[0], elapsed, solution[1]
+    return solution, elapsed, None
+
+def percentile(sorted_values, p):
+    """
+        Returns the p-th percentile of an already sorted list
+    """
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(p / 100 * len(sorted_values)))]
+
+def get_peak_rss_mb():
+    """
+        Returns the peak resident set size of this process and of its finished children in MB
+    """
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return own / 1024, children / 1024
+
+def benchmark(sudoku_tests, engine, backend, workers, chunksize, return_stats = False, slowest = 5, propagate = False):
+    """
+        Solves all the (quiz, solution) pairs with one engine, checks the solutions and prints
+        puzzles per second and p50/p99 latency per puzzle
+        With return_stats the search statistics are aggregated, the number of puzzles that took each path
+        (see SudokuSolver.solve_sudoku_exact_cover) and the 'slowest' puzzles with the most search nodes are printed
+    """
+    tasks = [(sudoku_test, backend, engine, return_stats, propagate) for sudoku_test, _ in sudoku_tests]
+    curr_time = time.perf_counter()
+    if workers == 1:
+        results = list(map(solve_and_time, tasks))
+    else:
+        with multiprocessing.Pool(workers, initializer = init_solve_many_worker, initargs = (backend, engine)) as pool:
+            results = list(pool.imap(solve_and_time, tasks, chunksize))
+    elapsed = time.perf_counter() - curr_time
+
+    for (solution, _, _), (_, sudoku_solution) in zip(results, sudoku_tests):
+        assert(solution == sudoku_solution)
+    latencies = sorted(latency for _, latency, _ in results)
+    print("{} : {} puzzles in {:.2f}s, {:.1f} puzzles/sec, p50 {:.3f}ms, p99 {:.3f}ms".format(
+        engine, len(latencies), elapsed, len(latencies) / elapsed,
+        1000 * percentile(latencies, 50), 1000 * percentile(latencies, 99)))
+
+    puzzle_stats = [(stats, sudoku_test) for (_, _, stats), (sudoku_test, _) in zip(results, sudoku_tests) if stats is not None]
+    if puzzle_stats:
+        total_stats = SearchStatistics()
+        for stats, _ in puzzle_stats:
+            total_stats.merge(stats)
+        print("    total : {}".format(total_stats))
+        paths = collections.Counter(stats["path"] for stats, _ in puzzle_stats)
+        print("    paths : {}".format(", ".join("{} {}".format(path, count) for path, count in sorted(paths.items()))))
+        puzzle_stats.sort(key = lambda pair : pair[0]["nodes"], reverse = True)
+        for stats, sudoku_test in puzzle_stats[:slowest]:
+            print("    {} : nodes {}, updates {}, max_depth {}".format(sudoku_test, stats["nodes"], stats["updates"], stats["max_depth"]))
+
 if __name__ == '__main__':
-    file_path = "sudoku.csv"
-    n = sum(1 for line in open(file_path)) - 1
-    s = 10000
-    skip = sorted(random.sample(range(1, n+1), n-s))
-    sudoku_tests = pd.read_csv(file_path, skiprows=skip)
-
-    curr_time = time.time()
-    for _, row in tqdm(sudoku_tests.iterrows()):
-        sudoku_test = row["quizzes"]
-        sudoku_solution = row["solutions"]
-        sudoku_test = "_".join([str(c) for c in sudoku_test])
-        exact_cover_solution_config = SudokuSolver.solve_sudoku_exact_cover(sudoku_test)
-        exact_cover_solution = Sudoku.get_text_from_grid(exact_cover_solution_config.grid)
-        exact_cover_solution = exact_cover_solution.replace("_", "")
-        assert(sudoku_solution == exact_cover_solution)
-    print("ExactCover : Average time per sudoku quiz {}".format((time.time() - curr_time) / s))
+    parser = argparse.ArgumentParser(description = "Benchmarks the Sudoku engines on a quizzes/solutions CSV file")
+    parser.add_argument("--file", default = "sudoku.csv")
+    parser.add_argument("--sample", type = int, default = 10000, help = "number of puzzles drawn at random from the file (0 to use offset/limit)")
+    parser.add_argument("--offset", type = int, default = 0)
+    parser.add_argument("--limit", type = int, default = None)
+    parser.add_argument("--seed", type = int, default = None)
+    parser.add_argument("--engines", nargs = "+", default = ["exact_cover", "bitmask"])
+    parser.add_argument("--backend", default = "cells", choices = list(DLX_BACKENDS))
+    parser.add_argument("--workers", type = int, default = os.cpu_count())
+    parser.add_argument("--chunksize", type = int, default = 64)
+    parser.add_argument("--stats", action = "store_true", help = "collect search statistics and print the puzzles with the most nodes")
+    parser.add_argument("--propagate", action = "store_true", help = "run constraint propagation before the exact cover search")
+    args = parser.parse_args()
+
+    dataset = SudokuDataset(args.file)
+    if args.sample:
+        sudoku_tests = dataset.sample(args.sample, args.seed)
+    else:
+        sudoku_tests = list(dataset.iterate(args.offset, args.limit))
+
+    for engine in args.engines:
+        benchmark(sudoku_tests, engine, args.backend, args.workers, args.chunksize, args.stats, propagate = args.propagate)
+    print("Peak RSS : {:.1f}MB (workers {:.1f}MB)".format(*get_peak_rss_mb()))